@@ -0,0 +1,5 @@
+"""python -m api: serve MCP over stdio, one JSON-RPC message per line"""
+from .stdio import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .lag import LagMonitor, get_lag_monitor
+from .metrics import TOOL_THROTTLED
+from .registry import ToolRegistry
+
+# Admission control in front of tools/call. Every session may start
+# MCP_SESSION_RATE calls per second (bursts of MCP_SESSION_BURST) and have
+# MCP_SESSION_MAX_IN_FLIGHT running, async jobs included. Tools add their
+# own per-session rate and a server-wide in-flight cap at registration;
+# MCP_TOOL_RATE_LIMITS ("ask_claude=2/5", rate/burst) and
+# MCP_TOOL_MAX_IN_FLIGHT ("compress_file=4") override them. A rate of 0
+# means unlimited. Calls without a session are budgeted per client address
+# (request.client, which uvicorn's --proxy-headers takes from
+# X-Forwarded-For behind a trusted proxy); only callers with neither, such
+# as a sessionless stdio client, share one budget.
+SESSION_RATE = float(os.getenv("MCP_SESSION_RATE", "20"))
+SESSION_BURST = float(os.getenv("MCP_SESSION_BURST", "40"))
+SESSION_MAX_IN_FLIGHT = int(os.getenv("MCP_SESSION_MAX_IN_FLIGHT", "16"))
+TOOL_RATE_LIMITS = os.getenv("MCP_TOOL_RATE_LIMITS", "")
+TOOL_MAX_IN_FLIGHT = os.getenv("MCP_TOOL_MAX_IN_FLIGHT", "")
+# Load shedding: while event-loop lag is above this, every new tools/call is
+# refused (0 turns it off, along with the lag probe)
+SHED_LAG = float(os.getenv("MCP_SHED_LAG_MS", "500")) / 1000
+# Retry hint for calls refused by an in-flight cap or load shedding
+IN_FLIGHT_RETRY_AFTER = float(os.getenv("MCP_IN_FLIGHT_RETRY_AFTER", "1"))
+
+
+def parse_tool_rates(spec: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "tool=rate/burst,..." (burst defaults to the rate)"""
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        rates[name.strip()] = (float(rate), float(burst or rate))
+    return rates
+
+
+def parse_tool_caps(spec: str) -> Dict[str, int]:
+    """Parse "tool=count,..." """
+    caps = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        caps[name.strip()] = int(value)
+    return caps
+
+
+def _caller(session_id: Optional[str], client: Optional[str]) -> Hashable:
+    """Whose budget a call counts against: its session, else its client address"""
+    if session_id:
+        return session_id
+    # A tuple, so no session id can collide with it
+    return ("client", client)
+
+
+class Throttled(Exception):
+    """A tools/call refused by admission control"""
+
+    def __init__(self, message: str, scope: str, retry_after: float):
+        super().__init__(message)
+        self.scope = scope
+        self.retry_after = retry_after
+
+    def data(self) -> Dict[str, Any]:
+        """JSON-RPC error data"""
+        return {"scope": self.scope, "retryAfter": round(self.retry_after, 3)}
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = now
+
+    def wait(self, now: float) -> float:
+        """Refill, then return how long until a token is available (0 if one is)"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def full_at(self) -> float:
+        return self.updated + (self.burst - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Token-bucket rate limits, in-flight caps and lag-based load shedding.
+
+    admit() and release() are O(1): buckets live in an OrderedDict in
+    last-use order, and about once a second admit() drops buckets from the
+    front that have refilled completely (they behave exactly like new ones).
+    """
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        session_rate: float = SESSION_RATE,
+        session_burst: float = SESSION_BURST,
+        session_max_in_flight: int = SESSION_MAX_IN_FLIGHT,
+        tool_rates: Optional[Dict[str, Tuple[float, float]]] = None,
+        tool_caps: Optional[Dict[str, int]] = None,
+        shed_lag: float = SHED_LAG,
+        monitor: Optional[LagMonitor] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.registry = registry
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.session_max_in_flight = session_max_in_flight
+        self.tool_rates = tool_rates if tool_rates is not None else parse_tool_rates(TOOL_RATE_LIMITS)
+        self.tool_caps = tool_caps if tool_caps is not None else parse_tool_caps(TOOL_MAX_IN_FLIGHT)
+        self.shed_lag = shed_lag
+        self.monitor = monitor if monitor is not None else get_lag_monitor()
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, TokenBucket]" = OrderedDict()
+        self._next_prune = 0.0
+        # tool -> (rate limit, in-flight cap), rebuilt when the tool set changes
+        self._tool_limits: Dict[Optional[str], Tuple[Optional[Tuple[float, float]], Optional[int]]] = {}
+        self._tools_version: Optional[int] = None
+        self._session_in_flight: Dict[Hashable, int] = {}
+        self._tool_in_flight: Dict[str, int] = {}
+        self.throttled = {"session_rate": 0, "tool_rate": 0, "session_in_flight": 0, "tool_in_flight": 0, "overload": 0}
+
+    def _limits_for(self, tool: Optional[str]) -> Tuple[Optional[Tuple[float, float]], Optional[int]]:
+        if self._tools_version != self.registry.version:
+            self._tool_limits.clear()
+            self._tools_version = self.registry.version
+        limits = self._tool_limits.get(tool)
+        if limits is None:
+            registered = self.registry.get(tool)
+            rate = self.tool_rates.get(tool, registered.rate_limit if registered is not None else None)
+            cap = self.tool_caps.get(tool, registered.max_in_flight if registered is not None else None)
+            limits = (rate if rate is not None and rate[0] > 0 else None, cap)
+            if registered is not None:
+                # Unknown names are not cached, so clients cannot grow the dict
+                self._tool_limits[tool] = limits
+        return limits
+
+    def _bucket(self, key: Hashable, rate: float, burst: float, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def _prune(self, now: float) -> None:
+        self._next_prune = now + 1.0
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket.full_at() > now:
+                break
+            del buckets[key]
+
+    def _refuse(self, scope: str, message: str, retry_after: float) -> Throttled:
+        self.throttled[scope] += 1
+        TOOL_THROTTLED.labels(scope).inc()
+        return Throttled(message, scope, retry_after)
+
+    def admit(self, session_id: Optional[str], tool: Optional[str], client: Optional[str] = None) -> None:
+        """Count a tools/call in, or raise Throttled; pair with release()"""
+        session = _caller(session_id, client)
+        if self.shed_lag > 0:
+            self.monitor.ensure_started()
+            if self.monitor.lag > self.shed_lag:
+                raise self._refuse("overload", "Server overloaded", IN_FLIGHT_RETRY_AFTER)
+
+        if self._session_in_flight.get(session, 0) >= self.session_max_in_flight:
+            raise self._refuse(
+                "session_in_flight",
+                f"Too many calls in flight for this session (limit {self.session_max_in_flight})",
+                IN_FLIGHT_RETRY_AFTER,
+            )
+        tool_rate, cap = self._limits_for(tool)
+        if cap is not None and self._tool_in_flight.get(tool, 0) >= cap:
+            raise self._refuse("tool_in_flight", f"Too many {tool} calls in flight (limit {cap})", IN_FLIGHT_RETRY_AFTER)
+
+        now = self._clock()
+        if now >= self._next_prune:
+            self._prune(now)
+        session_bucket = tool_bucket = None
+        if self.session_rate > 0:
+            session_bucket = self._bucket(session, self.session_rate, self.session_burst, now)
+            wait = session_bucket.wait(now)
+            if wait:
+                raise self._refuse("session_rate", "Rate limit exceeded for this session", wait)
+        if tool_rate is not None:
+            tool_bucket = self._bucket((session, tool), tool_rate[0], tool_rate[1], now)
+            wait = tool_bucket.wait(now)
+            if wait:
+                raise self._refuse("tool_rate", f"Rate limit exceeded for {tool}", wait)
+        # Only spend tokens once every check has passed
+        if session_bucket is not None:
+            session_bucket.tokens -= 1
+        if tool_bucket is not None:
+            tool_bucket.tokens -= 1
+
+        self._session_in_flight[session] = self._session_in_flight.get(session, 0) + 1
+        self._tool_in_flight[tool] = self._tool_in_flight.get(tool, 0) + 1
+
+    def release(self, session_id: Optional[str], tool: Optional[str], client: Optional[str] = None) -> None:
+        session = _caller(session_id, client)
+        remaining = self._session_in_flight[session] - 1
+        if remaining:
+            self._session_in_flight[session] = remaining
+        else:
+            del self._session_in_flight[session]
+        remaining = self._tool_in_flight[tool] - 1
+        if remaining:
+            self._tool_in_flight[tool] = remaining
+        else:
+            del self._tool_in_flight[tool]
+
+    @property
+    def shedding(self) -> bool:
+        return 0 < self.shed_lag < self.monitor.lag
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "throttled": dict(self.throttled),
+            "in_flight": sum(self._session_in_flight.values()),
+            "buckets": len(self._buckets),
+            "event_loop_lag": self.monitor.lag,
+            "max_event_loop_lag": self.monitor.max_lag,
+            "shedding": self.shedding,
+        }
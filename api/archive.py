@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import io
+import posixpath
+import struct
+import tarfile
+import time
+import zipfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from .compression import (
+    Base64Sink,
+    CompressionError,
+    format_compression_report,
+    get_codec,
+    iter_base64_decode,
+)
+from .workers import run_cpu_bound
+
+# Limits of the plain (non-zip64) zip format
+_ZIP_MAX_ENTRIES = 0xFFFF
+_ZIP_MAX_SIZE = 0xFFFFFFFF
+_ZIP_UTF8_FLAG = 0x800
+
+
+class DeflatedEntry:
+    """One unique payload, decoded, hashed and raw-deflated"""
+
+    __slots__ = ("digest", "crc", "size", "data")
+
+    def __init__(self, digest: bytes, crc: int, size: int, data: bytes):
+        self.digest = digest
+        self.crc = crc
+        self.size = size
+        self.data = data
+
+
+def check_entry_name(filename: str) -> str:
+    """Reject names that would extract outside the archive root"""
+    name = filename.replace("\\", "/")
+    if name.startswith("/") or ".." in name.split("/") or posixpath.normpath(name) in (".", ""):
+        raise CompressionError(f"Invalid entry filename: {filename}")
+    return name
+
+
+def deflate_entry(content: str, level: int) -> DeflatedEntry:
+    """Decode a base64 payload and raw-deflate it, hashing as it streams"""
+    digest = hashlib.blake2b(digest_size=16)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = 0
+    size = 0
+    out = []
+    for chunk in iter_base64_decode(content):
+        digest.update(chunk)
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        out.append(compressor.compress(chunk))
+    out.append(compressor.flush())
+    return DeflatedEntry(digest.digest(), crc, size, b"".join(out))
+
+
+def _dos_timestamp(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((max(t.tm_year, 1980) - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def write_zip(entries: List[Tuple[str, DeflatedEntry]], sink) -> None:
+    """Write a zip of already-deflated entries; identical payloads share one buffer"""
+    if len(entries) > _ZIP_MAX_ENTRIES:
+        raise CompressionError(f"Too many entries for zip: {len(entries)}")
+    dos_time, dos_date = _dos_timestamp(time.time())
+    central = []
+    offset = 0
+    for name, entry in entries:
+        if entry.size > _ZIP_MAX_SIZE or offset > _ZIP_MAX_SIZE:
+            raise CompressionError("Archive too large for zip; use a tar format")
+        encoded_name = name.encode("utf-8")
+        header = struct.pack(
+            "<4sHHHHHIIIHH", b"PK\x03\x04", 20, _ZIP_UTF8_FLAG, zipfile.ZIP_DEFLATED,
+            dos_time, dos_date, entry.crc, len(entry.data), entry.size, len(encoded_name), 0,
+        )
+        sink.write(header)
+        sink.write(encoded_name)
+        sink.write(entry.data)
+        central.append(struct.pack(
+            "<4sHHHHHHIIIHHHHHII", b"PK\x01\x02", 20, 20, _ZIP_UTF8_FLAG, zipfile.ZIP_DEFLATED,
+            dos_time, dos_date, entry.crc, len(entry.data), entry.size, len(encoded_name),
+            0, 0, 0, 0, 0o100644 << 16, offset,
+        ) + encoded_name)
+        offset += len(header) + len(encoded_name) + len(entry.data)
+    directory = b"".join(central)
+    sink.write(directory)
+    sink.write(struct.pack(
+        "<4sHHHHIIH", b"PK\x05\x06", 0, 0, len(entries), len(entries), len(directory), offset, 0,
+    ))
+
+
+def write_tar(
+    names: List[str],
+    files: List[Dict[str, str]],
+    compress_format: str,
+    level: int,
+    threads: int,
+    sink,
+) -> Tuple[int, int]:
+    """Write a compressed tar; repeated payloads become hard links to the first copy.
+
+    Returns (total input bytes, unique payloads).
+    """
+    codec = get_codec(compress_format)
+    writer = codec.open(sink, "archive.tar", level, threads if codec.supports_threads else 0)
+    seen: Dict[bytes, str] = {}
+    total = 0
+    mtime = int(time.time())
+    try:
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for name, item in zip(names, files):
+                data = b"".join(iter_base64_decode(item["content"]))
+                total += len(data)
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+                info = tarfile.TarInfo(name)
+                info.mtime = mtime
+                info.mode = 0o644
+                if digest in seen:
+                    info.type = tarfile.LNKTYPE
+                    info.linkname = seen[digest]
+                    tar.addfile(info)
+                    continue
+                seen[digest] = name
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+                del data
+    finally:
+        writer.close()
+    return total, len(seen)
+
+
+def assemble_zip(
+    entries: List[Tuple[str, DeflatedEntry]],
+    filename: str,
+    unique_count: int,
+    output=None,
+) -> str:
+    """Write a zip of deflated entries to `output` (inline base64 if None); returns the report"""
+    sink = output if output is not None else Base64Sink()
+    write_zip(entries, sink)
+    total = sum(entry.size for _, entry in entries)
+    return format_compression_report("zip", total, f"{filename}.zip", sink, (len(entries), unique_count))
+
+
+def assemble_tar(
+    names: List[str],
+    files: List[Dict[str, str]],
+    filename: str,
+    compress_format: str,
+    level: int,
+    threads: int,
+    output=None,
+) -> str:
+    """Write a compressed tar to `output` (inline base64 if None); returns the report"""
+    codec = get_codec(compress_format)
+    sink = output if output is not None else Base64Sink()
+    total, unique_count = write_tar(names, files, compress_format, level, threads, sink)
+    return format_compression_report(
+        compress_format, total, f"{filename}.tar{codec.extension}", sink, (len(files), unique_count)
+    )
+
+
+def _check_names(files: List[Dict[str, str]]) -> List[str]:
+    names = [check_entry_name(item["filename"]) for item in files]
+    if len(set(names)) != len(names):
+        raise CompressionError("Duplicate entry filenames in 'files'")
+    return names
+
+
+async def build_archive(
+    files: List[Dict[str, str]],
+    filename: str,
+    compress_format: str,
+    level: Optional[int] = None,
+    threads: int = 0,
+    output=None,
+) -> str:
+    """Pack several base64 payloads into one archive; returns the report text.
+
+    The archive is base64-encoded into the report unless `output` (e.g. a
+    blob writer) is given to receive the raw bytes.
+
+    "zip" produces a zip whose entries are deflated in parallel on the
+    worker pool, compressing identical payloads once. Every other format
+    produces a tar compressed with that codec (e.g. "gzip" -> .tar.gz).
+    """
+    names = _check_names(files)
+    codec = get_codec(compress_format)
+    level = codec.check_level(level)
+
+    if compress_format == "zip":
+        unique: Dict[str, "asyncio.Future[DeflatedEntry]"] = {}
+        for item in files:
+            content = item["content"]
+            if content not in unique:
+                unique[content] = asyncio.ensure_future(
+                    run_cpu_bound(deflate_entry, content, level, size=len(content))
+                )
+        await asyncio.gather(*unique.values())
+        # Different encodings of the same bytes still share one buffer
+        by_digest: Dict[bytes, DeflatedEntry] = {}
+        entries = []
+        for name, item in zip(names, files):
+            entry = unique[item["content"]].result()
+            entry = by_digest.setdefault(entry.digest, entry)
+            entries.append((name, entry))
+
+        # Module-level functions and plain arguments: this may run in a worker process
+        return await run_cpu_bound(
+            assemble_zip, entries, filename, len(by_digest), output,
+            size=sum(len(entry.data) for entry in by_digest.values())
+        )
+
+    return await run_cpu_bound(
+        assemble_tar, names, files, filename, compress_format, level, threads, output,
+        size=sum(len(item["content"]) for item in files)
+    )
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from .cache import ResultCache
+from .jsonrpc import dumps
+from .metrics import UPSTREAM_DURATION, timed
+
+if TYPE_CHECKING:
+    import anthropic
+
+# ask_claude_batch: prompts submitted as one Message Batches job, then
+# polled every MCP_BATCH_POLL_INTERVAL seconds. Progress, each result and
+# the end of the batch are published to the submitting session; finished
+# batches stay pollable (batches/get) in a store bounded by the size of
+# their results. At most MCP_BATCH_MAX_ACTIVE batches are followed at once.
+# Like jobs, the poller runs in this process, so a serverless instance
+# only delivers results while it lives.
+BATCH_MAX_PROMPTS = int(os.getenv("MCP_BATCH_MAX_PROMPTS", "10000"))
+BATCH_MAX_ACTIVE = int(os.getenv("MCP_BATCH_MAX_ACTIVE", "16"))
+BATCH_POLL_INTERVAL = float(os.getenv("MCP_BATCH_POLL_INTERVAL", "30"))
+BATCH_RESULT_MAX_BYTES = int(os.getenv("MCP_BATCH_RESULT_MAX_BYTES", str(64 * 1024 * 1024)))
+BATCH_RESULT_TTL = float(os.getenv("MCP_BATCH_RESULT_TTL", "86400"))
+# Consecutive failed polls before a batch is given up on
+BATCH_MAX_POLL_ERRORS = 5
+
+Publish = Callable[[Optional[str], Dict[str, Any]], None]
+ResultText = Callable[[str, bool], Dict[str, Any]]
+
+
+class BatchLimitExceeded(RuntimeError):
+    """Raised when MCP_BATCH_MAX_ACTIVE batches are already being followed"""
+
+
+class BatchRun:
+    """One upstream Message Batch: in_progress -> canceling -> ended | failed"""
+
+    __slots__ = (
+        "id", "session_id", "size", "status", "counts", "results", "error", "created_at", "ended_at",
+        "task", "result_bytes",
+    )
+
+    def __init__(self, batch_id: str, session_id: Optional[str], size: int):
+        self.id = batch_id
+        self.session_id = session_id
+        self.size = size
+        self.status = "in_progress"
+        self.counts: Dict[str, int] = {"processing": size, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        # One entry per prompt, filled in as results are read
+        self.results: List[Optional[Dict[str, Any]]] = [None] * size
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.ended_at: Optional[float] = None
+        self.task: Optional[asyncio.Future] = None
+        self.result_bytes = 0
+
+    def describe(self, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """The batch as returned by batches/get, with results[offset:offset + limit]"""
+        end = self.size if limit is None else min(self.size, offset + limit)
+        info: Dict[str, Any] = {
+            "batchId": self.id,
+            "status": self.status,
+            "requestCounts": dict(self.counts),
+            "createdAt": self.created_at,
+            "endedAt": self.ended_at,
+            "results": [
+                {"index": index, "result": self.results[index]}
+                for index in range(offset, end)
+                if self.results[index] is not None
+            ],
+        }
+        if end < self.size:
+            info["nextOffset"] = end
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+def _item_result(item: Any, result_text: ResultText) -> Dict[str, Any]:
+    """A tools/call style result for one MessageBatchIndividualResponse"""
+    result = item.result
+    if result.type == "succeeded":
+        return result_text("".join(block.text for block in result.message.content if block.type == "text"), False)
+    if result.type == "errored":
+        error = getattr(result.error, "error", None)
+        return result_text(f"Error calling Claude: {getattr(error, 'message', None) or result.error}", True)
+    return result_text(f"Request {result.type}", True)
+
+
+class BatchManager:
+    """Submits Message Batches and follows them until their results are in"""
+
+    def __init__(
+        self,
+        publish: Publish,
+        result_text: ResultText,
+        max_active: int = BATCH_MAX_ACTIVE,
+        poll_interval: float = BATCH_POLL_INTERVAL,
+        result_max_bytes: int = BATCH_RESULT_MAX_BYTES,
+        result_ttl: float = BATCH_RESULT_TTL,
+    ):
+        self._publish = publish
+        self._result_text = result_text
+        self.max_active = max_active
+        self.poll_interval = poll_interval
+        self._active: Dict[str, BatchRun] = {}
+        self.results = ResultCache(result_max_bytes, result_ttl, sizeof=lambda batch_id, run: run.result_bytes)
+        self.submitted = 0
+        self.prompts = 0
+        self.ended = 0
+        self.failed = 0
+
+    async def submit(
+        self,
+        client: "anthropic.AsyncAnthropic",
+        prompts: List[str],
+        model: str,
+        max_tokens: int,
+        session_id: Optional[str] = None,
+    ) -> BatchRun:
+        """Create the upstream batch (one API request) and start following it"""
+        if len(self._active) >= self.max_active:
+            raise BatchLimitExceeded(f"{self.max_active} batches already in progress")
+        requests = [
+            {
+                "custom_id": str(index),
+                "params": {"model": model, "max_tokens": max_tokens, "messages": [{"role": "user", "content": prompt}]},
+            }
+            for index, prompt in enumerate(prompts)
+        ]
+        with timed(UPSTREAM_DURATION, "batch_create"):
+            batch = await client.messages.batches.create(requests=requests)
+        run = BatchRun(batch.id, session_id, len(prompts))
+        self._active[run.id] = run
+        self.submitted += 1
+        self.prompts += len(prompts)
+        run.task = asyncio.ensure_future(self._follow(client, run))
+        run.task.add_done_callback(lambda task: self._finish(run, task))
+        return run
+
+    async def _follow(self, client: "anthropic.AsyncAnthropic", run: BatchRun) -> None:
+        errors = 0
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                with timed(UPSTREAM_DURATION, "batch_retrieve"):
+                    batch = await client.messages.batches.retrieve(run.id)
+            except Exception:
+                # The SDK has already retried; give the API a few more polls
+                errors += 1
+                if errors >= BATCH_MAX_POLL_ERRORS:
+                    raise
+                continue
+            errors = 0
+            counts = batch.request_counts
+            counts = {name: getattr(counts, name) for name in run.counts}
+            status = "canceling" if batch.processing_status == "canceling" else run.status
+            if counts != run.counts or status != run.status:
+                run.counts = counts
+                run.status = status
+                self._notify(run, "notifications/batches/progress", {
+                    "batchId": run.id, "status": run.status, "requestCounts": dict(counts),
+                })
+            if batch.processing_status == "ended":
+                break
+
+        # Results come as JSONL; each item is published as soon as it is read
+        with timed(UPSTREAM_DURATION, "batch_results"):
+            async for item in await client.messages.batches.results(run.id):
+                index = int(item.custom_id)
+                result = _item_result(item, self._result_text)
+                run.results[index] = result
+                run.result_bytes += len(dumps(result))
+                self._notify(run, "notifications/batches/result", {
+                    "batchId": run.id, "index": index, "result": result,
+                })
+
+    def _finish(self, run: BatchRun, task: asyncio.Future) -> None:
+        run.ended_at = time.time()
+        run.task = None
+        if task.cancelled():
+            run.status = "failed"
+            run.error = "Stopped following the batch"
+            self.failed += 1
+        elif task.exception() is not None:
+            run.status = "failed"
+            run.error = str(task.exception())
+            self.failed += 1
+        else:
+            run.status = "ended"
+            self.ended += 1
+        del self._active[run.id]
+        if not task.cancelled():
+            self._notify(run, "notifications/batches/finished", {
+                "batchId": run.id, "status": run.status, "requestCounts": dict(run.counts), "error": run.error,
+            })
+        if run.result_bytes > self.results.max_bytes:
+            # Every result has been published; keep the outcome pollable
+            run.results = [None] * run.size
+            run.result_bytes = 0
+            run.error = "Results too large to keep; they were sent as notifications/batches/result"
+        self.results.put(run.id, run)
+
+    def _notify(self, run: BatchRun, method: str, params: Dict[str, Any]) -> None:
+        self._publish(run.session_id, {"jsonrpc": "2.0", "method": method, "params": params})
+
+    def get(self, batch_id: str, session_id: Optional[str] = None) -> Optional[BatchRun]:
+        """A batch of this session (in progress or finished); None if unknown or expired"""
+        run = self._active.get(batch_id)
+        if run is None:
+            found, run = self.results.get(batch_id)
+            if not found:
+                return None
+        return run if run.session_id == session_id else None
+
+    async def cancel(self, client: "anthropic.AsyncAnthropic", run: BatchRun) -> bool:
+        """Ask the API to cancel; requests already done still report their results"""
+        if run.task is None:
+            return False
+        with timed(UPSTREAM_DURATION, "batch_cancel"):
+            await client.messages.batches.cancel(run.id)
+        run.status = "canceling"
+        return True
+
+    async def cancel_session(
+        self, get_client: Callable[[], Optional["anthropic.AsyncAnthropic"]], session_id: str
+    ) -> int:
+        """Cancel a session's batches upstream and stop following them.
+
+        `get_client` is only called when the session has batches running, so
+        ending a session that never started one does not load the SDK.
+        """
+        runs = [run for run in self._active.values() if run.session_id == session_id and run.task is not None]
+        if not runs:
+            return 0
+        client = get_client()
+        for run in runs:
+            if client is not None:
+                try:
+                    await self.cancel(client, run)
+                except Exception:
+                    # Still stop following it; the batch expires upstream on its own
+                    pass
+            if run.task is not None:
+                run.task.cancel()
+        return len(runs)
+
+    def shutdown(self) -> None:
+        for run in list(self._active.values()):
+            if run.task is not None:
+                run.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": len(self._active),
+            "submitted": self.submitted,
+            "prompts": self.prompts,
+            "ended": self.ended,
+            "failed": self.failed,
+            "max_active": self.max_active,
+            "results": self.results.stats(),
+        }
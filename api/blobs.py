@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from .compression import FileChunks
+
+# Raw payloads uploaded to / produced for clients, referenced by ID so
+# large content does not have to travel base64-encoded inside JSON-RPC.
+# Blobs live on local disk (/tmp on Vercel), so an ID is only valid on the
+# instance that created it.
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(tempfile.gettempdir(), "mcp-blobs"))
+BLOB_MAX_SIZE = int(os.getenv("BLOB_MAX_SIZE", str(128 * 1024 * 1024)))
+BLOB_STORE_MAX_BYTES = int(os.getenv("BLOB_STORE_MAX_BYTES", str(384 * 1024 * 1024)))
+BLOB_TTL = float(os.getenv("BLOB_TTL", "3600"))
+# How often a commit rescans the directory for expired blobs (other
+# processes' uploads included); it also rescans as soon as this process's
+# own uploads would take the store over BLOB_STORE_MAX_BYTES
+BLOB_EVICT_INTERVAL = float(os.getenv("BLOB_EVICT_INTERVAL", "60"))
+BLOB_READ_CHUNK = 256 * 1024
+
+_BLOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class BlobError(ValueError):
+    """Raised for unknown blobs and rejected uploads"""
+
+
+class BlobTooLarge(BlobError):
+    pass
+
+
+class BlobWriter:
+    """Write-only file object for a new blob; invisible until commit().
+
+    An unwritten writer can be pickled to a process-pool worker, whose copy
+    writes to the same .part file; adopt() then takes over its size and
+    digest from the worker's report.
+    """
+
+    def __init__(self, store: "BlobStore", content_type: str, filename: Optional[str] = None):
+        self.store = store
+        self.blob_id = uuid.uuid4().hex
+        self.content_type = content_type
+        self.filename = filename
+        self.size = 0
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._digest: Optional[str] = None
+        self._part_path = os.path.join(store.directory, f".{self.blob_id}.part")
+        self._file = open(self._part_path, "wb")
+
+    def write(self, data) -> int:
+        length = len(data)
+        if self._hash is None:
+            raise BlobError("Blob was written by another process")
+        if self.size + length > self.store.max_size:
+            raise BlobTooLarge(f"Blob exceeds the {self.store.max_size} byte limit")
+        self._file.write(data)
+        self._hash.update(data)
+        self.size += length
+        return length
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    @property
+    def digest(self) -> str:
+        """BLAKE2b hex digest of the bytes written"""
+        return self._hash.hexdigest() if self._hash is not None else self._digest
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Neither the file nor the running hash pickles, so only a writer
+        # with nothing written yet can move to another process
+        if self.size:
+            raise BlobError("Cannot send a partly written blob to another process")
+        state = dict(self.__dict__)
+        del state["_file"], state["_hash"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._hash = hashlib.blake2b(digest_size=16)
+        # The creating process holds the file; open it without truncating
+        self._file = open(self._part_path, "r+b")
+
+    def adopt(self, report) -> None:
+        """Take on what a worker process's copy wrote, from its CompressionReport"""
+        if report.compressed_size != self.size:
+            self.size = report.compressed_size
+            self._digest = report.output_digest
+            self._hash = None
+
+    def commit(self) -> Dict[str, Any]:
+        """Publish the blob and return its metadata.
+
+        Blocking (file I/O and sometimes an eviction scan): async callers
+        run it in a thread.
+        """
+        self._file.close()
+        # The data goes first: info() treats metadata without data as a
+        # broken blob and deletes it
+        os.replace(self._part_path, self.store._data_path(self.blob_id))
+        info = {
+            "blobId": self.blob_id,
+            "size": self.size,
+            "digest": self.digest,
+            "contentType": self.content_type,
+            "filename": self.filename,
+            "createdAt": time.time(),
+        }
+        meta_part_path = os.path.join(self.store.directory, f".{self.blob_id}.meta.part")
+        with open(meta_part_path, "w") as f:
+            json.dump(info, f)
+        os.replace(meta_part_path, self.store._meta_path(self.blob_id))
+        self.store.added(self.size)
+        return info
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self._part_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
+
+
+class BlobStore:
+    """Directory of blobs: <id>.bin holds the bytes, <id>.json the metadata.
+
+    All state is on disk, so worker processes sharing the directory see the
+    same blobs. Expired blobs are removed lazily, and by evict(), which
+    commits run every `evict_interval` seconds or sooner when the store
+    would outgrow `max_bytes`.
+    """
+
+    def __init__(
+        self, directory: str, max_size: int, max_bytes: int, ttl: float, evict_interval: float = BLOB_EVICT_INTERVAL
+    ):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evict_interval = evict_interval
+        # Bytes on disk as of the last scan, plus what this process has added since
+        self._scanned_bytes = 0
+        self._added_bytes = 0
+        self._next_evict = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _data_path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, f"{blob_id}.bin")
+
+    def _meta_path(self, blob_id: str) -> str:
+        return os.path.join(self.directory, f"{blob_id}.json")
+
+    def writer(self, content_type: str = "application/octet-stream", filename: Optional[str] = None) -> BlobWriter:
+        return BlobWriter(self, content_type, filename)
+
+    def info(self, blob_id: str) -> Dict[str, Any]:
+        """Metadata for a live blob; raises BlobError if unknown or expired"""
+        if not isinstance(blob_id, str) or not _BLOB_ID.match(blob_id):
+            raise BlobError(f"Unknown blob: {blob_id}")
+        try:
+            with open(self._meta_path(blob_id)) as f:
+                info = json.load(f)
+        except (FileNotFoundError, ValueError):
+            raise BlobError(f"Unknown blob: {blob_id}") from None
+        if info["createdAt"] + self.ttl <= time.time() or not os.path.exists(self._data_path(blob_id)):
+            self.delete(blob_id)
+            raise BlobError(f"Unknown blob: {blob_id}")
+        return info
+
+    def path(self, blob_id: str) -> str:
+        self.info(blob_id)
+        return self._data_path(blob_id)
+
+    def chunks(self, blob_id: str, chunk_size: int = BLOB_READ_CHUNK) -> FileChunks:
+        """The blob's bytes as a picklable iterable (see compression.FileChunks)"""
+        return FileChunks(self.path(blob_id), chunk_size)
+
+    def delete(self, blob_id: str) -> bool:
+        removed = False
+        for path in (self._data_path(blob_id), self._meta_path(blob_id)):
+            try:
+                os.unlink(path)
+                removed = True
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def added(self, size: int) -> None:
+        """Account for a committed blob, running evict() if it is due"""
+        self._added_bytes += size
+        if time.monotonic() >= self._next_evict or self._scanned_bytes + self._added_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Drop expired blobs and abandoned uploads, then the oldest blobs until under max_bytes.
+
+        Works from a single directory scan: a blob's age is its metadata
+        file's mtime (written at commit) and its size that of its data
+        file, so no file is opened.
+        """
+        self._next_evict = time.monotonic() + self.evict_interval
+        self._added_bytes = 0
+        now = time.time()
+        created: Dict[str, float] = {}
+        sizes: Dict[str, int] = {}
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            name = entry.name
+            if name.endswith(".part"):
+                # Left by a crashed upload; live ones are written to continuously
+                if stat.st_mtime + self.ttl <= now:
+                    self._unlink(entry.path)
+            elif name.endswith(".json"):
+                created[name[:-5]] = stat.st_mtime
+            elif name.endswith(".bin"):
+                sizes[name[:-4]] = stat.st_size
+                if name[:-4] not in created and stat.st_mtime + self.ttl <= now:
+                    # Data whose commit never wrote the metadata
+                    created[name[:-4]] = stat.st_mtime
+
+        live = []
+        for blob_id, created_at in created.items():
+            if created_at + self.ttl <= now or blob_id not in sizes:
+                self.delete(blob_id)
+            else:
+                live.append((created_at, blob_id, sizes[blob_id]))
+        total = sum(size for _, _, size in live)
+        for _, blob_id, size in sorted(live)[:-1]:
+            if total <= self.max_bytes:
+                break
+            self.delete(blob_id)
+            total -= size
+        self._scanned_bytes = total
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Return the shared blob store, creating its directory on first use"""
+    global _store
+    if _store is None:
+        _store = BlobStore(BLOB_DIR, BLOB_MAX_SIZE, BLOB_STORE_MAX_BYTES, BLOB_TTL)
+    return _store
@@ -0,0 +1,512 @@
+import hashlib
+import os
+import re
+import tempfile
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from .compression import COMPRESS_CHUNK_SIZE, Base64Decoder, CompressionError, FileChunks
+from .jsonrpc import RequestId, loads
+from .registry import ToolRegistry
+
+# Request body limits for POST /mcp, in bytes. MCP_MAX_BODY_BYTES applies to
+# every method; a tool can raise it for its own calls (compress_file does)
+# and MCP_BODY_LIMITS overrides any of them by method or tool name, e.g.
+# "tools/list=4096,compress_file=16777216".
+MCP_MAX_BODY_BYTES = int(os.getenv("MCP_MAX_BODY_BYTES", str(1024 * 1024)))
+MCP_BODY_LIMITS = os.getenv("MCP_BODY_LIMITS", "")
+# Bodies up to this size (and within every limit) are read whole and parsed
+# with one loads() call; larger or unsized ones go through BodyParser
+MCP_STREAM_PARSE_THRESHOLD = int(os.getenv("MCP_STREAM_PARSE_THRESHOLD", str(64 * 1024)))
+# Decoded bytes of a streamed argument held in memory before spilling to disk
+MCP_SPOOL_MEMORY = int(os.getenv("MCP_SPOOL_MEMORY", str(1024 * 1024)))
+
+# Up to the closing quote of a string, escapes included
+_STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*')
+_SCALAR_END = re.compile(rb'[ \t\r\n,\]}]')
+_WHITESPACE = b" \t\r\n"
+
+# Positions in the body the parser cares about
+_OTHER, _REQUEST, _PARAMS, _ARGUMENTS = range(4)
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """Parse "name=bytes,name=bytes" into a dict"""
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, value = item.partition("=")
+        limits[name.strip()] = int(value)
+    return limits
+
+
+def _escaped(buf: bytes, start: int, index: int) -> bool:
+    """True if buf[index] follows an odd run of backslashes (within buf[start:])"""
+    run = index
+    while run > start and buf[run - 1] == 0x5C:
+        run -= 1
+    return (index - run) % 2 == 1
+
+
+def _escape_boundary(buf: bytes, start: int, end: int) -> int:
+    """The largest cut <= end that does not split an escape sequence"""
+    if _escaped(buf, start, end):
+        return end - 1
+    # A \uXXXX escape starting in the last 5 bytes is missing hex digits
+    u = buf.rfind(b"\\u", max(start, end - 5), end)
+    if u != -1 and not _escaped(buf, start, u):
+        return u
+    return end
+
+
+def _unescape(quoted: bytes) -> str:
+    try:
+        return loads(quoted)
+    except ValueError as e:
+        raise BodyParseError(f"Invalid string: {e}") from None
+
+
+class BodyTooLarge(ValueError):
+    """Raised as soon as a request body goes over its limit"""
+
+    def __init__(self, limit: int, method: Optional[str] = None, tool: Optional[str] = None, request_id: RequestId = None):
+        target = f" for {tool}" if tool else f" for {method}" if method else ""
+        super().__init__(f"Request body exceeds the {limit} byte limit{target}")
+        self.limit = limit
+        self.method = method
+        self.tool = tool
+        self.request_id = request_id
+
+    def data(self) -> Dict[str, Any]:
+        """JSON-RPC error data"""
+        data: Dict[str, Any] = {"limit": self.limit}
+        if self.method is not None:
+            data["method"] = self.method
+        if self.tool is not None:
+            data["tool"] = self.tool
+        return data
+
+
+class BodyParseError(ValueError):
+    """The body is not valid JSON"""
+
+
+class BodyLimits:
+    """Body limit for a request, resolved from its method and tool name"""
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        default: int = MCP_MAX_BODY_BYTES,
+        overrides: Optional[Dict[str, int]] = None,
+        threshold: int = MCP_STREAM_PARSE_THRESHOLD,
+    ):
+        self.registry = registry
+        self.default = default
+        self.overrides = overrides or {}
+        self.threshold = threshold
+        self._version: Optional[int] = None
+        self._ceiling = default
+        self._floor = default
+
+    def _refresh(self) -> None:
+        if self._version == self.registry.version:
+            return
+        limits = [self.default, *self.overrides.values()]
+        limits.extend(
+            tool.max_request_bytes for tool in self.registry
+            if tool.max_request_bytes is not None and tool.name not in self.overrides
+        )
+        self._ceiling = max(limits)
+        self._floor = min(limits)
+        self._version = self.registry.version
+
+    @property
+    def ceiling(self) -> int:
+        """The largest limit: no body may be bigger than this"""
+        self._refresh()
+        return self._ceiling
+
+    @property
+    def floor(self) -> int:
+        """Bodies up to this size cannot exceed any limit, so skip the incremental parser"""
+        self._refresh()
+        return min(self._floor, self.threshold)
+
+    def limit(self, method: Optional[str], tool: Optional[str] = None) -> int:
+        if method == "tools/call":
+            if tool is None:
+                # Any tool's limit may apply until the name is known
+                return self.ceiling
+            if tool in self.overrides:
+                return self.overrides[tool]
+            registered = self.registry.get(tool)
+            if registered is not None and registered.max_request_bytes is not None:
+                return registered.max_request_bytes
+        if method in self.overrides:
+            return self.overrides[method]
+        return self.default
+
+    def streamed_arguments(self, tool: str) -> Tuple[str, ...]:
+        registered = self.registry.get(tool)
+        return registered.streamed_arguments if registered is not None else ()
+
+
+class StreamedPayload:
+    """A base64 string argument, decoded into a spool file as the body arrives.
+
+    Stands in for the str in the parsed arguments. len() is the number of
+    base64 characters received, as len() of the string would be. Decoding
+    errors are kept and raised when the content is read, so they surface
+    as a tool error rather than failing the whole request. Work that
+    outlives the request (an async job) retain()s it; the spool is deleted
+    when the last reference is closed. The decoded bytes are hashed on the
+    way in, giving the compress_file cache key without another pass. The
+    spool is a named file once it outgrows memory, so a process-pool
+    worker can read it too.
+    """
+
+    def __init__(self, spool_memory: int = MCP_SPOOL_MEMORY):
+        self._spool_memory = spool_memory
+        self._memory = bytearray()
+        self._file = None
+        self._path: Optional[str] = None
+        self._refs = 1
+        self._decoder = Base64Decoder()
+        self._hash = hashlib.blake2b(digest_size=16)
+        self.encoded_size = 0
+        self.size = 0
+        self.error: Optional[str] = None
+
+    def feed(self, data: bytes) -> None:
+        self.encoded_size += len(data)
+        if self.error is not None:
+            return
+        try:
+            decoded = self._decoder.feed(data.decode("ascii"))
+        except UnicodeDecodeError:
+            self.error = "Invalid base64 content: non-ASCII character"
+            return
+        except CompressionError as e:
+            self.error = str(e)
+            return
+        if decoded:
+            if self._file is not None:
+                self._file.write(decoded)
+            else:
+                self._memory += decoded
+                if len(self._memory) > self._spool_memory:
+                    fd, self._path = tempfile.mkstemp(prefix="mcp-spool-")
+                    self._file = os.fdopen(fd, "wb")
+                    self._file.write(self._memory)
+                    self._memory = bytearray()
+            self._hash.update(decoded)
+            self.size += len(decoded)
+
+    def finish(self) -> None:
+        if self.error is None:
+            try:
+                self._decoder.finish()
+            except CompressionError as e:
+                self.error = str(e)
+
+    @property
+    def digest(self) -> str:
+        """BLAKE2b hex digest of the decoded content (see compression.content_digest)"""
+        return self._hash.hexdigest()
+
+    def chunks(self, chunk_size: int = COMPRESS_CHUNK_SIZE) -> Iterable[bytes]:
+        """The decoded content as a picklable iterable, for the worker pool"""
+        if self.error is not None:
+            raise CompressionError(self.error)
+        if self._file is None:
+            memory = bytes(self._memory)
+            return [memory[i:i + chunk_size] for i in range(0, len(memory), chunk_size)]
+        self._file.flush()
+        return FileChunks(self._path, chunk_size)
+
+    def retain(self) -> None:
+        self._refs += 1
+
+    def close(self) -> None:
+        self._refs -= 1
+        if self._refs == 0:
+            self._memory = bytearray()
+            if self._file is not None:
+                self._file.close()
+                os.unlink(self._path)
+                self._file = None
+
+    def __len__(self) -> int:
+        return self.encoded_size
+
+
+class ParsedBody:
+    """A decoded POST /mcp body and the payloads streamed out of it"""
+
+    __slots__ = ("value", "size", "payloads")
+
+    def __init__(self, value: Any, size: int, payloads: Optional[List[StreamedPayload]] = None):
+        self.value = value
+        self.size = size
+        self.payloads = payloads or []
+
+    def close(self) -> None:
+        for payload in self.payloads:
+            payload.close()
+
+
+class BodyParser:
+    """Incremental JSON parser for POST /mcp bodies.
+
+    Parses the body as it is received. Each request object (the body, or
+    each batch element) is held to its limit from the moment its "method"
+    and params "name" are seen, and the called tool's streamed_arguments
+    become StreamedPayloads instead of strings. Streaming needs "name"
+    before "arguments" in params, the order clients send; otherwise the
+    argument is parsed as a plain string, still within the limit.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], limits: BodyLimits):
+        self._chunks = chunks.__aiter__()
+        self._limits = limits
+        self._ceiling = limits.ceiling
+        self._buf = b""
+        self._pos = 0
+        # Position of _buf[0] in the body
+        self._offset = 0
+        self._eof = False
+        self._batch = False
+        # The request object being parsed
+        self._in_request = False
+        self._start = 0
+        self._limit = self._ceiling
+        self._method: Optional[str] = None
+        self._tool: Optional[str] = None
+        self._id: RequestId = None
+        self._streamed: Tuple[str, ...] = ()
+        self.size = 0
+        self.payloads: List[StreamedPayload] = []
+
+    async def parse(self) -> Any:
+        if await self._peek() == 0x5B:
+            self._batch = True
+            value = await self._array(_REQUEST)
+        else:
+            value = await self._value(_REQUEST)
+        if await self._peek() is not None:
+            raise BodyParseError("Unexpected data after the JSON value")
+        return value
+
+    def close(self) -> None:
+        for payload in self.payloads:
+            payload.close()
+
+    def _check(self) -> None:
+        """Enforce the current request object's limit on what has been consumed"""
+        if self._in_request and self._offset + self._pos - self._start > self._limit:
+            raise BodyTooLarge(self._limit, self._method, self._tool, None if self._batch else self._id)
+
+    async def _more(self) -> bool:
+        """Append the next chunk to the buffer; False at the end of the body"""
+        self._check()
+        while not self._eof:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._eof = True
+                break
+            if not chunk:
+                continue
+            self.size += len(chunk)
+            if self.size > self._ceiling:
+                raise BodyTooLarge(self._ceiling)
+            self._offset += self._pos
+            self._buf = self._buf[self._pos:] + chunk
+            self._pos = 0
+            return True
+        return False
+
+    async def _peek(self) -> Optional[int]:
+        """Skip whitespace; the next byte, or None at the end of the body"""
+        while True:
+            buf = self._buf
+            pos = self._pos
+            end = len(buf)
+            while pos < end and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < end:
+                return buf[pos]
+            if not await self._more():
+                return None
+
+    async def _value(self, role: int) -> Any:
+        char = await self._peek()
+        if char == 0x7B:
+            return await self._object(role)
+        if char == 0x5B:
+            return await self._array(_OTHER)
+        if char == 0x22:
+            return await self._string()
+        if char is None:
+            raise BodyParseError("Unexpected end of body")
+        return await self._scalar()
+
+    async def _object(self, role: int) -> Dict[str, Any]:
+        if role == _REQUEST:
+            self._in_request = True
+            self._start = self._offset + self._pos
+            self._limit = self._ceiling
+            self._method = self._tool = self._id = None
+            self._streamed = ()
+        self._pos += 1
+        result = {}
+        char = await self._peek()
+        if char == 0x7D:
+            self._pos += 1
+        else:
+            while True:
+                if char != 0x22:
+                    raise BodyParseError("Expected a string key")
+                key = await self._string()
+                if await self._peek() != 0x3A:
+                    raise BodyParseError("Expected ':' after a key")
+                self._pos += 1
+                result[key] = await self._member(role, key)
+                char = await self._peek()
+                if char == 0x2C:
+                    self._pos += 1
+                    char = await self._peek()
+                elif char == 0x7D:
+                    self._pos += 1
+                    break
+                else:
+                    raise BodyParseError("Expected ',' or '}' in an object")
+        if role == _REQUEST:
+            self._check()
+            self._in_request = False
+        return result
+
+    async def _member(self, role: int, key: str) -> Any:
+        """Parse the value of `key`, tracking what the limits depend on"""
+        if role == _REQUEST:
+            value = await self._value(_PARAMS if key == "params" and self._method == "tools/call" else _OTHER)
+            if key == "method" and isinstance(value, str):
+                self._method = value
+                self._limit = self._limits.limit(value)
+                self._check()
+            elif key == "id" and isinstance(value, (str, int)) and not isinstance(value, bool):
+                self._id = value
+            return value
+        if role == _PARAMS:
+            if key == "arguments":
+                return await self._value(_ARGUMENTS)
+            value = await self._value(_OTHER)
+            if key == "name" and isinstance(value, str):
+                self._tool = value
+                self._streamed = self._limits.streamed_arguments(value)
+                self._limit = self._limits.limit(self._method, value)
+                self._check()
+            return value
+        if role == _ARGUMENTS and key in self._streamed and await self._peek() == 0x22:
+            return await self._stream_string()
+        return await self._value(_OTHER)
+
+    async def _array(self, item_role: int) -> List[Any]:
+        self._pos += 1
+        result = []
+        if await self._peek() == 0x5D:
+            self._pos += 1
+            return result
+        while True:
+            result.append(await self._value(item_role))
+            char = await self._peek()
+            if char == 0x2C:
+                self._pos += 1
+            elif char == 0x5D:
+                self._pos += 1
+                return result
+            else:
+                raise BodyParseError("Expected ',' or ']' in an array")
+
+    async def _segments(self):
+        """Consume the string at the cursor, yielding its raw (still escaped) bytes.
+
+        Pieces never end inside an escape sequence, so each can be unescaped
+        on its own.
+        """
+        self._pos += 1
+        while True:
+            buf = self._buf
+            quote = buf.find(b'"', self._pos)
+            if quote != -1 and _escaped(buf, self._pos, quote):
+                # Escaped quotes ahead: let the regex step over the escapes
+                end = _STRING_BODY.match(buf, self._pos).end()
+                quote = end if end < len(buf) and buf[end] == 0x22 else -1
+            if quote != -1:
+                segment = buf[self._pos:quote]
+                self._pos = quote + 1
+                if segment:
+                    yield segment
+                return
+            end = _escape_boundary(buf, self._pos, len(buf))
+            if end > self._pos:
+                segment = buf[self._pos:end]
+                self._pos = end
+                yield segment
+            if not await self._more():
+                raise BodyParseError("Unterminated string")
+
+    async def _string(self) -> str:
+        parts = [b'"']
+        async for segment in self._segments():
+            parts.append(segment)
+        parts.append(b'"')
+        return _unescape(b"".join(parts))
+
+    async def _stream_string(self) -> StreamedPayload:
+        payload = StreamedPayload()
+        self.payloads.append(payload)
+        async for segment in self._segments():
+            if b"\\" in segment:
+                # e.g. the "\n" line breaks of MIME-style base64
+                segment = _unescape(b'"' + segment + b'"').encode("utf-8")
+            payload.feed(segment)
+        payload.finish()
+        return payload
+
+    async def _scalar(self) -> Any:
+        while True:
+            match = _SCALAR_END.search(self._buf, self._pos)
+            if match is not None or not await self._more():
+                break
+        end = match.start() if match is not None else len(self._buf)
+        token = self._buf[self._pos:end]
+        self._pos = end
+        try:
+            return loads(token)
+        except ValueError:
+            raise BodyParseError(f"Invalid value: {token[:32]!r}") from None
+
+
+async def read_body(request, limits: BodyLimits) -> ParsedBody:
+    """Read and parse a Starlette request's body within `limits`.
+
+    Raises BodyTooLarge as soon as a limit is exceeded (up front when the
+    Content-Length already says so) without reading the rest of the body.
+    """
+    content_length = request.headers.get("content-length")
+    length = int(content_length) if content_length and content_length.isdigit() else None
+    if length is not None and length > limits.ceiling:
+        raise BodyTooLarge(limits.ceiling)
+    if length is not None and length <= limits.floor:
+        raw_body = await request.body()
+        return ParsedBody(loads(raw_body), len(raw_body))
+    parser = BodyParser(request.stream(), limits)
+    try:
+        value = await parser.parse()
+    except BaseException:
+        parser.close()
+        raise
+    return ParsedBody(value, parser.size, parser.payloads)
@@ -0,0 +1,62 @@
+import os
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import anthropic
+
+CLAUDE_KEY = os.getenv("ANTHROPIC_API_KEY")
+CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet-20241022")
+
+# Connection pool and timeouts for the shared client
+ANTHROPIC_MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "20"))
+ANTHROPIC_MAX_KEEPALIVE = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE", "10"))
+ANTHROPIC_KEEPALIVE_EXPIRY = float(os.getenv("ANTHROPIC_KEEPALIVE_EXPIRY", "30"))
+ANTHROPIC_TIMEOUT = float(os.getenv("ANTHROPIC_TIMEOUT", "25"))
+ANTHROPIC_CONNECT_TIMEOUT = float(os.getenv("ANTHROPIC_CONNECT_TIMEOUT", "5"))
+ANTHROPIC_MAX_RETRIES = int(os.getenv("ANTHROPIC_MAX_RETRIES", "2"))
+
+_client: Optional["anthropic.AsyncAnthropic"] = None
+
+def create_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> "anthropic.AsyncAnthropic":
+    """Build an AsyncAnthropic client with its own connection pool"""
+    # The SDK takes seconds to import, so it loads with the first client
+    # rather than at startup
+    import anthropic
+
+    # Use the SDK's own Limits type so we match whichever HTTP library it ships with
+    limits = type(anthropic.DEFAULT_CONNECTION_LIMITS)(
+        max_connections=ANTHROPIC_MAX_CONNECTIONS,
+        max_keepalive_connections=ANTHROPIC_MAX_KEEPALIVE,
+        keepalive_expiry=ANTHROPIC_KEEPALIVE_EXPIRY,
+    )
+    timeout = anthropic.Timeout(ANTHROPIC_TIMEOUT, connect=ANTHROPIC_CONNECT_TIMEOUT)
+    return anthropic.AsyncAnthropic(
+        api_key=api_key or CLAUDE_KEY,
+        base_url=base_url,
+        timeout=timeout,
+        max_retries=ANTHROPIC_MAX_RETRIES,
+        http_client=anthropic.DefaultAsyncHttpxClient(limits=limits, timeout=timeout),
+    )
+
+def get_client() -> Optional["anthropic.AsyncAnthropic"]:
+    """Return the shared client, creating it on first use.
+
+    Normally the app lifespan creates it at startup; the lazy path covers
+    runtimes that do not send ASGI lifespan events.
+    """
+    global _client
+    if _client is None and CLAUDE_KEY:
+        _client = create_client()
+    return _client
+
+def set_client(client: Optional["anthropic.AsyncAnthropic"]) -> None:
+    """Replace the shared client (used by benchmarks and tests)"""
+    global _client
+    _client = client
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
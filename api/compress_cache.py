@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import math
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import ResultCache
+
+# Content-addressed cache of compress_file output, keyed on the BLAKE2b
+# digest of the decoded input plus format, level and filename (gzip and zip
+# embed the filename). The memory tier is an LRU bounded by
+# COMPRESS_CACHE_MAX_BYTES of compressed output (0 disables the cache);
+# with COMPRESS_CACHE_DIR set, entries are also written there and evicted
+# oldest-first past COMPRESS_CACHE_DISK_MAX_BYTES. Outputs larger than
+# COMPRESS_CACHE_MAX_ENTRY_BYTES are not cached.
+COMPRESS_CACHE_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+COMPRESS_CACHE_MAX_ENTRY_BYTES = int(os.getenv("COMPRESS_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+COMPRESS_CACHE_DIR = os.getenv("COMPRESS_CACHE_DIR", "")
+COMPRESS_CACHE_DISK_MAX_BYTES = int(os.getenv("COMPRESS_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Disk entries start with the original (uncompressed) size
+_HEADER = struct.Struct(">Q")
+
+
+class CachedOutput:
+    """Compressed bytes and the size of the input they came from"""
+
+    __slots__ = ("original_size", "data")
+
+    def __init__(self, original_size: int, data: bytes):
+        self.original_size = original_size
+        self.data = data
+
+
+class CompressCache:
+    """Memory LRU of compressed outputs with an optional directory behind it.
+
+    Disk reads and writes run in a thread. The directory may be shared by
+    several processes: each tracks its own estimate of the total and
+    rescans when it goes over, so the bound holds across them eventually.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = COMPRESS_CACHE_MAX_BYTES,
+        max_entry_bytes: int = COMPRESS_CACHE_MAX_ENTRY_BYTES,
+        directory: str = COMPRESS_CACHE_DIR,
+        disk_max_bytes: int = COMPRESS_CACHE_DISK_MAX_BYTES,
+    ):
+        self.memory = ResultCache(max_bytes, math.inf, sizeof=lambda key, value: len(value.data) + len(key))
+        self.max_entry_bytes = max_entry_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes: Optional[int] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory.max_bytes > 0 and self.max_entry_bytes > 0
+
+    @staticmethod
+    def key(digest: str, compress_format: str, level: int, filename: str) -> str:
+        """Cache key for compressing content with this digest"""
+        name = hashlib.blake2b(filename.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+        return f"{digest}-{compress_format}-{level}-{name}"
+
+    async def get(self, key: str) -> Optional[CachedOutput]:
+        found, entry = self.memory.get(key)
+        if not found and self.directory:
+            entry = await asyncio.to_thread(self._read, key)
+            if entry is not None:
+                self.disk_hits += 1
+                self.memory.put(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_saved += entry.original_size
+        return entry
+
+    async def put(self, key: str, original_size: int, data: Optional[bytes]) -> None:
+        """Store an output; None (too large to capture) is ignored"""
+        if data is None or len(data) > self.max_entry_bytes:
+            return
+        entry = CachedOutput(original_size, data)
+        self.memory.put(key, entry)
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write, key, entry)
+            except OSError:
+                # A full or unwritable disk only costs the second tier
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.bin")
+
+    def _read(self, key: str) -> Optional[CachedOutput]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        (original_size,) = _HEADER.unpack_from(data)
+        return CachedOutput(original_size, data[_HEADER.size:])
+
+    def _write(self, key: str, entry: CachedOutput) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, part_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(entry.original_size))
+                f.write(entry.data)
+            os.replace(part_path, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(part_path)
+            except FileNotFoundError:
+                pass
+            raise
+        if self._disk_bytes is None:
+            self._disk_bytes = self._scan()[1]
+        else:
+            self._disk_bytes += _HEADER.size + len(entry.data)
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict()
+
+    def _scan(self) -> Tuple[List[Tuple[float, str, int]], int]:
+        """(mtime, path, size) of every entry, and their total size"""
+        files = []
+        for dir_entry in os.scandir(self.directory):
+            if not dir_entry.name.endswith(".bin"):
+                continue
+            try:
+                stat = dir_entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, dir_entry.path, stat.st_size))
+        return files, sum(size for _, _, size in files)
+
+    def _evict(self) -> None:
+        """Remove the least recently used entries until under disk_max_bytes"""
+        files, total = self._scan()
+        for _, path, size in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        memory = self.memory.stats()
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "bytes_saved": self.bytes_saved,
+            "entries": memory["entries"],
+            "bytes": memory["bytes"],
+            "max_bytes": memory["max_bytes"],
+            "evictions": memory["evictions"],
+            "disk_bytes": self._disk_bytes if self.directory else None,
+        }
@@ -0,0 +1,476 @@
+import base64
+import binascii
+import gzip
+import hashlib
+import os
+import zipfile
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Optional codecs: compress_file only offers the ones that import
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# Bytes of input processed per step. Peak memory for a compression is
+# roughly this plus the (already compressed) output.
+COMPRESS_CHUNK_SIZE = int(os.getenv("COMPRESS_CHUNK_SIZE", str(256 * 1024)))
+
+_WHITESPACE = str.maketrans("", "", " \t\r\n")
+
+
+class CompressionError(ValueError):
+    """Raised for malformed input to the compression pipeline"""
+
+
+class Base64Decoder:
+    """Incremental base64 decoder: feed() text as it arrives, get bytes back.
+
+    Whitespace (e.g. MIME line breaks) is skipped; anything else outside the
+    base64 alphabet is an error. Up to 3 characters are carried between
+    calls, so pieces may be split anywhere.
+    """
+
+    def __init__(self):
+        self._carry = ""
+
+    def feed(self, text: str) -> bytes:
+        piece = self._carry + text.translate(_WHITESPACE)
+        usable = len(piece) - len(piece) % 4
+        self._carry = piece[usable:]
+        if not usable:
+            return b""
+        try:
+            return base64.b64decode(piece[:usable], validate=True)
+        except binascii.Error as e:
+            raise CompressionError(f"Invalid base64 content: {e}") from None
+
+    def finish(self) -> None:
+        """Check that nothing is left over once the input has ended"""
+        if self._carry:
+            raise CompressionError("Invalid base64 content: incorrect padding")
+
+
+def iter_base64_decode(content: str, chunk_size: int = COMPRESS_CHUNK_SIZE) -> Iterator[bytes]:
+    """Decode base64 text in bounded chunks instead of one b64decode call"""
+    # 4 base64 characters encode 3 bytes, so step in multiples of 4
+    step = max(4, (chunk_size * 4 // 3) // 4 * 4)
+    decoder = Base64Decoder()
+    for start in range(0, len(content), step):
+        data = decoder.feed(content[start:start + step])
+        if data:
+            yield data
+    decoder.finish()
+
+
+class Base64Sink:
+    """Write-only file object that base64-encodes what it receives as it goes.
+
+    Only the encoded text is kept, as a list of parts joined once at the end,
+    so the raw compressed bytes never exist as a single buffer.
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._pending = b""
+        self.size = 0
+
+    def write(self, data) -> int:
+        length = len(data)
+        if not length:
+            return 0
+        self.size += length
+        data = self._pending + bytes(data)
+        usable = len(data) - len(data) % 3
+        if usable:
+            self._parts.append(base64.b64encode(data[:usable]).decode("ascii"))
+        self._pending = data[usable:]
+        return length
+
+    def flush(self) -> None:
+        pass
+
+    def parts(self) -> List[str]:
+        """Encoded text parts, including the padded tail"""
+        if self._pending:
+            self._parts.append(base64.b64encode(self._pending).decode("ascii"))
+            self._pending = b""
+        return self._parts
+
+    def getvalue(self) -> str:
+        return "".join(self.parts())
+
+
+class CaptureSink:
+    """Pass writes through to `sink`, keeping a copy of up to `limit` bytes.
+
+    Used to fill the compress_file cache from a normal compression run;
+    once the output outgrows the limit the copy is dropped.
+    """
+
+    def __init__(self, sink, limit: int):
+        self._sink = sink
+        self._limit = limit
+        self._parts: Optional[List[bytes]] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        length = self._sink.write(data)
+        self.size += len(data)
+        if self._parts is not None:
+            if self.size > self._limit:
+                self._parts = None
+            else:
+                self._parts.append(bytes(data))
+        return length
+
+    def flush(self) -> None:
+        pass
+
+    def captured(self) -> Optional[bytes]:
+        """The whole output, or None if it was over the limit"""
+        return b"".join(self._parts) if self._parts is not None else None
+
+
+def content_digest(chunks: Iterable[bytes]) -> str:
+    """BLAKE2b digest of raw content, the compress_file cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def base64_digest(content: str, chunk_size: int = COMPRESS_CHUNK_SIZE) -> str:
+    """content_digest() of the bytes a base64 payload decodes to"""
+    return content_digest(iter_base64_decode(content, chunk_size))
+
+
+class FileChunks:
+    """Iterable over a file's bytes, `chunk_size` at a time.
+
+    Unlike a generator it pickles, so it can be handed to a process-pool
+    worker, which opens the file itself.
+    """
+
+    __slots__ = ("path", "chunk_size")
+
+    def __init__(self, path: str, chunk_size: int = COMPRESS_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+
+    def __iter__(self) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class CountingReader:
+    """Wrap a chunk iterator, tracking the number of bytes passed through"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = chunks
+        self.size = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._chunks:
+            self.size += len(chunk)
+            yield chunk
+
+
+class Codec:
+    """A compression format compress_file can produce.
+
+    Subclasses implement open(); the returned writer takes chunks through
+    write() and flushes everything to the sink on close().
+    """
+
+    name = ""
+    extension = ""
+    media_type = "application/octet-stream"
+    min_level = 0
+    max_level = 0
+    default_level = 0
+    supports_threads = False
+
+    def open(self, sink, filename: str, level: int, threads: int):
+        raise NotImplementedError
+
+    def check_level(self, level: Optional[int]) -> int:
+        if level is None:
+            return self.default_level
+        if not self.min_level <= level <= self.max_level:
+            raise CompressionError(
+                f"Level for {self.name} must be between {self.min_level} and {self.max_level}"
+            )
+        return level
+
+
+class _ZipEntryWriter:
+    """Keeps the ZipFile open for as long as its single streamed entry"""
+
+    def __init__(self, zf: zipfile.ZipFile, filename: str):
+        self._zf = zf
+        self._entry = zf.open(filename, "w")
+
+    def write(self, data) -> None:
+        self._entry.write(data)
+
+    def close(self) -> None:
+        self._entry.close()
+        self._zf.close()
+
+
+class _ChunkCompressorWriter:
+    """Adapts compress(chunk)/finish() style compressors to write()/close()"""
+
+    def __init__(self, sink, compress: Callable[[bytes], bytes], finish: Callable[[], bytes], header: bytes = b""):
+        self._sink = sink
+        self._compress = compress
+        self._finish = finish
+        if header:
+            sink.write(header)
+
+    def write(self, data) -> None:
+        out = self._compress(data)
+        if out:
+            self._sink.write(out)
+
+    def close(self) -> None:
+        out = self._finish()
+        if out:
+            self._sink.write(out)
+
+
+class GzipCodec(Codec):
+    name = "gzip"
+    extension = ".gz"
+    media_type = "application/gzip"
+    min_level = 0
+    max_level = 9
+    default_level = 9
+
+    def open(self, sink, filename, level, threads):
+        return gzip.GzipFile(filename=filename, mode="wb", fileobj=sink, compresslevel=level)
+
+
+class ZipCodec(Codec):
+    name = "zip"
+    extension = ".zip"
+    media_type = "application/zip"
+    min_level = 0
+    max_level = 9
+    default_level = 6
+
+    def open(self, sink, filename, level, threads):
+        # A non-seekable sink makes zipfile stream the entry with a data descriptor
+        zf = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level)
+        return _ZipEntryWriter(zf, filename)
+
+
+class ZstdCodec(Codec):
+    name = "zstd"
+    extension = ".zst"
+    media_type = "application/zstd"
+    min_level = 1
+    max_level = 22
+    default_level = 3
+    supports_threads = True
+
+    def open(self, sink, filename, level, threads):
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        return compressor.stream_writer(sink, closefd=False)
+
+
+class BrotliCodec(Codec):
+    name = "brotli"
+    extension = ".br"
+    media_type = "application/x-brotli"
+    min_level = 0
+    max_level = 11
+    default_level = 11
+
+    def open(self, sink, filename, level, threads):
+        compressor = brotli.Compressor(quality=level)
+        return _ChunkCompressorWriter(sink, compressor.process, compressor.finish)
+
+
+class Lz4Codec(Codec):
+    name = "lz4"
+    extension = ".lz4"
+    media_type = "application/x-lz4"
+    min_level = 0
+    max_level = 16
+    default_level = 0
+
+    def open(self, sink, filename, level, threads):
+        compressor = lz4.frame.LZ4FrameCompressor(compression_level=level)
+        return _ChunkCompressorWriter(sink, compressor.compress, compressor.flush, compressor.begin())
+
+
+# Available codecs by name, in the order advertised to clients. Optional
+# codecs are only listed when their library is installed.
+CODECS: Dict[str, Codec] = {
+    codec.name: codec
+    for codec, available in (
+        (GzipCodec(), True),
+        (ZipCodec(), True),
+        (ZstdCodec(), zstandard is not None),
+        (BrotliCodec(), brotli is not None),
+        (Lz4Codec(), lz4 is not None),
+    )
+    if available
+}
+
+
+def get_codec(compress_format: str) -> Codec:
+    codec = CODECS.get(compress_format)
+    if codec is None:
+        raise CompressionError(f"Unsupported format: {compress_format}")
+    return codec
+
+
+def compress_stream(
+    chunks: Iterable[bytes],
+    filename: str,
+    compress_format: str,
+    sink,
+    level: Optional[int] = None,
+    threads: int = 0,
+) -> int:
+    """Compress `chunks` into the file-like `sink`; returns the input size.
+
+    Works chunk by chunk: neither the input nor the output is held whole.
+    `threads` is only used by codecs that support it (zstd).
+    """
+    codec = get_codec(compress_format)
+    level = codec.check_level(level)
+    reader = CountingReader(chunks)
+    writer = codec.open(sink, filename, level, threads if codec.supports_threads else 0)
+    try:
+        for chunk in reader:
+            writer.write(chunk)
+    finally:
+        writer.close()
+    return reader.size
+
+
+class CompressionReport(str):
+    """compress_file result text that also carries its byte counts.
+
+    A str so callers can use it as the text directly; the sizes survive
+    pickling back from process-pool workers.
+    """
+
+    original_size = 0
+    compressed_size = 0
+    # Raw compressed output, when compress_payload was asked to capture it
+    output: Optional[bytes] = None
+    # Digest of what was written to a blob output (see BlobWriter.adopt)
+    output_digest: Optional[str] = None
+
+
+def format_compression_report(
+    compress_format: str,
+    original_size: int,
+    output_filename: str,
+    output,
+    entries: Optional[Tuple[int, int]] = None,
+) -> CompressionReport:
+    """Build the compress_file result text with a single join.
+
+    `output` is the Base64Sink holding the result inline, or the blob
+    writer it was streamed into. `entries` is (entries, unique payloads)
+    for multi-file archives.
+    """
+    # A worker process's writes must be on disk before the report goes back
+    output.flush()
+    compressed_size = output.size
+    ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
+    entry_line = f"Entries: {entries[0]} ({entries[1]} unique)\n" if entries else ""
+    header = (
+        f"File compressed successfully!\n\n"
+        f"Format: {compress_format}\n"
+        f"{entry_line}"
+        f"Original size: {original_size} bytes\n"
+        f"Compressed size: {compressed_size} bytes\n"
+        f"Compression ratio: {ratio:.1f}%\n"
+        f"Output filename: {output_filename}\n\n"
+    )
+    if isinstance(output, Base64Sink):
+        report = CompressionReport("".join([header, "Compressed content (base64):\n", *output.parts()]))
+    else:
+        report = CompressionReport(f"{header}Output blob: {output.blob_id}\nDownload: GET /blobs/{output.blob_id}")
+        report.output_digest = output.digest
+    report.original_size = original_size
+    report.compressed_size = compressed_size
+    return report
+
+
+def compress_payload(
+    chunks: Iterable[bytes],
+    filename: str,
+    compress_format: str,
+    level: Optional[int] = None,
+    threads: int = 0,
+    output=None,
+    capture: int = 0,
+) -> CompressionReport:
+    """Compress raw chunks and return the report text.
+
+    The compressed bytes go to `output` (e.g. a blob writer) when given,
+    otherwise they are base64-encoded into the report. With `capture`,
+    outputs of up to that many bytes are also kept in report.output.
+    """
+    codec = get_codec(compress_format)
+    if output is None:
+        output = Base64Sink()
+    sink = CaptureSink(output, capture) if capture > 0 else output
+    original_size = compress_stream(chunks, filename, compress_format, sink, level, threads)
+    report = format_compression_report(compress_format, original_size, f"{filename}{codec.extension}", output)
+    if capture > 0:
+        report.output = sink.captured()
+    return report
+
+
+def report_compressed(
+    data: bytes,
+    original_size: int,
+    filename: str,
+    compress_format: str,
+    output=None,
+) -> CompressionReport:
+    """The report for already compressed `data` (a compress_file cache hit)"""
+    codec = get_codec(compress_format)
+    if output is None:
+        output = Base64Sink()
+    output.write(data)
+    return format_compression_report(compress_format, original_size, f"{filename}{codec.extension}", output)
+
+
+def compress_base64(
+    content: str,
+    filename: str,
+    compress_format: str,
+    level: Optional[int] = None,
+    threads: int = 0,
+    output=None,
+    capture: int = 0,
+    chunk_size: int = COMPRESS_CHUNK_SIZE,
+) -> CompressionReport:
+    """Decode, compress and re-encode a base64 payload; returns the report text"""
+    return compress_payload(
+        iter_base64_decode(content, chunk_size), filename, compress_format, level, threads, output, capture
+    )
@@ -0,0 +1,215 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+from .jsonrpc import dumps
+
+# Server-to-client messages for the GET /mcp stream. Each session gets a
+# channel holding a ring buffer of its last SSE_HISTORY_SIZE events, so a
+# client that reconnects with Last-Event-ID gets what it missed replayed.
+# A subscriber whose queue fills up (SSE_QUEUE_SIZE unsent events) is
+# dropped; it can reconnect and resume from the history. Channels with no
+# subscribers are forgotten after SSE_CHANNEL_TTL idle seconds.
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "64"))
+SSE_HISTORY_SIZE = int(os.getenv("SSE_HISTORY_SIZE", "128"))
+SSE_KEEPALIVE_INTERVAL = float(os.getenv("SSE_KEEPALIVE_INTERVAL", "30"))
+SSE_CHANNEL_TTL = float(os.getenv("SSE_CHANNEL_TTL", "300"))
+
+KEEPALIVE_EVENT = b"event: keepalive\ndata: {}\n\n"
+
+
+def encode_event(message: Dict[str, Any], event_id: Optional[int] = None, event: str = "message") -> bytes:
+    """Encode a JSON-RPC message as one SSE event"""
+    frame = b"event: " + event.encode() + b"\ndata: " + dumps(message) + b"\n\n"
+    if event_id is not None:
+        frame = b"id: " + str(event_id).encode() + b"\n" + frame
+    return frame
+
+
+class Subscription:
+    """One connected stream: missed events to replay, then a bounded queue"""
+
+    __slots__ = ("channel", "backlog", "queue", "dropped")
+
+    def __init__(self, channel: Optional["SessionChannel"], queue_size: int, backlog: Optional[List[bytes]] = None):
+        self.channel = channel
+        self.backlog = backlog or []
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(queue_size)
+        self.dropped = False
+
+    def offer(self, frame: bytes) -> bool:
+        """Queue an event without waiting; a full queue drops the subscriber"""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.drop()
+            return False
+        return True
+
+    def drop(self) -> None:
+        """End the stream; queued events are discarded, the client resumes from history"""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    def _idle(self) -> None:
+        if self.queue.empty():
+            self.queue.put_nowait(KEEPALIVE_EVENT)
+
+    async def frames(self, keepalive_interval: float = SSE_KEEPALIVE_INTERVAL) -> AsyncIterator[bytes]:
+        """Yield encoded events, plus a keepalive after each idle interval"""
+        try:
+            backlog, self.backlog = self.backlog, []
+            for frame in backlog:
+                yield frame
+            # A timer handle rather than wait_for(): no extra task per wait
+            loop = asyncio.get_running_loop()
+            while True:
+                timer = loop.call_later(keepalive_interval, self._idle)
+                try:
+                    frame = await self.queue.get()
+                finally:
+                    timer.cancel()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            if self.channel is not None:
+                self.channel.unsubscribe(self)
+
+
+class SessionChannel:
+    """Event ids, recent history and live subscribers for one session"""
+
+    __slots__ = ("session_id", "history", "subscribers", "next_id", "last_active")
+
+    def __init__(self, session_id: str, history_size: int):
+        self.session_id = session_id
+        self.history: Deque[Tuple[int, bytes]] = deque(maxlen=history_size)
+        self.subscribers: Set[Subscription] = set()
+        self.next_id = 1
+        self.last_active = time.monotonic()
+
+    def publish(self, message: Dict[str, Any]) -> Tuple[int, int]:
+        """Record and fan out a message; returns (event id, subscribers dropped)"""
+        event_id = self.next_id
+        self.next_id += 1
+        frame = encode_event(message, event_id)
+        self.history.append((event_id, frame))
+        self.last_active = time.monotonic()
+        dropped = 0
+        for subscription in tuple(self.subscribers):
+            if not subscription.offer(frame):
+                self.subscribers.discard(subscription)
+                dropped += 1
+        return event_id, dropped
+
+    def replay(self, last_event_id: Optional[str]) -> List[bytes]:
+        """History frames after `last_event_id`; none for a fresh or unparseable id"""
+        try:
+            after = int(last_event_id) if last_event_id is not None else None
+        except ValueError:
+            after = None
+        if after is None:
+            return []
+        return [frame for event_id, frame in self.history if event_id > after]
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.discard(subscription)
+        self.last_active = time.monotonic()
+
+
+class EventHub:
+    """Per-session pub/sub for server-initiated messages, in process"""
+
+    def __init__(
+        self,
+        queue_size: int = SSE_QUEUE_SIZE,
+        history_size: int = SSE_HISTORY_SIZE,
+        channel_ttl: float = SSE_CHANNEL_TTL,
+    ):
+        self.queue_size = queue_size
+        self.history_size = history_size
+        self.channel_ttl = channel_ttl
+        self._channels: "OrderedDict[str, SessionChannel]" = OrderedDict()
+        self.dropped = 0
+
+    def _channel(self, session_id: str) -> SessionChannel:
+        channel = self._channels.get(session_id)
+        if channel is None:
+            self._prune()
+            channel = self._channels[session_id] = SessionChannel(session_id, self.history_size)
+        else:
+            channel.last_active = time.monotonic()
+            self._channels.move_to_end(session_id)
+        return channel
+
+    def _prune(self) -> None:
+        """Forget idle channels without subscribers, oldest first"""
+        now = time.monotonic()
+        deadline = now - self.channel_ttl
+        channels = self._channels
+        while channels:
+            session_id, channel = next(iter(channels.items()))
+            if channel.last_active > deadline:
+                break
+            if channel.subscribers:
+                channel.last_active = now
+                channels.move_to_end(session_id)
+            else:
+                del channels[session_id]
+
+    def publish(self, session_id: str, message: Dict[str, Any]) -> int:
+        """Send a message to the session's streams; returns its event id"""
+        event_id, dropped = self._channel(session_id).publish(message)
+        self.dropped += dropped
+        return event_id
+
+    def notifier(self, session_id: str):
+        """A Notify callable that publishes to `session_id`"""
+        async def notify(message: Dict[str, Any]) -> None:
+            self.publish(session_id, message)
+        return notify
+
+    def subscribe(self, session_id: Optional[str], last_event_id: Optional[str] = None) -> Subscription:
+        """Open a stream that first replays the events after `last_event_id`.
+
+        Without a session nothing can be published to the stream, so it
+        only carries keepalives.
+        """
+        if session_id is None:
+            return Subscription(None, self.queue_size)
+        channel = self._channel(session_id)
+        subscription = Subscription(channel, self.queue_size, channel.replay(last_event_id))
+        channel.subscribers.add(subscription)
+        return subscription
+
+    def close(self, session_id: str) -> None:
+        """End a session's streams and discard its history"""
+        channel = self._channels.pop(session_id, None)
+        if channel is not None:
+            for subscription in channel.subscribers:
+                subscription.drop()
+            channel.subscribers.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(c.subscribers) for c in self._channels.values()),
+            "dropped": self.dropped,
+        }
+
+
+_hub: Optional[EventHub] = None
+
+def get_event_hub() -> EventHub:
+    """Return the shared event hub"""
+    global _hub
+    if _hub is None:
+        _hub = EventHub()
+    return _hub
@@ -0,0 +1,272 @@
+import os
+import zlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Tuple
+
+from starlette.datastructures import Headers
+
+from .compression import brotli, zstandard
+from .metrics import RESPONSE_BYTES
+
+# Content-Encoding for HTTP responses, negotiated from Accept-Encoding.
+# MCP_RESPONSE_ENCODINGS lists what the server offers in order of
+# preference (empty turns compression off); codecs whose library is not
+# installed are dropped. Bodies under MCP_RESPONSE_MIN_SIZE bytes are sent
+# as they are. Levels favour speed: these run on every response.
+RESPONSE_ENCODINGS = os.getenv("MCP_RESPONSE_ENCODINGS", "zstd,br,gzip")
+RESPONSE_MIN_SIZE = int(os.getenv("MCP_RESPONSE_MIN_SIZE", "1024"))
+
+_LEVELS = {"gzip": 5, "br": 4, "zstd": 3}
+_AVAILABLE = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+
+# Set in scope["state"] by a handler whose response body is already
+# compressed data (e.g. compress_file output), where another pass only
+# costs CPU
+SKIP_STATE_KEY = "skip_response_compression"
+
+# Building a ZstdCompressor costs about as much as compressing a small
+# body with it, so one-shot compression reuses this one (event loop only:
+# it is not thread-safe)
+_zstd_compressor = None
+
+
+def parse_encodings(spec: str) -> Tuple[str, ...]:
+    names = (name.strip() for name in spec.split(","))
+    return tuple(name for name in names if name and _AVAILABLE.get(name))
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str, offered: Tuple[str, ...]) -> Optional[str]:
+    """The offered encoding the client prefers, or None for identity.
+
+    Highest q-value wins; ties go to the earlier entry in `offered`.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name == "x-gzip":
+            name = "gzip"
+        weights[name] = q
+    wildcard = weights.get("*", 0.0)
+    best = None
+    best_q = 0.0
+    for name in offered:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def skip_compression(scope: MutableMapping[str, Any]) -> None:
+    """Mark the response to this request as not worth compressing"""
+    scope.setdefault("state", {})[SKIP_STATE_KEY] = True
+
+
+def encoding_for(headers: Headers, offered: Tuple[str, ...]) -> Optional[str]:
+    accept_encoding = headers.get("accept-encoding")
+    return negotiate(accept_encoding, offered) if accept_encoding else None
+
+
+def compress_body(encoding: str, data: bytes) -> bytes:
+    """One-shot compression of a whole response body"""
+    level = _LEVELS[encoding]
+    if encoding == "gzip":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    global _zstd_compressor
+    if _zstd_compressor is None:
+        _zstd_compressor = zstandard.ZstdCompressor(level=level)
+    return _zstd_compressor.compress(data)
+
+
+class StreamEncoder:
+    """Compresses a streamed body, flushing after every chunk.
+
+    Each chunk (an SSE event) is decodable as soon as it arrives, while the
+    compression context carries over, so repetitive events shrink well.
+    """
+
+    def __init__(self, encoding: str):
+        level = _LEVELS[encoding]
+        if encoding == "gzip":
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._process = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=level)
+            self._process = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        else:
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._process = compressor.compress
+            self._flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+
+    def encode(self, data: bytes, last: bool = False) -> bytes:
+        out = self._process(data) if data else b""
+        return out + (self._finish() if last else self._flush())
+
+
+def compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith("text/") or media_type == "application/json" or media_type.endswith("+json")
+
+
+Message = MutableMapping[str, Any]
+Send = Callable[[Message], Any]
+
+
+class ResponseCompressionMiddleware:
+    """ASGI middleware applying the negotiated Content-Encoding.
+
+    Whole bodies of compressible types are compressed once they reach
+    `min_size`; text/event-stream responses are compressed as they stream,
+    one flush per event. Responses that already carry a Content-Encoding
+    (e.g. pre-compressed CachedDocuments), other streamed bodies and
+    handlers that set SKIP_STATE_KEY are passed through.
+    """
+
+    def __init__(self, app, encodings: str = RESPONSE_ENCODINGS, min_size: int = RESPONSE_MIN_SIZE):
+        self.app = app
+        self.offered = parse_encodings(encodings)
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not self.offered:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding, self.offered) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _EncodingSender(scope, send, encoding, self.min_size).send)
+
+
+def _is_event_stream(start: Message) -> bool:
+    for name, value in start.get("headers", ()):
+        if name == b"content-type":
+            return value.startswith(b"text/event-stream")
+    return False
+
+
+class _EncodingSender:
+    """send() wrapper for one response: decides at the first body message"""
+
+    __slots__ = ("scope", "_send", "encoding", "min_size", "_start", "_stream")
+
+    def __init__(self, scope, send: Send, encoding: str, min_size: int):
+        self.scope = scope
+        self._send = send
+        self.encoding = encoding
+        self.min_size = min_size
+        self._start: Optional[Message] = None
+        self._stream: Optional[StreamEncoder] = None
+
+    async def send(self, message: Message) -> None:
+        if self._stream is not None:
+            if message["type"] == "http.response.body":
+                more_body = message.get("more_body", False)
+                data = message.get("body", b"")
+                body = self._stream.encode(data, last=not more_body)
+                RESPONSE_BYTES.labels(self.encoding, "original").inc(len(data))
+                RESPONSE_BYTES.labels(self.encoding, "compressed").inc(len(body))
+                message = {"type": "http.response.body", "body": body, "more_body": more_body}
+            await self._send(message)
+            return
+        if message["type"] == "http.response.start":
+            if _is_event_stream(message):
+                content_type, headers = self._scan(message)
+                if self._wanted(message, content_type):
+                    # Event streams can sit idle for long before their first
+                    # event, so their headers go out now rather than with it
+                    self._stream = StreamEncoder(self.encoding)
+                    await self._send({**message, "headers": self._encoded(headers)})
+                    return
+            self._start = message
+            return
+        start, self._start = self._start, None
+        if start is None or message["type"] != "http.response.body":
+            if start is not None:
+                await self._send(start)
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not more_body and len(body) < self.min_size:
+            # Sent as is to every client, so there is no Vary to add either
+            await self._send(start)
+            await self._send(message)
+            return
+        content_type, headers = self._scan(start)
+        if more_body or not self._wanted(start, content_type):
+            await self._send(start)
+            await self._send(message)
+            return
+        compressed = compress_body(self.encoding, body)
+        if len(compressed) >= len(body):
+            await self._send({**start, "headers": headers})
+            await self._send(message)
+            return
+        RESPONSE_BYTES.labels(self.encoding, "original").inc(len(body))
+        RESPONSE_BYTES.labels(self.encoding, "compressed").inc(len(compressed))
+        await self._send({**start, "headers": self._encoded(headers, len(compressed))})
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    def _scan(self, start: Message) -> Tuple[str, List[Tuple[bytes, bytes]]]:
+        """Content type ("" if already encoded) and headers with Vary: Accept-Encoding merged in.
+
+        One pass over the raw headers instead of several MutableHeaders lookups.
+        """
+        content_type = ""
+        vary = None
+        headers = []
+        for name, value in start.get("headers", ()):
+            if name == b"content-encoding":
+                return "", []
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+            if name == b"vary":
+                vary = value
+            else:
+                headers.append((name, value))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        return content_type, headers
+
+    def _wanted(self, start: Message, content_type: str) -> bool:
+        return bool(
+            content_type
+            and start["status"] not in (204, 304)
+            and compressible(content_type)
+            and not self.scope.get("state", {}).get(SKIP_STATE_KEY)
+        )
+
+    def _encoded(self, headers: List[Tuple[bytes, bytes]], length: Optional[int] = None) -> List[Tuple[bytes, bytes]]:
+        """`headers` for the encoded body: Content-Encoding set, Content-Length replaced"""
+        encoded = [(name, value) for name, value in headers if name != b"content-length"]
+        encoded.append((b"content-encoding", self.encoding.encode()))
+        if length is not None:
+            encoded.append((b"content-length", str(length).encode()))
+        return encoded
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .cache import ResultCache
+from .jsonrpc import RequestId, dumps
+
+# Async tools/call jobs (opt in with params._meta.async; sessions only). At most
+# MCP_JOB_CONCURRENCY run at once and MCP_JOB_MAX_PENDING may be queued or
+# running; finished jobs stay pollable in a store bounded by the size of
+# their serialized results. Jobs run in this process after the tools/call
+# response, so they outlive a request's deadline only where the process
+# does (a long-running server rather than a serverless function).
+JOB_CONCURRENCY = int(os.getenv("MCP_JOB_CONCURRENCY", "4"))
+JOB_MAX_PENDING = int(os.getenv("MCP_JOB_MAX_PENDING", "64"))
+JOB_RESULT_MAX_BYTES = int(os.getenv("MCP_JOB_RESULT_MAX_BYTES", str(32 * 1024 * 1024)))
+JOB_RESULT_TTL = float(os.getenv("MCP_JOB_RESULT_TTL", "900"))
+
+JobRun = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when MCP_JOB_MAX_PENDING jobs are already queued or running"""
+
+
+class Job:
+    """One background tools/call: queued -> running -> completed | failed | cancelled"""
+
+    __slots__ = (
+        "id", "tool", "session_id", "request_id", "status", "created_at", "started_at",
+        "finished_at", "result", "error", "size", "task",
+    )
+
+    def __init__(self, tool: str, session_id: Optional[str], request_id: RequestId):
+        self.id = uuid.uuid4().hex
+        self.tool = tool
+        self.session_id = session_id
+        self.request_id = request_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.size = 0
+        self.task: Optional[asyncio.Future] = None
+
+    def describe(self) -> Dict[str, Any]:
+        """The job as returned by jobs/get, including the result once finished"""
+        info: Dict[str, Any] = {
+            "jobId": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.result is not None:
+            info["result"] = self.result
+        if self.error is not None:
+            info["error"] = self.error
+        return info
+
+
+class JobManager:
+    """Runs tool calls as background tasks, at most `concurrency` at a time"""
+
+    def __init__(
+        self,
+        concurrency: int = JOB_CONCURRENCY,
+        max_pending: int = JOB_MAX_PENDING,
+        result_max_bytes: int = JOB_RESULT_MAX_BYTES,
+        result_ttl: float = JOB_RESULT_TTL,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._active: Dict[str, Job] = {}
+        self._by_request: Dict[Tuple[Optional[str], RequestId], Job] = {}
+        self.results = ResultCache(result_max_bytes, result_ttl, sizeof=lambda job_id, job: job.size)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def submit(
+        self,
+        tool: str,
+        run: JobRun,
+        session_id: Optional[str] = None,
+        request_id: RequestId = None,
+        on_finish: Optional[Callable[[Job], None]] = None,
+    ) -> Job:
+        """Queue `run()`; `on_finish(job)` is called once it ends, however it ends"""
+        if len(self._active) >= self.max_pending:
+            self.rejected += 1
+            raise JobQueueFull(f"{self.max_pending} jobs already queued or running")
+        job = Job(tool, session_id, request_id)
+        self._active[job.id] = job
+        if request_id is not None:
+            self._by_request[(session_id, request_id)] = job
+        job.task = asyncio.ensure_future(self._run(job, run))
+        job.task.add_done_callback(lambda task: self._finish(job, task, on_finish))
+        return job
+
+    async def _run(self, job: Job, run: JobRun) -> Dict[str, Any]:
+        async with self._semaphore:
+            job.status = "running"
+            job.started_at = time.time()
+            return await run()
+
+    def _finish(self, job: Job, task: asyncio.Future, on_finish: Optional[Callable[[Job], None]]) -> None:
+        job.finished_at = time.time()
+        job.task = None
+        if task.cancelled():
+            job.status = "cancelled"
+            self.cancelled += 1
+        elif task.exception() is not None:
+            job.status = "failed"
+            job.error = str(task.exception())
+            self.failed += 1
+        else:
+            job.status = "completed"
+            job.result = task.result()
+            self.completed += 1
+        del self._active[job.id]
+        if self._by_request.get((job.session_id, job.request_id)) is job:
+            del self._by_request[(job.session_id, job.request_id)]
+        if on_finish is not None:
+            on_finish(job)
+        job.size = len(dumps(job.describe()))
+        if job.size > self.results.max_bytes:
+            # Keep the outcome pollable even when the result cannot be kept
+            job.result = None
+            job.error = f"Result too large to keep ({job.size} bytes)"
+            job.size = len(dumps(job.describe()))
+        self.results.put(job.id, job)
+
+    def get(self, job_id: str, session_id: Optional[str] = None) -> Optional[Job]:
+        """A job of this session (running or finished); None if unknown or expired"""
+        job = self._active.get(job_id)
+        if job is None:
+            found, job = self.results.get(job_id)
+            if not found:
+                return None
+        return job if job.session_id == session_id else None
+
+    def cancel(self, job: Job) -> bool:
+        """Cancel a queued or running job; False once it has finished"""
+        if job.task is None:
+            return False
+        return job.task.cancel()
+
+    def cancel_request(self, session_id: Optional[str], request_id: RequestId) -> bool:
+        """Cancel the job started by tools/call `request_id` (notifications/cancelled)"""
+        job = self._by_request.get((session_id, request_id))
+        return job is not None and self.cancel(job)
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every unfinished job of a session"""
+        return sum(self.cancel(job) for job in list(self._active.values()) if job.session_id == session_id)
+
+    def shutdown(self) -> None:
+        for job in list(self._active.values()):
+            self.cancel(job)
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self._active.values() if job.status == "running")
+        return {
+            "running": running,
+            "queued": len(self._active) - running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "rejected": self.rejected,
+            "concurrency": self.concurrency,
+            "max_pending": self.max_pending,
+            "results": self.results.stats(),
+        }
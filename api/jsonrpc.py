@@ -0,0 +1,89 @@
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+RequestId = Union[str, int, None]
+JsonRpcResponse = Dict[str, Any]
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return orjson.dumps(value)
+
+    loads = orjson.loads
+    JSONDecodeError = orjson.JSONDecodeError
+else:
+    def dumps(value: Any) -> bytes:
+        """Serialize to compact JSON bytes"""
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    loads = json.loads
+    JSONDecodeError = json.JSONDecodeError
+
+
+class InvalidRequest(ValueError):
+    """The payload is not a valid JSON-RPC request object"""
+
+
+class JsonRpcRequest:
+    """A validated JSON-RPC request envelope.
+
+    A plain slotted class rather than a model: the envelope has four fields
+    and is built on every call, so validation is a handful of isinstance
+    checks.
+    """
+
+    __slots__ = ("jsonrpc", "id", "method", "params", "is_notification")
+
+    def __init__(
+        self,
+        method: str,
+        id: RequestId = None,
+        params: Optional[Dict[str, Any]] = None,
+        jsonrpc: str = "2.0",
+        is_notification: bool = False,
+    ):
+        if not isinstance(method, str):
+            raise InvalidRequest("'method' must be a string")
+        if id is not None and (not isinstance(id, (str, int)) or isinstance(id, bool)):
+            raise InvalidRequest("'id' must be a string, integer or null")
+        if params is not None and not isinstance(params, dict):
+            raise InvalidRequest("'params' must be an object")
+        self.jsonrpc = jsonrpc
+        self.id = id
+        self.method = method
+        self.params = params or {}
+        self.is_notification = is_notification
+
+    @classmethod
+    def from_dict(cls, data: Any) -> "JsonRpcRequest":
+        """Validate a decoded JSON value; a missing "id" marks a notification"""
+        if not isinstance(data, dict):
+            raise InvalidRequest("Request must be an object")
+        if "method" not in data:
+            raise InvalidRequest("Missing 'method'")
+        return cls(
+            data["method"],
+            data.get("id"),
+            data.get("params"),
+            data.get("jsonrpc", "2.0"),
+            "id" not in data,
+        )
+
+
+def create_response(id: RequestId, result: Any = None, error: Any = None) -> JsonRpcResponse:
+    """Build a response object; exactly one of result/error is included"""
+    if error is not None:
+        return {"jsonrpc": "2.0", "id": id, "error": error}
+    return {"jsonrpc": "2.0", "id": id, "result": result}
+
+
+def create_error(code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return error
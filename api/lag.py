@@ -0,0 +1,133 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .metrics import EVENT_LOOP_LAG, EVENT_LOOP_STALLS
+from .profiling import collapse
+
+# How often the event loop is probed for lag, in seconds
+LOOP_LAG_INTERVAL = float(os.getenv("MCP_LOOP_LAG_INTERVAL", "0.1"))
+
+# Stall capture: when the loop has gone MCP_LOOP_STALL_MS past a probe
+# without running it, a watchdog thread snapshots the loop thread's stack,
+# which shows the callback holding it. The last MCP_LOOP_STALL_HISTORY
+# stalls are kept for /debug/lag. 0 (the default) runs no watchdog.
+LOOP_STALL_THRESHOLD = float(os.getenv("MCP_LOOP_STALL_MS", "0")) / 1000
+LOOP_STALL_HISTORY = int(os.getenv("MCP_LOOP_STALL_HISTORY", "32"))
+
+
+class LagMonitor:
+    """Measures event-loop lag: how much later than asked a sleep wakes up.
+
+    A blocked loop cannot run the probe either, so a stall shows up in the
+    sample taken right after it ends. Started on first use by the loop
+    that needs it.
+
+    With a `stall_threshold`, a watchdog thread also catches the stall
+    while it is happening and records the loop thread's stack.
+    """
+
+    def __init__(
+        self,
+        interval: float = LOOP_LAG_INTERVAL,
+        stall_threshold: float = LOOP_STALL_THRESHOLD,
+        stall_history: int = LOOP_STALL_HISTORY,
+    ):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=stall_history)
+        self.stall_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # monotonic time of the last probe wake-up, read by the watchdog
+        self._beat = 0.0
+        # The stall being recorded, closed by the next probe
+        self._stall: Optional[Dict[str, Any]] = None
+        self._watchdog_stop: Optional[threading.Event] = None
+
+    def ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._beat = time.monotonic()
+        self._task = loop.create_task(self._probe())
+        if self.stall_threshold > 0 and self._watchdog_stop is None:
+            self._watchdog_stop = threading.Event()
+            threading.Thread(
+                target=self._watch, args=(threading.get_ident(), self._watchdog_stop),
+                name="mcp-loop-watchdog", daemon=True,
+            ).start()
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            self.lag = max(0.0, loop.time() - start - self.interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            EVENT_LOOP_LAG.labels().set(self.lag)
+            stall = self._stall
+            if stall is not None:
+                self._stall = None
+                stall["blocked_ms"] = round(self.lag * 1000, 1)
+
+    def _watch(self, thread_id: int, stop: threading.Event) -> None:
+        """Watchdog thread: snapshot the loop thread's stack once per stall"""
+        while not stop.wait(max(self.stall_threshold / 2, 0.005)):
+            blocked = time.monotonic() - self._beat - self.interval
+            if blocked < self.stall_threshold or self._stall is not None:
+                continue
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                return
+            stall = {
+                "at": time.time(),
+                # Lower bound; the probe replaces it with the full stall once the loop runs again
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": collapse(frame),
+            }
+            del frame
+            self.stall_count += 1
+            EVENT_LOOP_STALLS.labels().inc()
+            self.stalls.append(stall)
+            self._stall = stall
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog_stop is not None:
+            self._watchdog_stop.set()
+            self._watchdog_stop = None
+        self._task = self._loop = None
+        self._stall = None
+        self.lag = 0.0
+
+    def stats(self, stacks: bool = False) -> Dict[str, Any]:
+        """Lag figures; `stacks` adds the recorded stalls"""
+        info: Dict[str, Any] = {
+            "lag_ms": round(self.lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "stall_threshold_ms": self.stall_threshold * 1000,
+            "stalls": self.stall_count,
+        }
+        if stacks:
+            info["recent_stalls"] = list(self.stalls)
+        return info
+
+
+_monitor: Optional[LagMonitor] = None
+
+def get_lag_monitor() -> LagMonitor:
+    """Return the shared lag monitor"""
+    global _monitor
+    if _monitor is None:
+        _monitor = LagMonitor()
+    return _monitor
@@ -0,0 +1,278 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# In-process metrics rendered in the Prometheus text format on /metrics.
+# Every series keeps plain Python numbers and histograms allocate their
+# bucket counters once per label set, so recording a sample is a dict
+# lookup plus a few additions.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+SIZE_BUCKETS = tuple(float(4 ** n) for n in range(4, 15))  # 256 B .. 256 MiB
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of series, one per combination of label values"""
+
+    kind = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional["MetricRegistry"] = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        (registry if registry is not None else REGISTRY).add(self)
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use"""
+        series = self._series.get(values)
+        if series is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            series = self._series[values] = self._new_series()
+        return series
+
+    def render(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        for values, series in self._series.items():
+            self._render_series(lines, _format_labels(self.labelnames, values), values, series)
+
+    def _render_series(self, lines: List[str], labels: str, values: Tuple[str, ...], series) -> None:
+        lines.append(f"{self.name}{labels} {_format_number(series.value)}")
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self) -> _Value:
+        return _Value()
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_series(self) -> _Value:
+        return _Value()
+
+
+class _HistogramSeries:
+    __slots__ = ("bounds", "counts", "sum", "started")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One counter per bucket plus the +Inf overflow; cumulated on render
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.started = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def start(self) -> float:
+        """Count an operation as in flight; pass the result to finish()"""
+        self.started += 1
+        return perf_counter()
+
+    def finish(self, start: float) -> None:
+        """Record the duration of an operation begun with start()"""
+        value = perf_counter() - start
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def in_flight(self) -> int:
+        return self.started - sum(self.counts)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Optional["MetricRegistry"] = None,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_series(self) -> _HistogramSeries:
+        return _HistogramSeries(self.buckets)
+
+    def _render_series(self, lines: List[str], labels: str, values: Tuple[str, ...], series) -> None:
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), series.counts):
+            cumulative += count
+            bucket_labels = _format_labels(self.labelnames, values, f'le="{_format_number(bound)}"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_number(series.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+
+
+class InFlightGauge(Metric):
+    """Operations started but not finished, per series of a latency histogram.
+
+    Derived at render time from the histogram's start()/finish() counts,
+    so tracking it costs nothing extra on the request path.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, histogram: Histogram, registry: Optional["MetricRegistry"] = None):
+        super().__init__(name, documentation, histogram.labelnames, registry)
+        self._series = histogram._series
+
+    def _render_series(self, lines: List[str], labels: str, values: Tuple[str, ...], series) -> None:
+        lines.append(f"{self.name}{labels} {series.in_flight}")
+
+
+class MetricRegistry:
+    """The metrics exposed together on one endpoint"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def add(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for metric in self._metrics:
+            metric.render(lines)
+        lines.append("")
+        return "\n".join(lines).encode("utf-8")
+
+
+REGISTRY = MetricRegistry()
+
+REQUEST_DURATION = Histogram(
+    "mcp_request_duration_seconds", "JSON-RPC request handling time", ["method"]
+)
+REQUESTS_IN_FLIGHT = InFlightGauge(
+    "mcp_requests_in_flight", "JSON-RPC requests being handled", REQUEST_DURATION
+)
+REQUEST_ERRORS = Counter(
+    "mcp_request_errors_total", "JSON-RPC error responses", ["method", "code"]
+)
+REQUEST_BODY_BYTES = Histogram(
+    "mcp_request_body_bytes", "Size of POST /mcp request bodies", buckets=SIZE_BUCKETS
+)
+TOOL_DURATION = Histogram(
+    "mcp_tool_duration_seconds", "tools/call handler time", ["tool"]
+)
+TOOLS_IN_FLIGHT = InFlightGauge(
+    "mcp_tools_in_flight", "tools/call handlers running", TOOL_DURATION
+)
+TOOL_ERRORS = Counter(
+    "mcp_tool_errors_total", "tools/call results with isError set or raising", ["tool"]
+)
+COMPRESS_BYTES = Histogram(
+    "mcp_compress_bytes", "compress_file payload sizes", ["format", "stage"], buckets=SIZE_BUCKETS
+)
+UPSTREAM_DURATION = Histogram(
+    "anthropic_request_duration_seconds", "Anthropic Messages API call time", ["mode", "outcome"]
+)
+TOOL_THROTTLED = Counter(
+    "mcp_tool_calls_throttled_total", "tools/call refused by admission control", ["scope"]
+)
+RESPONSE_BYTES = Counter(
+    "mcp_response_compression_bytes_total", "HTTP response bytes before and after Content-Encoding",
+    ["encoding", "stage"]
+)
+EVENT_LOOP_LAG = Gauge(
+    "mcp_event_loop_lag_seconds", "How late the event loop ran the last lag probe"
+)
+EVENT_LOOP_STALLS = Counter(
+    "mcp_event_loop_stalls_total", "Event-loop stalls longer than MCP_LOOP_STALL_MS"
+)
+
+# JSON-RPC methods get their own label value; anything else is "other" so
+# clients cannot create unbounded series
+KNOWN_METHODS = frozenset([
+    "initialize", "notifications/initialized", "notifications/cancelled", "tools/list", "tools/call", "jobs/get",
+    "batches/get", "batches/cancel",
+])
+
+# Hot-path series resolved once, so a request pays one dict lookup
+# instead of a labels() call per metric
+REQUEST_BODY_SIZES = REQUEST_BODY_BYTES.labels()
+_method_series = {method: REQUEST_DURATION.labels(method) for method in sorted(KNOWN_METHODS) + ["other"]}
+_tool_series: Dict[str, _HistogramSeries] = {}
+
+
+def method_label(method: str) -> str:
+    return method if method in KNOWN_METHODS else "other"
+
+
+def method_series(method: str) -> _HistogramSeries:
+    """Latency series (with in-flight count) for a JSON-RPC method"""
+    series = _method_series.get(method)
+    return series if series is not None else _method_series["other"]
+
+
+def tool_series(tool: str) -> _HistogramSeries:
+    """Latency series (with in-flight count) for a registered tool"""
+    series = _tool_series.get(tool)
+    if series is None:
+        series = _tool_series[tool] = TOOL_DURATION.labels(tool)
+    return series
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: str) -> Iterator[None]:
+    """Observe the block's duration, with "ok" or "error" as the last label"""
+    start = perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        histogram.labels(*labels, outcome).observe(perf_counter() - start)
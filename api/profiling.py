@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+# Sampling profiler behind GET /debug/profile. A sampler thread reads the
+# event-loop thread's stack (sys._current_frames) every
+# MCP_PROFILE_INTERVAL seconds, so nothing is hooked into the interpreter
+# and there is no cost at all outside a profile. The /debug endpoints only
+# exist when MCP_DEBUG_TOKEN is set, and take it as a Bearer token.
+DEBUG_TOKEN = os.getenv("MCP_DEBUG_TOKEN", "")
+PROFILE_INTERVAL = float(os.getenv("MCP_PROFILE_INTERVAL", "0.005"))
+# Keep below the 30s maxDuration in vercel.json
+PROFILE_MAX_SECONDS = float(os.getenv("MCP_PROFILE_MAX_SECONDS", "25"))
+
+# Deeper stacks are cut at the root end
+MAX_STACK_DEPTH = 128
+
+
+class ProfileBusy(RuntimeError):
+    """Raised when a profile is already running"""
+
+
+def collapse(frame: Optional[FrameType]) -> str:
+    """A stack in collapsed form, root first: "outer (file.py:12);inner (file.py:40)" """
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
+
+
+def render_collapsed(stacks: Counter) -> str:
+    """One "stack count" line per distinct stack, as flamegraph.pl and speedscope read it"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float = PROFILE_INTERVAL) -> Counter:
+    """Sample a thread's stack for `seconds`; runs on (and blocks) the calling thread"""
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        stacks[collapse(frame)] += 1
+        # Frames keep their locals alive
+        del frame
+        time.sleep(interval)
+    return stacks
+
+
+_profile_lock = threading.Lock()
+
+async def profile_loop(seconds: float, interval: float = PROFILE_INTERVAL) -> Counter:
+    """Sample the running event loop's thread from a sampler thread.
+
+    One profile at a time: a second caller gets ProfileBusy. The sampler
+    holds the lock until it stops, so cancelling the caller (a client that
+    disconnects) does not let a second sampler start alongside it.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfileBusy("A profile is already running")
+    try:
+        thread_id = threading.get_ident()
+        loop = asyncio.get_running_loop()
+        done: asyncio.Future = loop.create_future()
+
+        def resolve(result: Counter, error: Optional[BaseException]) -> None:
+            # The request may have gone away meanwhile
+            if done.done():
+                return
+            if error is not None:
+                done.set_exception(error)
+            else:
+                done.set_result(result)
+
+        def run() -> None:
+            try:
+                result = sample_stacks(thread_id, seconds, interval)
+            except BaseException as e:
+                loop.call_soon_threadsafe(resolve, Counter(), e)
+            else:
+                loop.call_soon_threadsafe(resolve, result, None)
+            finally:
+                _profile_lock.release()
+
+        # Its own thread, so a busy worker pool cannot delay the samples
+        threading.Thread(target=run, name="mcp-profiler", daemon=True).start()
+    except BaseException:
+        _profile_lock.release()
+        raise
+    return await done
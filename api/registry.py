@@ -0,0 +1,272 @@
+from typing import Dict, Any, Optional, List, Callable, Awaitable, Tuple, Union
+
+Notify = Callable[[Dict[str, Any]], Awaitable[None]]
+Validator = Callable[[Any], Any]
+
+
+class ToolArgumentError(ValueError):
+    """Raised when tool arguments do not match the tool's input schema"""
+
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+}
+
+
+def compile_validator(schema: Dict[str, Any], path: str = "") -> Validator:
+    """Compile a JSON schema subset into a validator closure.
+
+    Supports the keywords our tool schemas use: type, properties, required,
+    default, enum, minLength, maxLength, minimum, maximum, items, minItems
+    and maxItems. Everything is resolved once here so a call only runs the
+    checks that apply. The validator returns the value with defaults filled in.
+    """
+    checks: List[Validator] = []
+    label = path or "arguments"
+
+    schema_type = schema.get("type")
+    if schema_type is not None:
+        type_check = _TYPE_CHECKS[schema_type]
+
+        def check_type(value):
+            if not type_check(value):
+                raise ToolArgumentError(f"Argument '{label}' must be of type {schema_type}")
+            return value
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = tuple(schema["enum"])
+
+        def check_enum(value):
+            if value not in allowed:
+                raise ToolArgumentError(
+                    f"Invalid value for '{label}': {value!r} (expected one of {', '.join(map(str, allowed))})"
+                )
+            return value
+        checks.append(check_enum)
+
+    if "minLength" in schema or "maxLength" in schema:
+        min_length = schema.get("minLength", 0)
+        max_length = schema.get("maxLength")
+
+        def check_length(value):
+            if len(value) < min_length:
+                if min_length == 1:
+                    raise ToolArgumentError(f"Argument '{label}' must not be empty")
+                raise ToolArgumentError(f"Argument '{label}' must be at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise ToolArgumentError(f"Argument '{label}' must be at most {max_length} characters")
+            return value
+        checks.append(check_length)
+
+    if "minimum" in schema or "maximum" in schema:
+        minimum = schema.get("minimum")
+        maximum = schema.get("maximum")
+
+        def check_range(value):
+            if minimum is not None and value < minimum:
+                raise ToolArgumentError(f"Argument '{label}' must be >= {minimum}")
+            if maximum is not None and value > maximum:
+                raise ToolArgumentError(f"Argument '{label}' must be <= {maximum}")
+            return value
+        checks.append(check_range)
+
+    if schema_type == "array":
+        min_items = schema.get("minItems", 0)
+        max_items = schema.get("maxItems")
+        item_validator = compile_validator(schema["items"], f"{label}[]") if "items" in schema else None
+
+        def check_items(value):
+            if len(value) < min_items:
+                raise ToolArgumentError(f"Argument '{label}' must have at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise ToolArgumentError(f"Argument '{label}' must have at most {max_items} items")
+            if item_validator is not None:
+                return [item_validator(item) for item in value]
+            return value
+        checks.append(check_items)
+
+    if schema_type == "object" and "properties" in schema:
+        properties = {
+            key: compile_validator(prop, f"{path}.{key}" if path else key)
+            for key, prop in schema["properties"].items()
+        }
+        defaults = {
+            key: prop["default"]
+            for key, prop in schema["properties"].items()
+            if "default" in prop
+        }
+        required = tuple(schema.get("required", ()))
+
+        def check_properties(value):
+            for key in required:
+                if value.get(key) is None:
+                    raise ToolArgumentError(f"Missing '{key}' argument")
+            result = dict(defaults)
+            result.update(value)
+            for key, validate in properties.items():
+                if key in value and value[key] is not None:
+                    result[key] = validate(value[key])
+            return result
+        checks.append(check_properties)
+
+    if not checks:
+        return lambda value: value
+    if len(checks) == 1:
+        return checks[0]
+
+    def validate(value):
+        for check in checks:
+            value = check(value)
+        return value
+    return validate
+
+
+class ToolContext:
+    """Per-call state handed to tool handlers"""
+
+    __slots__ = ("session_id", "progress_token", "notify")
+
+    def __init__(
+        self,
+        session_id: Optional[str] = None,
+        progress_token: Optional[Union[str, int]] = None,
+        notify: Optional[Notify] = None,
+    ):
+        self.session_id = session_id
+        self.progress_token = progress_token
+        self.notify = notify
+
+    @property
+    def can_report_progress(self) -> bool:
+        """True when the client asked for progress and the transport can deliver it"""
+        return self.progress_token is not None and self.notify is not None
+
+    async def progress(self, progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """Send an MCP notifications/progress message for this call"""
+        if not self.can_report_progress:
+            return
+        params: Dict[str, Any] = {"progressToken": self.progress_token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message is not None:
+            params["message"] = message
+        await self.notify({
+            "jsonrpc": "2.0",
+            "method": "notifications/progress",
+            "params": params
+        })
+
+
+ToolHandler = Callable[[Dict[str, Any], ToolContext], Awaitable[Dict[str, Any]]]
+
+
+class Tool:
+    """A registered MCP tool: its public definition plus handler and validator.
+
+    `max_request_bytes` overrides the default request body limit for calls
+    to this tool. `streamed_arguments` names string arguments the transport
+    may hand over as a StreamedPayload (see body.py) instead of a str; they
+    skip schema validation, so the handler must accept both. `rate_limit`
+    is (calls per second, burst) per session and `max_in_flight` caps
+    concurrent calls server-wide (see admission.py). `compressed_output`
+    marks results that are already compressed data, which HTTP responses
+    then skip compressing again (see http_compression.py).
+    """
+
+    __slots__ = (
+        "name", "description", "input_schema", "handler", "validate", "max_request_bytes", "streamed_arguments",
+        "rate_limit", "max_in_flight", "compressed_output",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        input_schema: Dict[str, Any],
+        handler: ToolHandler,
+        max_request_bytes: Optional[int] = None,
+        streamed_arguments: Tuple[str, ...] = (),
+        rate_limit: Optional[Tuple[float, float]] = None,
+        max_in_flight: Optional[int] = None,
+        compressed_output: bool = False,
+    ):
+        self.name = name
+        self.description = description
+        self.input_schema = input_schema
+        self.handler = handler
+        self.validate = compile_validator(input_schema)
+        self.max_request_bytes = max_request_bytes
+        self.streamed_arguments = tuple(streamed_arguments)
+        self.rate_limit = rate_limit
+        self.max_in_flight = max_in_flight
+        self.compressed_output = compressed_output
+
+    def definition(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "inputSchema": self.input_schema,
+        }
+
+
+class ToolRegistry:
+    """Name -> Tool mapping used by tools/list and tools/call"""
+
+    def __init__(self):
+        self._tools: Dict[str, Tool] = {}
+        self._definitions: Optional[List[Dict[str, Any]]] = None
+        # Bumped whenever the tool set changes; caches derived from it key on this
+        self.version = 0
+
+    def register(
+        self,
+        name: str,
+        description: str,
+        input_schema: Dict[str, Any],
+        max_request_bytes: Optional[int] = None,
+        streamed_arguments: Tuple[str, ...] = (),
+        rate_limit: Optional[Tuple[float, float]] = None,
+        max_in_flight: Optional[int] = None,
+        compressed_output: bool = False,
+    ) -> Callable[[ToolHandler], ToolHandler]:
+        """Decorator registering an async handler under `name`"""
+        def decorator(handler: ToolHandler) -> ToolHandler:
+            if name in self._tools:
+                raise ValueError(f"Tool already registered: {name}")
+            self._tools[name] = Tool(
+                name, description, input_schema, handler, max_request_bytes, streamed_arguments,
+                rate_limit, max_in_flight, compressed_output
+            )
+            self._definitions = None
+            self.version += 1
+            return handler
+        return decorator
+
+    def unregister(self, name: str) -> None:
+        del self._tools[name]
+        self._definitions = None
+        self.version += 1
+
+    def get(self, name: Optional[str]) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Tool definitions as advertised by tools/list"""
+        if self._definitions is None:
+            self._definitions = [tool.definition() for tool in self._tools.values()]
+        return self._definitions
+
+    def __iter__(self):
+        return iter(self._tools.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
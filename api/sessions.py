@@ -0,0 +1,180 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Sessions expire after SESSION_TTL seconds without a request, and at most
+# SESSION_MAX are kept (least recently used go first). SESSION_STORE picks
+# the backend: "memory" is per process; "sqlite" is shared by every process
+# that can reach SESSION_DB_PATH.
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+SESSION_TTL = float(os.getenv("SESSION_TTL", "3600"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", os.path.join(tempfile.gettempdir(), "mcp-sessions.sqlite3"))
+
+
+class SessionStore:
+    """Session id -> session data, with idle-TTL expiry and a size cap"""
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+
+    def create(self, session_id: str, data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Session data, refreshing its idle timer; None if unknown or expired"""
+        raise NotImplementedError
+
+    def touch(self, session_id: str) -> bool:
+        """Refresh a session's idle timer; False if unknown or expired"""
+        return self.get(session_id) is not None
+
+    def delete(self, session_id: str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store kept in access order, so every operation is O(1).
+
+    The least recently used session is always at the front, which makes
+    both idle expiry and cap eviction pops from the front.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = SESSION_MAX):
+        super().__init__(ttl, max_sessions)
+        self._sessions: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        sessions = self._sessions
+        deadline = now - self.ttl
+        while sessions:
+            oldest = next(iter(sessions))
+            if sessions[oldest][0] > deadline:
+                break
+            del sessions[oldest]
+
+    def create(self, session_id: str, data: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        self._expire(now)
+        self._sessions[session_id] = (now, data)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry[0] >= self.ttl:
+            del self._sessions[session_id]
+            return None
+        self._sessions[session_id] = (now, entry[1])
+        self._sessions.move_to_end(session_id)
+        return entry[1]
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SqliteSessionStore(SessionStore):
+    """Store shared across processes through one SQLite file.
+
+    Lookups are primary-key reads. Idle timers are written back at most
+    once per `touch_interval` seconds per session to keep reads cheap, and
+    the expiry/cap sweep runs on create at most every `sweep_interval`
+    seconds, so the cap can be briefly exceeded between sweeps.
+    """
+
+    def __init__(
+        self,
+        path: str = SESSION_DB_PATH,
+        ttl: float = SESSION_TTL,
+        max_sessions: int = SESSION_MAX,
+        touch_interval: float = 5.0,
+        sweep_interval: float = 10.0,
+    ):
+        import sqlite3
+
+        super().__init__(ttl, max_sessions)
+        self.path = path
+        self.touch_interval = touch_interval
+        self.sweep_interval = sweep_interval
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+
+    def create(self, session_id: str, data: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, last_access) VALUES (?, ?, ?)",
+                (session_id, json.dumps(data), now),
+            )
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        self._conn.execute("DELETE FROM sessions WHERE last_access <= ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        if count > self.max_sessions:
+            self._conn.execute(
+                "DELETE FROM sessions WHERE id IN "
+                "(SELECT id FROM sessions ORDER BY last_access LIMIT ?)",
+                (count - self.max_sessions,),
+            )
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_access FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            data, last_access = row
+            if now - last_access >= self.ttl:
+                self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                return None
+            if now - last_access >= self.touch_interval:
+                self._conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return json.loads(data)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_STORE"""
+    if SESSION_STORE == "memory":
+        return MemorySessionStore()
+    if SESSION_STORE == "sqlite":
+        return SqliteSessionStore()
+    raise ValueError(f"Unknown SESSION_STORE: {SESSION_STORE}")
@@ -0,0 +1,85 @@
+import hashlib
+from typing import Any, Callable, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from .http_compression import RESPONSE_ENCODINGS, RESPONSE_MIN_SIZE, compress_body, encoding_for, parse_encodings
+from .jsonrpc import dumps
+
+# How long clients and CDNs may reuse a static document without revalidating
+STATIC_MAX_AGE = 300
+
+
+class CachedDocument:
+    """A JSON document serialized once, served with a strong ETag.
+
+    `build` produces the document. `version` (optional) returns a value that
+    changes whenever the document would; the bytes are rebuilt only then.
+    Each Content-Encoding is compressed once per version too, and gets its
+    own ETag.
+    """
+
+    offered = parse_encodings(RESPONSE_ENCODINGS)
+
+    def __init__(self, build: Callable[[], Any], version: Optional[Callable[[], Any]] = None):
+        self._build = build
+        self._version = version or (lambda: None)
+        self._built_for: Any = object()
+        self._body = b""
+        self._etag = ""
+        self._encoded: Dict[str, bytes] = {}
+
+    def _refresh(self) -> None:
+        version = self._version()
+        if version != self._built_for:
+            self._body = dumps(self._build())
+            self._etag = '"' + hashlib.blake2b(self._body, digest_size=16).hexdigest() + '"'
+            self._built_for = version
+            self._encoded = {}
+
+    @property
+    def body(self) -> bytes:
+        self._refresh()
+        return self._body
+
+    @property
+    def etag(self) -> str:
+        self._refresh()
+        return self._etag
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body compressed with `encoding`"""
+        self._refresh()
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress_body(encoding, self._body)
+        return body
+
+    def response(self, request: Request) -> Response:
+        """200 with the cached bytes, or 304 when If-None-Match matches"""
+        self._refresh()
+        body = self._body
+        etag = self._etag
+        headers = {
+            "Cache-Control": f"public, max-age={STATIC_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        encoding = encoding_for(request.headers, self.offered) if len(body) >= RESPONSE_MIN_SIZE else None
+        if encoding is not None:
+            body = self.encoded(encoding)
+            etag = f'{etag[:-1]}-{encoding}"'
+            headers["Content-Encoding"] = encoding
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag == etag or tag == "W/" + etag for tag in candidates)
@@ -0,0 +1,234 @@
+import asyncio
+import os
+import sys
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from .body import BodyParser, BodyTooLarge, ParsedBody
+from .events import get_event_hub
+from .jsonrpc import (
+    InvalidRequest,
+    JsonRpcRequest,
+    RequestId,
+    create_error,
+    create_response,
+    dumps,
+)
+from .mcp_server import app, body_limits, handle_batch, handle_request, invalid_request, lifespan, sessions
+
+# stdio transport (python -m api): newline-delimited JSON-RPC on stdin,
+# one message per line on stdout. Requests are pipelined: up to
+# MCP_STDIO_CONCURRENCY run at once and each response is written as soon
+# as it is ready, so responses can come out of order (match them by id).
+# Reading stops while that many are in flight, and writing waits while
+# the client is not reading stdout. Each line is parsed as it streams in,
+# held to the same per-method and per-tool limits as POST /mcp bodies
+# (compress_file content goes to a spool file, as over HTTP).
+STDIO_CONCURRENCY = int(os.getenv("MCP_STDIO_CONCURRENCY", "64"))
+STDIO_READ_CHUNK = 64 * 1024
+
+Write = Callable[[bytes], Any]
+Drain = Callable[[], Awaitable[None]]
+
+
+async def _no_drain() -> None:
+    pass
+
+
+class LineReader:
+    """Newline-delimited messages from `reader`, each read a chunk at a time.
+
+    next_line() moves to the next non-blank line and chunks() yields it as
+    it arrives, so a line never has to be held in memory whole; whatever
+    chunks() was not asked for is discarded by the next next_line().
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+        self._pending = b""
+        self._eof = False
+        self._in_line = False
+
+    async def _fill(self) -> bool:
+        """Make sure some input is pending; False at the end of the input"""
+        if not self._pending and not self._eof:
+            self._pending = await self._reader.read(STDIO_READ_CHUNK)
+            self._eof = not self._pending
+        return bool(self._pending)
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """The rest of the current line, newline excluded"""
+        while self._in_line and await self._fill():
+            end = self._pending.find(b"\n")
+            if end < 0:
+                chunk, self._pending = self._pending, b""
+            else:
+                chunk, self._pending = self._pending[:end], self._pending[end + 1:]
+                self._in_line = False
+            if chunk:
+                yield chunk
+        self._in_line = False
+
+    async def next_line(self) -> bool:
+        """Skip to the next non-blank line; False once the input is exhausted"""
+        async for _ in self.chunks():
+            pass
+        while await self._fill():
+            self._pending = self._pending.lstrip()
+            if self._pending:
+                self._in_line = True
+                return True
+        return False
+
+
+class StdioTransport:
+    """One stdio client: a single MCP session over a pair of pipes.
+
+    The session created by initialize is used for every later request
+    (each line keeps it alive, as each POST does over HTTP), and messages
+    published to it (job and batch notifications) are forwarded to the
+    client along with each request's own progress.
+    notifications/cancelled also stops the named request if it is still
+    running, in which case no response is sent for it.
+    """
+
+    def __init__(self, write: Write, drain: Drain = _no_drain, concurrency: int = STDIO_CONCURRENCY):
+        self._write = write
+        self._drain = drain
+        self.session_id: Optional[str] = None
+        self._slots = asyncio.Semaphore(max(1, concurrency))
+        self._running: Dict[RequestId, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._follower: Optional[asyncio.Task] = None
+
+    async def send(self, message: Any) -> None:
+        self._write(dumps(message) + b"\n")
+        await self._drain()
+
+    async def run(self, reader: asyncio.StreamReader) -> None:
+        """Serve until stdin closes and every request in flight has answered"""
+        lines = LineReader(reader)
+        try:
+            while await lines.next_line():
+                parser = BodyParser(lines.chunks(), body_limits)
+                try:
+                    parsed = ParsedBody(await parser.parse(), parser.size, parser.payloads)
+                except BodyTooLarge as e:
+                    parser.close()
+                    await self.send(create_response(
+                        e.request_id, error=create_error(-32600, "Request too large", e.data())
+                    ))
+                    continue
+                except ValueError as e:
+                    parser.close()
+                    await self.send(create_response(None, error=create_error(-32700, "Parse error", str(e))))
+                    continue
+                await self._slots.acquire()
+                task = asyncio.ensure_future(self._serve(parsed))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            if self._follower is not None:
+                self._follower.cancel()
+
+    async def _serve(self, parsed: ParsedBody) -> None:
+        try:
+            response = await self.dispatch(parsed.value)
+        except asyncio.CancelledError:
+            # Cancelled by the client: no response is sent
+            return
+        finally:
+            # Jobs retain() the streamed arguments they still need
+            parsed.close()
+            self._slots.release()
+        if response:
+            await self.send(response)
+
+    async def dispatch(self, body: Any) -> Any:
+        """The response (or list of responses) for one parsed line; None when nothing is sent"""
+        if self.session_id is not None:
+            # Job and batch notifications are only delivered to live sessions
+            sessions.touch(self.session_id)
+        if isinstance(body, list):
+            if not body:
+                return create_response(None, error=create_error(-32600, "Invalid Request", "Empty batch"))
+            return await handle_batch(body, self.session_id)
+        try:
+            rpc_request = JsonRpcRequest.from_dict(body)
+        except InvalidRequest as e:
+            return invalid_request(body, e)
+
+        params = rpc_request.params
+        if rpc_request.method == "notifications/cancelled":
+            running = self._running.get(params.get("requestId"))
+            if running is not None:
+                running.cancel()
+
+        request_id = rpc_request.id
+        tracked = request_id is not None and request_id not in self._running
+        if tracked:
+            self._running[request_id] = asyncio.current_task()
+        try:
+            response = await handle_request(rpc_request, self.session_id, self.send)
+        finally:
+            if tracked:
+                del self._running[request_id]
+        if rpc_request.method == "initialize" and response is not None and "result" in response:
+            self._follow_session(response["result"].get("sessionId"))
+        if rpc_request.is_notification:
+            return None
+        return response
+
+    def _follow_session(self, session_id: Optional[str]) -> None:
+        if not session_id:
+            return
+        self.session_id = session_id
+        if self._follower is not None:
+            self._follower.cancel()
+        self._follower = asyncio.ensure_future(self._forward_events(session_id))
+
+    async def _forward_events(self, session_id: str) -> None:
+        """Copy the session's published messages to stdout"""
+        hub = get_event_hub()
+        last_event_id: Optional[str] = None
+        while True:
+            # A subscriber that falls behind is dropped; resume from history
+            subscription = hub.subscribe(session_id, last_event_id)
+            try:
+                for frame in subscription.backlog:
+                    last_event_id = await self._forward(frame)
+                while (frame := await subscription.queue.get()) is not None:
+                    last_event_id = await self._forward(frame)
+            finally:
+                subscription.channel.unsubscribe(subscription)
+
+    async def _forward(self, frame: bytes) -> Optional[str]:
+        """Write an SSE frame's message as a line; returns its event id"""
+        header, _, data = frame.partition(b"data: ")
+        self._write(data.rstrip(b"\n") + b"\n")
+        await self._drain()
+        if header.startswith(b"id: "):
+            return header[4:header.index(b"\n")].decode()
+        return None
+
+
+async def serve_stdio() -> None:
+    """Serve the current process's stdin/stdout, with the app's startup and shutdown"""
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    # A StreamWriter, for drain(): output waits while the client is not reading
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    async with lifespan(app):
+        try:
+            await StdioTransport(writer.write, writer.drain).run(reader)
+        finally:
+            writer.close()
+
+
+def main() -> None:
+    asyncio.run(serve_stdio())
@@ -0,0 +1,105 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.admission import AdmissionController, Throttled
+from api.mcp_server import app, registry
+
+client = TestClient(app)
+
+
+class FakeMonitor:
+    lag = 0.0
+    max_lag = 0.0
+
+    def ensure_started(self):
+        pass
+
+
+class Clock:
+    now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def controller(clock, **kwargs):
+    options = dict(
+        session_rate=0, session_burst=1, session_max_in_flight=100, tool_rates={}, tool_caps={},
+        shed_lag=0.5, monitor=FakeMonitor(), clock=clock,
+    )
+    options.update(kwargs)
+    return AdmissionController(registry, **options)
+
+
+def test_session_token_bucket_refills():
+    clock = Clock()
+    limiter = controller(clock, session_rate=2, session_burst=3)
+    for _ in range(3):
+        limiter.admit("s", "hello_claude")
+        limiter.release("s", "hello_claude")
+    with pytest.raises(Throttled) as info:
+        limiter.admit("s", "hello_claude")
+    assert info.value.scope == "session_rate" and info.value.retry_after == pytest.approx(0.5)
+    # Other sessions have their own bucket
+    limiter.admit("t", "hello_claude")
+    clock.now += 0.5
+    limiter.admit("s", "hello_claude")
+
+
+def test_tool_rate_is_per_session_and_spends_nothing_when_refused():
+    clock = Clock()
+    limiter = controller(clock, session_rate=10, session_burst=2, tool_rates={"ask_claude": (1, 1)})
+    limiter.admit("s", "ask_claude")
+    with pytest.raises(Throttled) as info:
+        limiter.admit("s", "ask_claude")
+    assert info.value.scope == "tool_rate"
+    # The refused call did not use up the session's second token
+    limiter.admit("s", "hello_claude")
+    limiter.admit("t", "ask_claude")
+
+
+def test_sessionless_calls_are_budgeted_per_client_address():
+    limiter = controller(Clock(), session_rate=1, session_burst=1, session_max_in_flight=1)
+    limiter.admit(None, "hello_claude", "10.0.0.1")
+    with pytest.raises(Throttled) as info:
+        limiter.admit(None, "hello_claude", "10.0.0.1")
+    assert info.value.scope == "session_in_flight"
+    limiter.admit(None, "hello_claude", "10.0.0.2")
+    limiter.release(None, "hello_claude", "10.0.0.1")
+    with pytest.raises(Throttled) as info:
+        limiter.admit(None, "hello_claude", "10.0.0.1")
+    assert info.value.scope == "session_rate"
+    # A session never shares a budget with an address
+    limiter.admit("10.0.0.1", "hello_claude", "10.0.0.1")
+
+
+def test_in_flight_caps_and_load_shedding():
+    limiter = controller(Clock(), session_max_in_flight=2, tool_caps={"compress_file": 1})
+    limiter.admit("s", "compress_file")
+    with pytest.raises(Throttled) as info:
+        limiter.admit("t", "compress_file")
+    assert info.value.scope == "tool_in_flight"
+    limiter.admit("s", "hello_claude")
+    with pytest.raises(Throttled) as info:
+        limiter.admit("s", "hello_claude")
+    assert info.value.scope == "session_in_flight"
+    limiter.release("s", "compress_file")
+    limiter.admit("t", "compress_file")
+
+    limiter.monitor.lag = 0.8
+    with pytest.raises(Throttled) as info:
+        limiter.admit("u", "hello_claude")
+    assert info.value.scope == "overload"
+    assert limiter.stats()["throttled"] == {
+        "session_rate": 0, "tool_rate": 0, "session_in_flight": 1, "tool_in_flight": 1, "overload": 1,
+    }
+
+
+def test_throttled_call_gets_jsonrpc_error_with_retry_after(monkeypatch):
+    monkeypatch.setattr(mcp_server, "admission", controller(Clock(), session_rate=1, session_burst=1))
+    call = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "hello_claude"}}
+    assert "result" in client.post("/mcp", json=call).json()
+    error = client.post("/mcp", json=call).json()["error"]
+    assert error["code"] == -32000
+    assert error["data"] == {"scope": "session_rate", "retryAfter": 1.0}
@@ -0,0 +1,60 @@
+import asyncio
+import base64
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from api.archive import build_archive
+from api.compression import CompressionError
+
+
+def b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def extract_payload(report: str) -> bytes:
+    return base64.b64decode(report.rsplit("\n", 1)[-1])
+
+
+FILES = [
+    {"filename": "a.txt", "content": b64(b"alpha " * 1000)},
+    {"filename": "dir/b.txt", "content": b64(b"beta " * 1000)},
+    {"filename": "copy/a.txt", "content": b64(b"alpha " * 1000)},
+    {"filename": "empty.txt", "content": ""},
+]
+
+
+def test_zip_archive_dedupes_identical_contents():
+    report = asyncio.run(build_archive(FILES, "bundle", "zip"))
+    assert "Entries: 4 (3 unique)" in report
+    assert "Output filename: bundle.zip" in report
+    with zipfile.ZipFile(io.BytesIO(extract_payload(report))) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["a.txt", "dir/b.txt", "copy/a.txt", "empty.txt"]
+        assert zf.read("copy/a.txt") == b"alpha " * 1000
+        assert zf.read("empty.txt") == b""
+
+
+def test_tar_archive_uses_hard_links_for_duplicates():
+    report = asyncio.run(build_archive(FILES, "bundle", "gzip", 6))
+    assert "Output filename: bundle.tar.gz" in report
+    with tarfile.open(fileobj=io.BytesIO(extract_payload(report)), mode="r:gz") as tar:
+        members = {member.name: member for member in tar.getmembers()}
+        assert members["copy/a.txt"].islnk()
+        assert members["copy/a.txt"].linkname == "a.txt"
+        assert tar.extractfile("copy/a.txt").read() == b"alpha " * 1000
+        assert tar.extractfile("dir/b.txt").read() == b"beta " * 1000
+
+
+@pytest.mark.parametrize("name", ["../escape.txt", "/etc/passwd", "a/../../b"])
+def test_unsafe_entry_names_are_rejected(name):
+    with pytest.raises(CompressionError, match="Invalid entry filename"):
+        asyncio.run(build_archive([{"filename": name, "content": ""}], "bundle", "zip"))
+
+
+def test_duplicate_entry_names_are_rejected():
+    files = [{"filename": "a", "content": ""}, {"filename": "a", "content": ""}]
+    with pytest.raises(CompressionError, match="Duplicate entry filenames"):
+        asyncio.run(build_archive(files, "bundle", "zip"))
@@ -0,0 +1,150 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.batches import BatchLimitExceeded, BatchManager
+from api.mcp_server import app, text_result
+
+
+class FakeBatches:
+    """client.messages.batches: each retrieve finishes one more request"""
+
+    def __init__(self):
+        self.requests = []
+        self.done = 0
+        self.cancelled = False
+
+    async def create(self, requests):
+        self.requests = requests
+        return SimpleNamespace(id="msgbatch_1")
+
+    async def retrieve(self, batch_id):
+        self.done = min(self.done + 1, len(self.requests))
+        ended = self.done == len(self.requests) or self.cancelled
+        counts = SimpleNamespace(
+            processing=0 if ended else len(self.requests) - self.done,
+            succeeded=sum(1 for r in self.requests[:self.done] if not self._failed(r)),
+            errored=sum(1 for r in self.requests[:self.done] if self._failed(r)),
+            canceled=len(self.requests) - self.done if self.cancelled else 0,
+            expired=0,
+        )
+        return SimpleNamespace(processing_status="ended" if ended else "in_progress", request_counts=counts)
+
+    async def results(self, batch_id):
+        async def items():
+            for request in self.requests[:self.done]:
+                if self._failed(request):
+                    result = SimpleNamespace(type="errored", error=SimpleNamespace(
+                        error=SimpleNamespace(message="Mock error"),
+                    ))
+                else:
+                    text = "Echo: " + request["params"]["messages"][0]["content"]
+                    result = SimpleNamespace(type="succeeded", message=SimpleNamespace(
+                        content=[SimpleNamespace(type="text", text=text)],
+                    ))
+                yield SimpleNamespace(custom_id=request["custom_id"], result=result)
+        return items()
+
+    async def cancel(self, batch_id):
+        self.cancelled = True
+
+    @staticmethod
+    def _failed(request):
+        return request["params"]["messages"][0]["content"].startswith("!error")
+
+
+class FakeClient:
+    def __init__(self):
+        self.messages = SimpleNamespace(batches=FakeBatches())
+
+
+def test_batch_progress_and_results_are_published():
+    published = []
+
+    async def scenario():
+        manager = BatchManager(
+            lambda session_id, message: published.append((session_id, message)),
+            text_result, max_active=1, poll_interval=0.001,
+        )
+        run = await manager.submit(FakeClient(), ["one", "!error two", "three"], "model", 16, "s")
+        with pytest.raises(BatchLimitExceeded):
+            await manager.submit(FakeClient(), ["four"], "model", 16, "s")
+        while run.ended_at is None:
+            await asyncio.sleep(0.001)
+        assert manager.get(run.id, "other") is None
+        return manager.get(run.id, "s").describe(offset=1, limit=1), manager.stats()
+
+    page, stats = asyncio.run(scenario())
+    assert page["status"] == "ended" and page["nextOffset"] == 2
+    assert page["results"] == [{"index": 1, "result": text_result("Error calling Claude: Mock error", True)}]
+    assert (stats["submitted"], stats["prompts"], stats["ended"], stats["active"]) == (1, 3, 1, 0)
+
+    methods = [message["method"] for session_id, message in published]
+    assert methods.count("notifications/batches/progress") == 3
+    assert methods[-4:-1] == ["notifications/batches/result"] * 3
+    assert methods[-1] == "notifications/batches/finished"
+    assert published[-2][1]["params"]["result"] == text_result("Echo: three")
+    assert published[-1][1]["params"]["requestCounts"]["errored"] == 1
+
+
+def rpc(client, session_id, request_id, method, params):
+    body = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+    return client.post("/mcp", json=body, headers={"Mcp-Session-Id": session_id}).json()
+
+
+def test_ask_claude_batch_over_mcp(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(mcp_server, "get_client", lambda: fake)
+    monkeypatch.setattr(mcp_server, "batches", BatchManager(mcp_server.publish_to_session, text_result, poll_interval=0.01))
+    with TestClient(app) as client:
+        session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+        started = rpc(client, session_id, 1, "tools/call", {
+            "name": "ask_claude_batch", "arguments": {"prompts": ["a", "b"]},
+        })["result"]
+        batch_id = started["_meta"]["batchId"]
+        assert fake.messages.batches.requests[1]["params"]["messages"] == [{"role": "user", "content": "b"}]
+
+        deadline = time.monotonic() + 5
+        while (batch := rpc(client, session_id, 2, "batches/get", {"batchId": batch_id})["result"])["status"] != "ended":
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert [item["result"] for item in batch["results"]] == [text_result("Echo: a"), text_result("Echo: b")]
+
+        error = rpc(client, session_id, 3, "batches/get", {"batchId": "nope"})["error"]
+        assert error["code"] == -32602
+        invalid = rpc(client, session_id, 4, "tools/call", {"name": "ask_claude_batch", "arguments": {"prompts": []}})
+        assert invalid["result"]["isError"]
+
+
+def test_invalid_cancel_is_refused_before_cancelling_upstream(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(mcp_server, "get_client", lambda: fake)
+    monkeypatch.setattr(mcp_server, "batches", BatchManager(mcp_server.publish_to_session, text_result, poll_interval=60))
+    with TestClient(app) as client:
+        session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+        started = rpc(client, session_id, 1, "tools/call", {
+            "name": "ask_claude_batch", "arguments": {"prompts": ["a", "b"]},
+        })["result"]
+        batch_id = started["_meta"]["batchId"]
+
+        error = rpc(client, session_id, 2, "batches/cancel", {"batchId": batch_id, "offset": -1})["error"]
+        assert error["code"] == -32602
+        assert not fake.messages.batches.cancelled
+        assert rpc(client, session_id, 3, "batches/cancel", {"batchId": batch_id})["result"]["status"] == "canceling"
+        assert fake.messages.batches.cancelled
+
+
+def test_deleting_a_session_without_batches_creates_no_client(monkeypatch):
+    from api import claude
+
+    monkeypatch.setattr(claude, "CLAUDE_KEY", "test-key")
+    monkeypatch.setattr(claude, "_client", None)
+    # No lifespan, as with MCP_LAZY_STARTUP
+    client = TestClient(app)
+    session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+    assert client.delete("/mcp", headers={"Mcp-Session-Id": session_id}).status_code == 200
+    assert claude._client is None
@@ -0,0 +1,166 @@
+import base64
+import gzip
+import io
+import os
+import threading
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import blobs
+from api.blobs import BlobError, BlobStore
+from api.mcp_server import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def blob_store(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path), max_size=1 << 20, max_bytes=4 << 20, ttl=60)
+    monkeypatch.setattr(blobs, "_store", store)
+    return store
+
+
+def call_compress(arguments):
+    response = client.post("/mcp", json={
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "compress_file", "arguments": arguments},
+    })
+    return response.json()["result"]
+
+
+def test_raw_upload_compress_and_download():
+    data = b"blob transport " * 4000
+    upload = client.post("/blobs", content=data, headers={"Content-Type": "text/plain"})
+    assert upload.status_code == 201
+    blob_id = upload.json()["blobId"]
+    assert upload.json()["size"] == len(data)
+
+    result = call_compress({"content_blob": blob_id, "filename": "data.txt", "output": "blob"})
+    text = result["content"][0]["text"]
+    assert "Compressed content (base64)" not in text
+    output_id = text.split("Output blob: ")[1].split("\n")[0]
+
+    download = client.get(f"/blobs/{output_id}")
+    assert download.headers["content-type"] == "application/gzip"
+    assert "data.txt.gz" in download.headers["content-disposition"]
+    assert gzip.decompress(download.content) == data
+
+
+def test_multipart_upload_and_inline_output():
+    data = os.urandom(3000)
+    upload = client.post("/blobs", files={"file": ("raw.bin", data, "application/octet-stream")})
+    blob_id = upload.json()["blobId"]
+    assert upload.json()["filename"] == "raw.bin"
+    assert client.get(f"/blobs/{blob_id}").content == data
+
+    result = call_compress({"content_blob": blob_id, "filename": "raw.bin", "format": "zip"})
+    assert "Compressed content (base64)" in result["content"][0]["text"]
+
+
+def test_archive_output_to_blob():
+    files = [{"filename": "a.txt", "content": "YWFh"}, {"filename": "b.txt", "content": "YmJi"}]
+    text = call_compress({"files": files, "filename": "bundle", "format": "zip", "output": "blob"})["content"][0]["text"]
+    output_id = text.split("Output blob: ")[1].split("\n")[0]
+    with zipfile.ZipFile(io.BytesIO(client.get(f"/blobs/{output_id}").content)) as zf:
+        assert zf.read("b.txt") == b"bbb"
+
+
+def test_limits_and_unknown_blobs(blob_store):
+    assert client.post("/blobs", content=b"x" * ((1 << 20) + 1)).status_code == 413
+    assert os.listdir(blob_store.directory) == []
+    assert client.get("/blobs/" + "0" * 32).status_code == 404
+    assert client.get("/blobs/../etc").status_code == 404
+    result = call_compress({"content_blob": "0" * 32, "filename": "x"})
+    assert result["isError"] is True
+    assert "Unknown blob" in result["content"][0]["text"]
+
+
+def test_upload_writes_run_off_the_event_loop(monkeypatch):
+    threads = {}
+    original_writer, original_write = blobs.BlobStore.writer, blobs.BlobWriter.write
+
+    def writer(self, *args, **kwargs):
+        threads["loop"] = threading.get_ident()
+        return original_writer(self, *args, **kwargs)
+
+    def write(self, data):
+        threads.setdefault("writes", []).append((threading.get_ident(), len(data)))
+        return original_write(self, data)
+
+    monkeypatch.setattr(blobs.BlobStore, "writer", writer)
+    monkeypatch.setattr(blobs.BlobWriter, "write", write)
+    data = os.urandom(blobs.BLOB_READ_CHUNK // 4) * 10
+    chunks = (data[n:n + 4096] for n in range(0, len(data), 4096))
+    upload = client.post("/blobs", content=chunks)
+    assert upload.json()["size"] == len(data)
+    assert all(thread != threads["loop"] for thread, _ in threads["writes"])
+    assert all(size >= blobs.BLOB_READ_CHUNK for _, size in threads["writes"][:-1])
+
+def test_eviction_keeps_store_under_max_bytes(tmp_path):
+    store = BlobStore(str(tmp_path / "small"), max_size=100, max_bytes=250, ttl=60)
+    ids = []
+    for _ in range(4):
+        with store.writer() as writer:
+            writer.write(b"x" * 100)
+            ids.append(writer.commit()["blobId"])
+    with pytest.raises(BlobError):
+        store.info(ids[0])
+    assert store.info(ids[-1])["size"] == 100
+
+
+
+def test_eviction_is_throttled_and_sweeps_abandoned_uploads(tmp_path):
+    store = BlobStore(str(tmp_path / "sweep"), max_size=100, max_bytes=1000, ttl=60, evict_interval=3600)
+    stale = store.writer()
+    stale.write(b"x" * 10)
+    stale._file.close()
+    with store.writer() as writer:
+        writer.write(b"y" * 10)
+        kept = writer.commit()["blobId"]
+    # Committed data that never got its metadata
+    orphan = store._data_path("0" * 32)
+    open(orphan, "wb").close()
+    old = os.path.getmtime(orphan) - 120
+    for path in (stale._part_path, orphan):
+        os.utime(path, (old, old))
+
+    # Well under max_bytes and inside the interval: no scan
+    with store.writer() as writer:
+        writer.write(b"z" * 10)
+        writer.commit()
+    assert os.path.exists(stale._part_path) and os.path.exists(orphan)
+
+    store.evict()
+    assert not os.path.exists(stale._part_path) and not os.path.exists(orphan)
+    assert store.info(kept)["size"] == 10
+
+
+def test_compress_file_runs_in_a_process_pool(monkeypatch, blob_store):
+    from api import workers
+
+    workers.shutdown_executor()
+    monkeypatch.setattr(workers, "COMPRESS_EXECUTOR", "process")
+    monkeypatch.setattr(workers, "COMPRESS_INLINE_THRESHOLD", 0)
+    data = os.urandom(64) * 40000
+    content = base64.b64encode(data).decode()
+    try:
+        # Streamed content (spooled to disk past 1 MiB), into a blob
+        result = call_compress({"content": content, "filename": "big.bin", "output": "blob"})
+        text = result["content"][0]["text"]
+        assert not result.get("isError"), text
+        blob_id = text.split("Output blob: ")[1].split("\n")[0]
+        assert blob_store.info(blob_id)["size"] == len(client.get(f"/blobs/{blob_id}").content)
+        assert gzip.decompress(client.get(f"/blobs/{blob_id}").content) == data
+
+        # Blob content, and archives of both kinds
+        upload = client.post("/blobs", content=data[:100000]).json()["blobId"]
+        result = call_compress({"content_blob": upload, "filename": "a.bin", "format": "zip"})
+        assert not result.get("isError"), result
+        files = [{"filename": "a.txt", "content": content[:4000]}, {"filename": "b.txt", "content": content[:4000]}]
+        for compress_format in ("zip", "gzip"):
+            result = call_compress({"files": files, "filename": "docs", "format": compress_format, "output": "blob"})
+            assert not result.get("isError"), result
+    finally:
+        workers.shutdown_executor()
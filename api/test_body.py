@@ -0,0 +1,105 @@
+import asyncio
+import base64
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.body import BodyLimits, BodyParser, BodyTooLarge, StreamedPayload
+from api.mcp_server import app, registry
+
+client = TestClient(app)
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def parse(data: bytes, chunk_size: int = 7, limits=None):
+    async def run():
+        parser = BodyParser(chunked(data, chunk_size), limits or BodyLimits(registry))
+        return await parser.parse(), parser.payloads
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("value", [
+    {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+    [{"a": [1, -2.5e3, True, False, None, {}, []]}, {"s": "q\"uo\\te é 😀 \n\t/"}],
+    {"nested": {"deep": [[["x"]]]}, "empty": "", "big": 12345678901234567890},
+])
+@pytest.mark.parametrize("chunk_size", [1, 3, 4096])
+def test_parser_matches_json_loads(value, chunk_size):
+    data = json.dumps(value, indent=1).encode()
+    assert parse(data, chunk_size)[0] == json.loads(data)
+
+
+@pytest.mark.parametrize("data", [b'{"a": 1', b'{"a" 1}', b'[1, 2] x', b'{"a": tru}', b'"abc'])
+def test_parser_rejects_invalid_json(data):
+    with pytest.raises(ValueError):
+        parse(data)
+
+
+def test_compress_file_content_is_streamed_not_parsed():
+    raw = b"streamed content " * 8000
+    # encodebytes adds "\n" every 76 characters, escaped in the JSON body
+    content = base64.encodebytes(raw).decode()
+    data = json.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "compress_file", "arguments": {"content": content, "filename": "a.txt"}},
+    }).encode()
+    body, payloads = parse(data, chunk_size=1000)
+    payload = body["params"]["arguments"]["content"]
+    assert isinstance(payload, StreamedPayload) and payloads == [payload]
+    assert b"".join(payload.chunks()) == raw
+
+    response = client.post("/mcp", content=data, headers={"Content-Type": "application/json"})
+    text = response.json()["result"]["content"][0]["text"]
+    assert gzip.decompress(base64.b64decode(text.rsplit("\n", 1)[-1])) == raw
+
+
+def test_invalid_streamed_content_is_a_tool_error():
+    data = json.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {"name": "compress_file", "arguments": {"content": "!" * 100000, "filename": "a.txt"}},
+    })
+    result = client.post("/mcp", content=data).json()["result"]
+    assert result["isError"]
+    assert "Invalid base64 content" in result["content"][0]["text"]
+
+
+def test_limit_applies_once_the_method_is_known():
+    async def endless():
+        yield b'{"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": {"name": "hello_claude", "arguments": {"x": "'
+        while True:
+            yield b"a" * 1024
+
+    limits = BodyLimits(registry, default=4096, overrides={"compress_file": 1 << 20})
+
+    async def run():
+        await BodyParser(endless(), limits).parse()
+
+    with pytest.raises(BodyTooLarge) as info:
+        asyncio.run(run())
+    assert (info.value.limit, info.value.tool, info.value.request_id) == (4096, "hello_claude", 7)
+
+
+def test_oversized_request_gets_413_with_jsonrpc_error(monkeypatch):
+    monkeypatch.setattr(mcp_server, "body_limits", BodyLimits(registry, default=2048, overrides={
+        "tools/list": 256, "compress_file": 2048, "ask_claude_batch": 2048,
+    }))
+    padding = "x" * 1000
+    response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 3, "method": "tools/list", "params": {"p": padding}})
+    assert response.status_code == 413
+    assert response.json()["id"] == 3
+    assert response.json()["error"]["data"] == {"limit": 256, "method": "tools/list"}
+
+    # Over every limit: rejected on the Content-Length alone
+    response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 4, "method": "tools/list", "params": {"p": padding * 3}})
+    assert response.status_code == 413
+    assert response.json()["error"]["data"] == {"limit": 2048}
+
+    response = client.post("/mcp", json={"jsonrpc": "2.0", "id": 5, "method": "initialize", "params": {"p": padding}})
+    assert response.status_code == 200
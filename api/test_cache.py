@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from api.cache import ResultCache
+
+
+def test_lru_evicts_by_bytes():
+    cache = ResultCache(max_bytes=30, ttl=60, sizeof=lambda key, value: 10)
+    for key in "abc":
+        cache.put(key, key)
+    cache.get("a")
+    cache.put("d", "d")
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, "a")
+    assert cache.stats()["evictions"] == 1
+    assert cache.current_bytes == 30
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("api.cache.time.monotonic", lambda: now[0])
+    cache = ResultCache(max_bytes=1000, ttl=5)
+    cache.put("k", "v")
+    assert cache.get("k") == (True, "v")
+    now[0] += 6
+    assert cache.get("k") == (False, None)
+    assert cache.current_bytes == 0
+
+
+def test_single_flight_coalesces_concurrent_misses():
+    cache = ResultCache(max_bytes=10_000, ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        again = await cache.get_or_compute("k", compute)
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["coalesced"] * 4 + ["miss"]
+    assert again == ("value", "hit")
+    assert cache.stats()["hits"] == 1
+
+
+def test_failures_are_not_cached():
+    cache = ResultCache(max_bytes=10_000, ttl=60)
+
+    async def boom():
+        raise RuntimeError("upstream")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_compute("k", boom))
+    assert cache.get("k") == (False, None)
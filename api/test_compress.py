@@ -1,56 +1,47 @@
-#!/usr/bin/env python3
-import requests
-import json
 import base64
-
-# Test data
-test_content = "Hello, this is a test file content that will be compressed. " * 100
-test_filename = "test_file.txt"
-
-# Encode content to base64
-encoded_content = base64.b64encode(test_content.encode()).decode()
-
-# MCP server endpoint
-url = "http://localhost:8000/mcp"
-
-# Test gzip compression
-print("Testing gzip compression...")
-gzip_request = {
-    "jsonrpc": "2.0",
-    "id": 1,
-    "method": "tools/call",
-    "params": {
-        "name": "compress_file",
-        "arguments": {
-            "content": encoded_content,
-            "filename": test_filename,
-            "format": "gzip"
-        }
-    }
-}
-
-response = requests.post(url, json=gzip_request)
-print(f"Response status: {response.status_code}")
-print(f"Response: {json.dumps(response.json(), indent=2)}")
-
-print("\n" + "="*50 + "\n")
-
-# Test zip compression
-print("Testing zip compression...")
-zip_request = {
-    "jsonrpc": "2.0",
-    "id": 2,
-    "method": "tools/call",
-    "params": {
-        "name": "compress_file",
-        "arguments": {
-            "content": encoded_content,
-            "filename": test_filename,
-            "format": "zip"
-        }
-    }
-}
-
-response = requests.post(url, json=zip_request)
-print(f"Response status: {response.status_code}")
-print(f"Response: {json.dumps(response.json(), indent=2)}")
\ No newline at end of file
+import gzip
+import io
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.mcp_server import app
+
+client = TestClient(app)
+
+TEST_CONTENT = b"Hello, this is a test file content that will be compressed. " * 100
+
+
+def call_compress(compress_format: str) -> str:
+    response = client.post("/mcp", json={
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {
+            "name": "compress_file",
+            "arguments": {
+                "content": base64.b64encode(TEST_CONTENT).decode(),
+                "filename": "test_file.txt",
+                "format": compress_format,
+            },
+        },
+    })
+    assert response.status_code == 200
+    result = response.json()["result"]
+    assert not result.get("isError")
+    return result["content"][0]["text"]
+
+
+@pytest.mark.parametrize("compress_format", ["gzip", "zip"])
+def test_compress_file_over_mcp(compress_format):
+    report = call_compress(compress_format)
+    assert f"Original size: {len(TEST_CONTENT)} bytes" in report
+    payload = base64.b64decode(report.rsplit("\n", 1)[-1])
+    if compress_format == "gzip":
+        assert "Output filename: test_file.txt.gz" in report
+        assert gzip.decompress(payload) == TEST_CONTENT
+    else:
+        assert "Output filename: test_file.txt.zip" in report
+        with zipfile.ZipFile(io.BytesIO(payload)) as zf:
+            assert zf.read("test_file.txt") == TEST_CONTENT
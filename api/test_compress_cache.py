@@ -0,0 +1,77 @@
+import asyncio
+import base64
+import gzip
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.compress_cache import CompressCache
+from api.compression import content_digest
+from api.mcp_server import app
+
+client = TestClient(app)
+
+
+def test_memory_lru_and_disk_tier(tmp_path):
+    async def scenario():
+        cache = CompressCache(max_bytes=400, max_entry_bytes=100, directory=str(tmp_path), disk_max_bytes=250)
+        keys = [CompressCache.key(content_digest([bytes([i])]), "gzip", 9, "a.txt") for i in range(3)]
+        for i, key in enumerate(keys):
+            await cache.put(key, 1000, bytes([i]) * 100)
+        await cache.put("too-big", 1000, b"x" * 101)
+        await cache.put("not-captured", 1000, None)
+
+        # The first entry fell out of memory, and out of the directory too
+        assert not cache.memory.get(keys[0])[0]
+        assert await cache.get(keys[0]) is None
+        assert len(os.listdir(tmp_path)) == 2
+
+        # A fresh process finds the rest on disk
+        cold = CompressCache(max_bytes=400, max_entry_bytes=100, directory=str(tmp_path), disk_max_bytes=250)
+        entry = await cold.get(keys[2])
+        assert (entry.original_size, entry.data) == (1000, b"\x02" * 100)
+        await cold.get(keys[2])
+        return cache.stats(), cold.stats()
+
+    warm, cold = asyncio.run(scenario())
+    assert (warm["hits"], warm["misses"], warm["entries"]) == (0, 1, 2)
+    assert (cold["hits"], cold["disk_hits"], cold["bytes_saved"], cold["hit_rate"]) == (2, 1, 2000, 1.0)
+
+
+@pytest.fixture
+def compress_cache(monkeypatch):
+    cache = CompressCache(max_bytes=1 << 20)
+    monkeypatch.setattr(mcp_server, "compress_cache", cache)
+    return cache
+
+
+def compress(arguments):
+    response = client.post("/mcp", json={
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "tools/call",
+        "params": {"name": "compress_file", "arguments": arguments},
+    })
+    return response.json()["result"]["content"][0]["text"]
+
+
+def test_repeated_compress_file_is_served_from_cache(compress_cache):
+    data = b"the same artifact, again and again " * 500
+    arguments = {"content": base64.b64encode(data).decode(), "filename": "a.txt", "format": "gzip"}
+    first = compress(arguments)
+    second = compress(arguments)
+    assert second == first
+    assert gzip.decompress(base64.b64decode(second.rsplit("\n", 1)[-1])) == data
+
+    # Level and filename are part of the key
+    compress({**arguments, "level": 1})
+    compress({**arguments, "filename": "b.txt"})
+    stats = compress_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 3, len(data))
+
+    # Blob content is keyed on the digest taken at upload
+    blob_id = client.post("/blobs", content=data).json()["blobId"]
+    assert compress({"content_blob": blob_id, "filename": "a.txt", "format": "gzip"}) == first
+    assert compress_cache.stats()["hits"] == 2
@@ -0,0 +1,113 @@
+import base64
+import gzip
+import io
+import os
+import zipfile
+
+import pytest
+
+from api.compression import (
+    CODECS,
+    Base64Sink,
+    CompressionError,
+    compress_base64,
+    get_codec,
+    iter_base64_decode,
+)
+
+
+def extract_payload(report: str) -> bytes:
+    return base64.b64decode(report.rsplit("\n", 1)[-1])
+
+
+@pytest.mark.parametrize("chunk_size", [3, 4, 1000, 1 << 20])
+def test_iter_base64_decode_matches_b64decode(chunk_size):
+    data = os.urandom(5000)
+    encoded = base64.b64encode(data).decode()
+    assert b"".join(iter_base64_decode(encoded, chunk_size)) == data
+
+
+def test_iter_base64_decode_skips_whitespace_and_rejects_garbage():
+    data = b"hello streaming world"
+    wrapped = base64.encodebytes(data).decode()
+    assert b"".join(iter_base64_decode(wrapped, 4)) == data
+    with pytest.raises(CompressionError):
+        list(iter_base64_decode("aGVsbG8*", 4))
+    with pytest.raises(CompressionError):
+        list(iter_base64_decode("aGVsbG8", 4))
+
+
+def test_base64_sink_matches_b64encode():
+    sink = Base64Sink()
+    data = os.urandom(1001)
+    for start in range(0, len(data), 7):
+        sink.write(data[start:start + 7])
+    assert sink.getvalue() == base64.b64encode(data).decode()
+    assert sink.size == len(data)
+
+
+@pytest.mark.parametrize("compress_format", ["gzip", "zip"])
+def test_compress_base64_roundtrip(compress_format):
+    data = b"line of text\n" * 20000
+    report = compress_base64(base64.b64encode(data).decode(), "a.txt", compress_format, chunk_size=4096)
+    assert f"Original size: {len(data)} bytes" in report
+    payload = extract_payload(report)
+    assert f"Compressed size: {len(payload)} bytes" in report
+    if compress_format == "gzip":
+        assert gzip.decompress(payload) == data
+    else:
+        with zipfile.ZipFile(io.BytesIO(payload)) as zf:
+            assert zf.read("a.txt") == data
+
+
+def decompress(compress_format, payload):
+    if compress_format == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompressobj().decompress(payload)
+    if compress_format == "brotli":
+        import brotli
+        return brotli.decompress(payload)
+    if compress_format == "lz4":
+        import lz4.frame
+        return lz4.frame.decompress(payload)
+    raise AssertionError(compress_format)
+
+
+@pytest.mark.parametrize("compress_format", ["zstd", "brotli", "lz4"])
+@pytest.mark.parametrize("level", [None, 1])
+def test_optional_codecs_roundtrip(compress_format, level):
+    if compress_format not in CODECS:
+        pytest.skip(f"{compress_format} not installed")
+    data = b"optional codec payload " * 5000
+    report = compress_base64(base64.b64encode(data).decode(), "a.txt", compress_format, level, chunk_size=4096)
+    assert f"Output filename: a.txt{get_codec(compress_format).extension}" in report
+    assert decompress(compress_format, extract_payload(report)) == data
+
+
+def test_levels_are_range_checked_and_unknown_formats_rejected():
+    with pytest.raises(CompressionError, match="between 0 and 9"):
+        get_codec("gzip").check_level(10)
+    assert get_codec("gzip").check_level(None) == 9
+    with pytest.raises(CompressionError, match="Unsupported format"):
+        get_codec("rar")
+
+
+def test_run_cpu_bound_uses_pool_above_threshold(monkeypatch):
+    import asyncio
+    import threading
+
+    from api import workers
+
+    monkeypatch.setattr(workers, "COMPRESS_INLINE_THRESHOLD", 10)
+
+    async def scenario():
+        inline = await workers.run_cpu_bound(threading.get_ident, size=5)
+        pooled = await workers.run_cpu_bound(threading.get_ident, size=50)
+        return inline, pooled
+
+    try:
+        inline, pooled = asyncio.run(scenario())
+    finally:
+        workers.shutdown_executor()
+    assert inline == threading.get_ident()
+    assert pooled != threading.get_ident()
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.events import KEEPALIVE_EVENT, EventHub, get_event_hub
+from api.mcp_server import app
+
+client = TestClient(app)
+
+
+def event_ids(frames):
+    return [int(frame.split(b"\n", 1)[0][len(b"id: "):]) for frame in frames]
+
+
+def test_resume_replays_events_after_last_event_id():
+    async def scenario():
+        hub = EventHub(queue_size=8, history_size=3)
+        for n in range(5):
+            hub.publish("s", {"n": n})
+        subscription = hub.subscribe("s", last_event_id="3")
+        hub.publish("s", {"n": 5})
+        stream = subscription.frames(keepalive_interval=10)
+        return [await stream.__anext__() for _ in range(3)]
+
+    assert event_ids(asyncio.run(scenario())) == [4, 5, 6]
+
+
+def test_slow_consumer_is_dropped_and_can_resume():
+    async def scenario():
+        hub = EventHub(queue_size=2, history_size=10)
+        slow = hub.subscribe("s")
+        for n in range(3):
+            hub.publish("s", {"n": n})
+        frames = [frame async for frame in slow.frames(keepalive_interval=10)]
+        resumed = hub.subscribe("s", last_event_id="0").backlog
+        return frames, resumed, hub.stats()
+
+    frames, resumed, stats = asyncio.run(scenario())
+    assert frames == []
+    assert event_ids(resumed) == [1, 2, 3]
+    assert stats["dropped"] == 1
+
+
+def test_keepalive_only_when_idle_and_close_ends_stream():
+    async def scenario():
+        hub = EventHub()
+        stream = hub.subscribe("s").frames(keepalive_interval=0.01)
+        first = await stream.__anext__()
+        hub.publish("s", {"n": 1})
+        second = await stream.__anext__()
+        hub.close("s")
+        rest = [frame async for frame in stream]
+        return first, second, rest, hub.stats()
+
+    first, second, rest, stats = asyncio.run(scenario())
+    assert first == KEEPALIVE_EVENT
+    assert second.startswith(b"id: 1\n")
+    assert rest == []
+    assert stats == {"channels": 0, "subscribers": 0, "dropped": 0}
+
+
+def test_progress_from_json_requests_reaches_the_session_stream(monkeypatch):
+    from api.test_tools import FakeClient
+    monkeypatch.setattr(mcp_server, "get_client", lambda: FakeClient())
+    mcp_server.ask_claude_cache.clear()
+    session_id = client.post(
+        "/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
+    ).headers["Mcp-Session-Id"]
+    body = client.post(
+        "/mcp",
+        headers={"Mcp-Session-Id": session_id},
+        json={
+            "jsonrpc": "2.0", "id": 2, "method": "tools/call",
+            "params": {"name": "ask_claude", "arguments": {"prompt": "hub"}, "_meta": {"progressToken": "p"}},
+        },
+    ).json()
+    assert body["result"]["content"][0]["text"] == "echo hub"
+
+    backlog = get_event_hub().subscribe(session_id, last_event_id="0").backlog
+    messages = [json.loads(frame.split(b"data: ", 1)[1]) for frame in backlog]
+    assert [m["params"]["progressToken"] for m in messages] == ["p"] * 3
+
+    client.delete("/mcp", headers={"Mcp-Session-Id": session_id})
+    assert get_event_hub().subscribe(session_id, last_event_id="0").backlog == []
@@ -0,0 +1,95 @@
+import base64
+import socket
+import threading
+import time
+import zlib
+
+import httpx
+import uvicorn
+from fastapi.testclient import TestClient
+
+from api.http_compression import StreamEncoder, negotiate
+from api.mcp_server import app
+
+client = TestClient(app)
+
+OFFERED = ("zstd", "br", "gzip")
+
+
+def test_negotiate_honours_q_values_and_server_preference():
+    assert negotiate("gzip, deflate, br, zstd", OFFERED) == "zstd"
+    assert negotiate("gzip;q=1.0, br;q=0.5", OFFERED) == "gzip"
+    assert negotiate("x-gzip", OFFERED) == "gzip"
+    assert negotiate("*;q=0.1, zstd;q=0", OFFERED) == "br"
+    assert negotiate("identity", OFFERED) is None
+    assert negotiate("gzip;q=0", ("gzip",)) is None
+
+
+def test_stream_encoder_flushes_every_event():
+    encoder = StreamEncoder("gzip")
+    decoder = zlib.decompressobj(31)
+    events = [b'event: message\ndata: {"n": %d}\n\n' % n for n in range(3)]
+    for event in events:
+        # Each event decodes in full from the bytes sent so far
+        assert decoder.decompress(encoder.encode(event)) == event
+    assert decoder.decompress(encoder.encode(b"", last=True)) == b"" and decoder.eof
+
+
+def rpc(body, accept_encoding):
+    return client.post("/mcp", json=body, headers={"Accept-Encoding": accept_encoding})
+
+
+def test_mcp_responses_are_compressed_by_negotiation():
+    tools_list = {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+    response = rpc(tools_list, "br")
+    assert response.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json()["result"]["tools"]
+    assert "content-encoding" not in rpc(tools_list, "identity").headers
+
+    # Small bodies are not worth it
+    hello = {"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": "hello_claude"}}
+    assert "content-encoding" not in rpc(hello, "gzip").headers
+
+    # compress_file output is already compressed
+    content = base64.b64encode(b"compressible " * 2000).decode()
+    call = {
+        "jsonrpc": "2.0", "id": 3, "method": "tools/call",
+        "params": {"name": "compress_file", "arguments": {"content": content, "filename": "a.txt"}},
+    }
+    response = rpc(call, "gzip")
+    assert "content-encoding" not in response.headers
+    assert not response.json()["result"].get("isError")
+
+
+def test_static_documents_are_precompressed_with_their_own_etag():
+    plain = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    encoded = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["etag"] != plain.headers["etag"]
+    assert encoded.json() == plain.json()
+    assert int(encoded.headers["content-length"]) < len(plain.content)
+
+    cached = client.get("/openapi.json", headers={"Accept-Encoding": "gzip", "If-None-Match": encoded.headers["etag"]})
+    assert cached.status_code == 304
+
+
+def test_idle_event_stream_sends_headers_at_once_over_a_real_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            time.sleep(0.01)
+        # GET /mcp sends nothing until an event or the keepalive
+        headers = {"Accept-Encoding": "gzip"}
+        with httpx.stream("GET", f"http://127.0.0.1:{port}/mcp", headers=headers, timeout=3) as response:
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == "gzip"
+            assert "Accept-Encoding" in response.headers["vary"]
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
@@ -0,0 +1,128 @@
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.events import get_event_hub
+from api.jobs import JobManager, JobQueueFull
+from api.mcp_server import app, registry, text_result
+
+
+def test_jobs_are_bounded_and_cancellable():
+    async def scenario():
+        manager = JobManager(concurrency=1, max_pending=2)
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+            return text_result("done")
+
+        first = manager.submit("t", blocked, "s", 1)
+        second = manager.submit("t", blocked, "s", 2)
+        with pytest.raises(JobQueueFull):
+            manager.submit("t", blocked, "s", 3)
+        await asyncio.sleep(0)
+        assert (first.status, second.status) == ("running", "queued")
+
+        assert manager.cancel_request("s", 2)
+        gate.set()
+        await asyncio.sleep(0.01)
+        assert manager.get(first.id, "s").describe()["result"] == text_result("done")
+        assert manager.get(second.id, "s").status == "cancelled"
+        # Other sessions cannot see the job
+        assert manager.get(first.id, "other") is None
+        return manager.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["completed"], stats["cancelled"], stats["rejected"]) == (1, 1, 1)
+
+
+def test_result_store_is_size_bounded():
+    async def scenario():
+        manager = JobManager(result_max_bytes=600)
+
+        async def small():
+            return text_result("x" * 100)
+
+        jobs = [manager.submit("t", small) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        return manager, jobs
+
+    manager, jobs = asyncio.run(scenario())
+    kept = [job for job in jobs if manager.get(job.id) is not None]
+    assert 0 < len(kept) < 5 and kept == jobs[-len(kept):]
+    assert manager.results.current_bytes <= 600
+
+
+@pytest.fixture
+def slow_tool():
+    @registry.register("slow_test", "Sleeps, for job tests", {"type": "object", "properties": {}})
+    async def slow(arguments, context):
+        await asyncio.sleep(0.2)
+        return text_result("slept")
+    yield "slow_test"
+    registry.unregister("slow_test")
+
+
+def rpc(client, session_id, request_id, method, params=None):
+    body = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+    if request_id is not None:
+        body["id"] = request_id
+    return client.post("/mcp", json=body, headers={"Mcp-Session-Id": session_id})
+
+
+def test_async_tools_call_over_mcp(slow_tool):
+    with TestClient(app) as client:
+        session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+        params = {"name": slow_tool, "arguments": {}, "_meta": {"async": True}}
+
+        started = rpc(client, session_id, 1, "tools/call", params).json()["result"]
+        job_id = started["_meta"]["jobId"]
+        assert started["_meta"]["status"] == "queued"
+        deadline = time.monotonic() + 5
+        while (job := rpc(client, session_id, 2, "jobs/get", {"jobId": job_id}).json()["result"])["status"] != "completed":
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        assert job["result"] == text_result("slept")
+
+        # Completion was also published to the session's event stream
+        subscription = get_event_hub().subscribe(session_id, "0")
+        subscription.channel.unsubscribe(subscription)
+        messages = [json.loads(frame.split(b"data: ", 1)[1]) for frame in subscription.backlog]
+        assert messages[-1]["method"] == "notifications/jobs/finished"
+        assert messages[-1]["params"]["jobId"] == job_id
+
+        cancelled = rpc(client, session_id, 3, "tools/call", params).json()["result"]["_meta"]["jobId"]
+        assert rpc(client, session_id, None, "notifications/cancelled", {"requestId": 3}).status_code == 204
+        time.sleep(0.05)
+        assert rpc(client, session_id, 4, "jobs/get", {"jobId": cancelled}).json()["result"]["status"] == "cancelled"
+
+        error = rpc(client, session_id, 5, "jobs/get", {"jobId": "nope"}).json()["error"]
+        assert error["code"] == -32602
+        assert mcp_server.jobs.stats()["completed"] >= 1
+
+
+def test_async_calls_need_a_session_and_jobs_stay_private_to_it(slow_tool):
+    params = {"name": slow_tool, "arguments": {}, "_meta": {"async": True}}
+    with TestClient(app) as client:
+        sessionless = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": params}
+        assert client.post("/mcp", json=sessionless).json()["error"]["code"] == -32602
+
+        session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+        other = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+        job_id = rpc(client, session_id, 1, "tools/call", params).json()["result"]["_meta"]["jobId"]
+
+        # Neither another session nor a sessionless client can reach it
+        rpc(client, other, None, "notifications/cancelled", {"requestId": 1})
+        client.post("/mcp", json={"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}})
+        assert rpc(client, other, 2, "jobs/get", {"jobId": job_id}).json()["error"]["code"] == -32602
+        sessionless = {"jsonrpc": "2.0", "id": 2, "method": "jobs/get", "params": {"jobId": job_id}}
+        assert client.post("/mcp", json=sessionless).json()["error"]["code"] == -32602
+
+        deadline = time.monotonic() + 5
+        while (job := rpc(client, session_id, 3, "jobs/get", {"jobId": job_id}).json()["result"])["status"] != "completed":
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
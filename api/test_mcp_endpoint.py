@@ -0,0 +1,148 @@
+import asyncio
+import json
+import time
+
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.mcp_server import app
+
+client = TestClient(app)
+
+
+def test_batch_runs_concurrently_and_keeps_order(monkeypatch):
+    original = mcp_server.handle_request
+
+    async def slow_request(request, session_id=None, notify=None, client=None):
+        await asyncio.sleep(0.3 if request.id == 1 else 0.2)
+        return await original(request, session_id, notify, client)
+
+    monkeypatch.setattr(mcp_server, "handle_request", slow_request)
+    monkeypatch.setattr(mcp_server, "BATCH_CONCURRENCY", 4)
+    batch = [
+        {"jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "hello_claude"}}
+        for i in range(1, 5)
+    ]
+    start = time.perf_counter()
+    response = client.post("/mcp", json=batch)
+    elapsed = time.perf_counter() - start
+    assert [item["id"] for item in response.json()] == [1, 2, 3, 4]
+    # Sequential would take 0.9s
+    assert elapsed < 0.6
+
+
+def test_batch_notifications_and_invalid_elements():
+    batch = [
+        {"jsonrpc": "2.0", "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": "a", "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": "b"},
+        42,
+    ]
+    body = client.post("/mcp", json=batch).json()
+    assert len(body) == 3
+    assert body[0]["id"] == "a" and "tools" in body[0]["result"]
+    assert body[1]["id"] == "b" and body[1]["error"]["code"] == -32600
+    assert body[2]["error"]["code"] == -32600
+
+    assert client.post("/mcp", json=[]).json()["error"]["code"] == -32600
+    assert client.post("/mcp", json=[{"jsonrpc": "2.0", "method": "tools/list"}]).status_code == 204
+
+
+def test_batches_check_and_refresh_the_session(monkeypatch):
+    monkeypatch.setattr(mcp_server.sessions, "ttl", 0.3)
+    session_id = client.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize"}).headers["mcp-session-id"]
+    batch = [{"jsonrpc": "2.0", "id": 1, "method": "tools/list"}]
+    for _ in range(4):
+        time.sleep(0.1)
+        assert client.post("/mcp", json=batch, headers={"Mcp-Session-Id": session_id}).status_code == 200
+    single = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+    assert client.post("/mcp", json=single, headers={"Mcp-Session-Id": session_id}).status_code == 200
+
+    assert client.post("/mcp", json=batch, headers={"Mcp-Session-Id": "bogus"}).status_code == 404
+
+
+def test_batch_element_timeout(monkeypatch):
+    original = mcp_server.handle_request
+
+    async def maybe_hang(request, session_id=None, notify=None, client=None):
+        if request.id == "slow":
+            await asyncio.sleep(5)
+        return await original(request, session_id, notify, client)
+
+    monkeypatch.setattr(mcp_server, "handle_request", maybe_hang)
+    monkeypatch.setattr(mcp_server, "BATCH_ELEMENT_TIMEOUT", 0.1)
+    body = client.post("/mcp", json=[
+        {"jsonrpc": "2.0", "id": "slow", "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": "fast", "method": "tools/list"},
+    ]).json()
+    assert body[0]["error"]["code"] == -32000
+    assert "tools" in body[1]["result"]
+
+
+def test_tools_call_streams_over_sse_when_progress_requested(monkeypatch):
+    from api.test_tools import FakeClient
+    monkeypatch.setattr(mcp_server, "get_client", lambda: FakeClient())
+    mcp_server.ask_claude_cache.clear()
+    response = client.post(
+        "/mcp",
+        headers={"Accept": "application/json, text/event-stream"},
+        json={
+            "jsonrpc": "2.0", "id": 7, "method": "tools/call",
+            "params": {"name": "ask_claude", "arguments": {"prompt": "sse"}, "_meta": {"progressToken": 1}},
+        },
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        json.loads(line[len("data: "):])
+        for line in response.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert [e["method"] for e in events[:-1]] == ["notifications/progress"] * 3
+    assert events[-1]["id"] == 7
+    assert events[-1]["result"]["content"][0]["text"] == "echo sse"
+
+
+def test_single_request_envelope_handling():
+    assert client.post("/mcp", json={"jsonrpc": "2.0", "method": "tools/list"}).status_code == 204
+
+    body = client.post("/mcp", json={"jsonrpc": "2.0", "id": 3, "params": {}}).json()
+    assert body == {"jsonrpc": "2.0", "id": 3, "error": {"code": -32600, "message": "Invalid Request", "data": "Missing 'method'"}}
+
+    body = client.post("/mcp", json={"jsonrpc": "2.0", "id": 4, "method": "tools/list", "params": []}).json()
+    assert body["error"]["code"] == -32600
+
+    response = client.post("/mcp", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+    body = client.post("/mcp", json={"jsonrpc": "2.0", "id": "x", "method": "nope"}).json()
+    assert body["error"]["code"] == -32601
+    assert "result" not in body
+
+
+def test_static_documents_use_etags_and_track_the_registry():
+    for path in ("/openapi.json", "/.well-known/mcp.json", "/.well-known/oauth-authorization-server"):
+        first = client.get(path)
+        assert first.status_code == 200
+        assert first.headers["cache-control"].startswith("public")
+        cached = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+    spec = client.get("/openapi.json")
+    assert "compress_file_arguments" in spec.json()["components"]["schemas"]
+    listed = client.post("/mcp", json={"jsonrpc": "2.0", "id": "t", "method": "tools/list"}).json()
+    assert listed["id"] == "t"
+    assert listed["result"] == {"tools": mcp_server.registry.definitions()}
+
+    @mcp_server.registry.register("temp_tool", "Temporary", {"type": "object"})
+    async def temp_tool(arguments, context):
+        return mcp_server.text_result("temp")
+
+    try:
+        assert client.get("/openapi.json", headers={"If-None-Match": spec.headers["etag"]}).status_code == 200
+        assert "temp_tool_call" in client.get("/openapi.json").json()["components"]["schemas"]
+        listed = client.post("/mcp", json={"jsonrpc": "2.0", "id": 1, "method": "tools/list"}).json()
+        assert listed["result"]["tools"][-1]["name"] == "temp_tool"
+    finally:
+        mcp_server.registry.unregister("temp_tool")
+    assert client.get("/openapi.json").headers["etag"] == spec.headers["etag"]
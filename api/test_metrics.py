@@ -0,0 +1,63 @@
+import base64
+
+from fastapi.testclient import TestClient
+
+from api.mcp_server import app
+from api.metrics import Histogram, MetricRegistry
+
+client = TestClient(app)
+
+
+def sample(text: str, series: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{series} not in metrics")
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricRegistry()
+    histogram = Histogram("latency_seconds", "Latency", ["op"], buckets=[0.1, 1.0], registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.labels("read").observe(value)
+    text = registry.render().decode()
+    assert "# TYPE latency_seconds histogram" in text
+    assert sample(text, 'latency_seconds_bucket{op="read",le="0.1"}') == 2
+    assert sample(text, 'latency_seconds_bucket{op="read",le="1.0"}') == 3
+    assert sample(text, 'latency_seconds_bucket{op="read",le="+Inf"}') == 4
+    assert sample(text, 'latency_seconds_count{op="read"}') == 4
+    assert sample(text, 'latency_seconds_sum{op="read"}') == 3.65
+
+
+def test_metrics_endpoint_counts_methods_tools_and_sizes():
+    before = client.get("/metrics").text
+    calls = [
+        {"method": "tools/list"},
+        {"method": "tools/call", "params": {"name": "hello_claude", "arguments": {}}},
+        {"method": "tools/call", "params": {"name": "compress_file", "arguments": {"filename": "a"}}},
+        {"method": "tools/call", "params": {"name": "compress_file", "arguments": {
+            "filename": "a.txt", "content": base64.b64encode(b"x" * 1000).decode()}}},
+        {"method": "no/such"},
+    ]
+    for n, call in enumerate(calls):
+        client.post("/mcp", json={"jsonrpc": "2.0", "id": n, **call})
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    def delta(series):
+        try:
+            previous = sample(before, series)
+        except AssertionError:
+            previous = 0
+        return sample(text, series) - previous
+
+    assert delta('mcp_request_duration_seconds_count{method="tools/list"}') == 1
+    assert delta('mcp_request_duration_seconds_count{method="tools/call"}') == 3
+    assert delta('mcp_request_errors_total{method="other",code="-32601"}') == 1
+    assert delta('mcp_tool_duration_seconds_count{tool="compress_file"}') == 2
+    assert delta('mcp_tool_errors_total{tool="compress_file"}') == 1
+    assert sample(text, 'mcp_requests_in_flight{method="tools/call"}') == 0
+    assert delta('mcp_compress_bytes_sum{format="gzip",stage="original"}') == 1000
+    assert delta('mcp_request_body_bytes_count') == 5
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+import api.mcp_server as mcp_server
+from api.lag import LagMonitor
+from api.profiling import ProfileBusy, profile_loop
+from api.mcp_server import app
+
+client = TestClient(app)
+
+
+def blocking_callback():
+    time.sleep(0.3)
+
+
+def test_stall_is_recorded_with_the_blocking_stack():
+    async def scenario():
+        monitor = LagMonitor(interval=0.01, stall_threshold=0.05)
+        monitor.ensure_started()
+        await asyncio.sleep(0.03)
+        asyncio.get_running_loop().call_soon(blocking_callback)
+        await asyncio.sleep(0.05)
+        monitor.stop()
+        return monitor.stats(stacks=True)
+
+    stats = asyncio.run(scenario())
+    assert stats["stalls"] == 1
+    stall = stats["recent_stalls"][0]
+    assert stall["stack"].endswith(f"blocking_callback (test_profiling.py:{blocking_callback.__code__.co_firstlineno})")
+    assert stall["blocked_ms"] >= 250
+
+
+def test_monitor_without_threshold_runs_no_watchdog():
+    async def scenario():
+        monitor = LagMonitor(interval=0.01)
+        monitor.ensure_started()
+        await asyncio.sleep(0.02)
+        watching = monitor._watchdog_stop is not None
+        monitor.stop()
+        return watching
+
+    assert not asyncio.run(scenario())
+
+
+def test_cancelled_profile_keeps_the_lock_until_its_sampler_stops():
+    async def scenario():
+        first = asyncio.ensure_future(profile_loop(0.3, 0.01))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.sleep(0)
+        try:
+            await profile_loop(0.05, 0.01)
+        except ProfileBusy:
+            busy = True
+        else:
+            busy = False
+        await asyncio.sleep(0.4)
+        return busy, await profile_loop(0.05, 0.01)
+
+    busy, stacks = asyncio.run(scenario())
+    assert busy
+    assert sum(stacks.values()) > 0
+
+def test_debug_profile_is_guarded_and_returns_collapsed_stacks(monkeypatch):
+    assert client.get("/debug/profile").status_code == 404
+
+    monkeypatch.setattr(mcp_server, "DEBUG_TOKEN", "secret")
+    assert client.get("/debug/profile", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    auth = {"Authorization": "Bearer secret"}
+    assert client.get("/debug/profile?seconds=0", headers=auth).status_code == 400
+
+    response = client.get("/debug/profile?seconds=0.2&interval_ms=2", headers=auth)
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert sum(int(count) for stack, count in stacks) > 10
+    # The loop thread was sampled, root frame first
+    assert all(";" in stack for stack, count in stacks)
+    assert any("debug_profile" in stack or "_run_once" in stack for stack, count in stacks)
+
+    assert "recent_stalls" in client.get("/debug/lag", headers=auth).json()
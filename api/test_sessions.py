@@ -0,0 +1,68 @@
+import pytest
+
+from api.sessions import MemorySessionStore, SqliteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(ttl=60, max_sessions=100):
+        if request.param == "memory":
+            return MemorySessionStore(ttl=ttl, max_sessions=max_sessions)
+        return SqliteSessionStore(
+            str(tmp_path / "sessions.sqlite3"), ttl=ttl, max_sessions=max_sessions, touch_interval=0, sweep_interval=0
+        )
+    return make
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("api.sessions.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("api.sessions.time.time", lambda: now[0])
+    return now
+
+
+def test_create_get_delete(make_store):
+    store = make_store()
+    store.create("a", {"client_info": {"name": "x"}})
+    assert store.get("a") == {"client_info": {"name": "x"}}
+    assert store.touch("a")
+    assert len(store) == 1
+    assert store.delete("a")
+    assert not store.delete("a")
+    assert store.get("a") is None
+
+
+def test_idle_sessions_expire_and_access_refreshes(make_store, clock):
+    store = make_store(ttl=10)
+    store.create("idle", {})
+    store.create("active", {})
+    clock[0] += 6
+    assert store.touch("active")
+    clock[0] += 6
+    assert store.get("idle") is None
+    assert store.get("active") == {}
+
+
+def test_cap_evicts_least_recently_used(make_store, clock):
+    store = make_store(max_sessions=2)
+    store.create("a", {})
+    clock[0] += 1
+    store.create("b", {})
+    clock[0] += 1
+    store.touch("a")
+    clock[0] += 1
+    store.create("c", {})
+    assert store.get("b") is None
+    assert store.touch("a") and store.touch("c")
+    assert len(store) == 2
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SqliteSessionStore(path)
+    second = SqliteSessionStore(path)
+    first.create("shared", {"n": 1})
+    assert second.get("shared") == {"n": 1}
+    assert second.delete("shared")
+    assert first.get("shared") is None
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+# Cumulative import time allowed for the Vercel entry point. FastAPI itself
+# is most of it; importing the Anthropic SDK eagerly again roughly
+# quadruples it.
+IMPORT_BUDGET_MS = float(os.getenv("MCP_IMPORT_BUDGET_MS", "1500"))
+
+# Loaded on first use only, never by the import of the app
+DEFERRED_MODULES = ["anthropic", "httpx", "multiprocessing", "sqlite3"]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str):
+    """{module: cumulative microseconds} from `python -X importtime`"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+        env=dict(os.environ, MCP_LAZY_STARTUP="1"),
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_stays_within_budget_and_defers_heavy_modules():
+    times = import_times("api.index")
+    assert [name for name in DEFERRED_MODULES if name in times] == []
+    total_ms = times["api.index"] / 1000
+    assert total_ms < IMPORT_BUDGET_MS, f"api.index imports in {total_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
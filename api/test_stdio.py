@@ -0,0 +1,155 @@
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+
+import api.mcp_server as mcp_server
+import api.stdio as stdio
+from api.mcp_server import registry, text_result
+from api.body import BodyLimits
+from api.stdio import LineReader, StdioTransport
+
+
+@pytest.fixture
+def slow_tool():
+    @registry.register("slow_stdio_test", "Sleeps, for stdio tests", {"type": "object", "properties": {}})
+    async def slow(arguments, context):
+        await asyncio.sleep(0.2)
+        return text_result("slept")
+    yield "slow_stdio_test"
+    registry.unregister("slow_stdio_test")
+
+
+def line(request_id, method, params=None):
+    body = {"jsonrpc": "2.0", "method": method, "params": params or {}}
+    if request_id is not None:
+        body["id"] = request_id
+    return json.dumps(body).encode() + b"\n"
+
+
+def serve(*chunks, delay=0.0):
+    """Feed `chunks` to a transport (pausing `delay` before each after the first) and collect its output"""
+    async def scenario():
+        reader = asyncio.StreamReader()
+        output = []
+        transport = StdioTransport(output.append)
+
+        async def feed():
+            for n, chunk in enumerate(chunks):
+                if n and delay:
+                    await asyncio.sleep(delay)
+                reader.feed_data(chunk)
+            reader.feed_eof()
+
+        start = time.monotonic()
+        await asyncio.gather(transport.run(reader), feed())
+        return [json.loads(message) for message in b"".join(output).splitlines()], time.monotonic() - start
+
+    return asyncio.run(scenario())
+
+
+def test_line_reader_streams_lines_and_skips_what_is_not_read(monkeypatch):
+    monkeypatch.setattr(stdio, "STDIO_READ_CHUNK", 4)
+
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"first\n\n  second line\nthird\nlast")
+        reader.feed_eof()
+        lines = LineReader(reader)
+        read = []
+        while await lines.next_line():
+            chunks = lines.chunks()
+            read.append(await chunks.__anext__())
+            if len(read) != 2:
+                read[-1] += b"".join([chunk async for chunk in chunks])
+        return read
+
+    # Only the first chunk of the second line was asked for
+    assert asyncio.run(scenario()) == [b"first", b"sec", b"third", b"last"]
+
+
+def test_requests_are_pipelined_and_answered_as_they_finish(slow_tool):
+    call = {"name": slow_tool}
+    messages, elapsed = serve(
+        line(1, "tools/call", call),
+        line(2, "tools/call", call),
+        line(3, "tools/call", {"name": "hello_claude"}),
+        b"not json\n",
+    )
+    # The parse error is reported as soon as the line is read
+    assert [message["id"] for message in messages] == [None, 3, 1, 2]
+    assert messages[0]["error"]["code"] == -32700
+    assert messages[2]["result"] == text_result("slept")
+    # The two slow calls overlapped
+    assert elapsed < 0.35
+
+
+def test_cancelled_request_gets_no_response_and_session_events_are_forwarded(slow_tool):
+    messages, _ = serve(
+        line(1, "initialize"),
+        line(2, "tools/call", {"name": slow_tool}),
+        line(3, "tools/call", {"name": "hello_claude", "_meta": {"async": True}}),
+        line(None, "notifications/cancelled", {"requestId": 2}),
+        delay=0.05,
+    )
+    assert 2 not in [message.get("id") for message in messages]
+    finished = [message for message in messages if message.get("method") == "notifications/jobs/finished"]
+    job_id = next(message for message in messages if message.get("id") == 3)["result"]["_meta"]["jobId"]
+    assert finished[0]["params"]["jobId"] == job_id
+
+
+def test_busy_stdio_session_does_not_expire(monkeypatch, slow_tool):
+    monkeypatch.setattr(mcp_server.sessions, "ttl", 0.3)
+    # The job runs for 0.2s after 0.4s of other calls
+    lines = [line(1, "initialize")] + [line(n, "tools/list") for n in range(2, 6)]
+    lines.append(line(6, "tools/call", {"name": slow_tool, "_meta": {"async": True}}))
+    lines += [line(n, "tools/list") for n in range(7, 10)]
+    messages, _ = serve(*lines, delay=0.1)
+    assert any(message.get("method") == "notifications/jobs/finished" for message in messages)
+
+
+def test_lines_are_held_to_the_http_body_limits(monkeypatch):
+    monkeypatch.setattr(stdio, "body_limits", BodyLimits(registry, default=200, overrides={"compress_file": 10000, "ask_claude_batch": 10000}))
+    padding = {"pad": "x" * 300}
+    content = base64.b64encode(b"stdio " * 1000).decode()
+    messages, _ = serve(
+        line(1, "tools/list", padding),
+        b"[" + line(2, "tools/list", padding).rstrip() + b"]\n",
+        line(3, "tools/call", {"name": "hello_claude", "arguments": padding}),
+        line(4, "tools/call", {"name": "compress_file", "arguments": {"content": content, "filename": "a.txt"}}),
+        b"{" + b" " * 20000 + b"}\n",
+        line(5, "tools/list"),
+    )
+    by_id = {message.get("id"): message for message in messages if isinstance(message, dict)}
+    for request_id, method in ((1, "tools/list"), (3, "tools/call")):
+        assert by_id[request_id]["error"]["code"] == -32600
+        assert by_id[request_id]["error"]["data"]["method"] == method
+    assert by_id[3]["error"]["data"] == {"limit": 200, "method": "tools/call", "tool": "hello_claude"}
+    assert not by_id[4]["result"].get("isError")
+    assert [message["error"]["data"]["limit"] for message in messages if message.get("id") is None] == [200, 10000]
+    assert "tools" in by_id[5]["result"]
+
+
+def test_output_waits_for_the_client_to_read():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        output = []
+        reading = asyncio.Event()
+
+        async def drain():
+            await reading.wait()
+
+        transport = StdioTransport(output.append, drain)
+        reader.feed_data(line(1, "tools/list") + line(2, "tools/list"))
+        reader.feed_eof()
+        run = asyncio.ensure_future(transport.run(reader))
+        await asyncio.sleep(0.05)
+        blocked = (len(output), run.done())
+        reading.set()
+        await run
+        return blocked, len(output)
+
+    (written, finished), total = asyncio.run(scenario())
+    assert not finished and written == total == 2
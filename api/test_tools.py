@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import gzip
+
+import pytest
+
+from api.cache import ResultCache
+from api.registry import ToolRegistry, ToolArgumentError, ToolContext, compile_validator
+from api.mcp_server import registry, handle_tools_call, TOOLS
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_validator_applies_defaults_and_checks_required():
+    validate = compile_validator({
+        "type": "object",
+        "properties": {
+            "name": {"type": "string", "minLength": 1},
+            "mode": {"type": "string", "enum": ["a", "b"], "default": "a"},
+        },
+        "required": ["name"],
+    })
+    assert validate({"name": "x"}) == {"name": "x", "mode": "a"}
+    with pytest.raises(ToolArgumentError, match="Missing 'name' argument"):
+        validate({})
+    with pytest.raises(ToolArgumentError, match="must not be empty"):
+        validate({"name": ""})
+    with pytest.raises(ToolArgumentError, match="expected one of a, b"):
+        validate({"name": "x", "mode": "c"})
+    with pytest.raises(ToolArgumentError, match="must be of type string"):
+        validate({"name": 1})
+
+
+def test_registry_rejects_duplicate_names():
+    tools = ToolRegistry()
+
+    @tools.register("dup", "first", {"type": "object"})
+    async def first(arguments, context):
+        return {}
+
+    with pytest.raises(ValueError):
+        tools.register("dup", "second", {"type": "object"})(first)
+
+
+def test_tools_list_matches_registry():
+    assert [tool["name"] for tool in TOOLS] == ["hello_claude", "ask_claude", "ask_claude_batch", "compress_file"]
+    assert TOOLS == registry.definitions()
+    assert registry.definitions() is registry.definitions()
+
+
+def test_tools_call_dispatches_and_validates():
+    result = run(handle_tools_call({"name": "hello_claude"}))
+    assert "Hello from Dummy MCP" in result["content"][0]["text"]
+
+    result = run(handle_tools_call({"name": "compress_file", "arguments": {"content": "aGk="}}))
+    assert result["isError"] is True
+    assert result["content"][0]["text"] == "Missing 'filename' argument"
+
+    with pytest.raises(ValueError, match="Unknown tool"):
+        run(handle_tools_call({"name": "nope"}))
+
+
+def test_compress_file_gzip_roundtrip():
+    payload = b"hello world " * 100
+    result = run(handle_tools_call({
+        "name": "compress_file",
+        "arguments": {"content": base64.b64encode(payload).decode(), "filename": "a.txt"},
+    }))
+    text = result["content"][0]["text"]
+    encoded = text.rsplit("\n", 1)[-1]
+    assert gzip.decompress(base64.b64decode(encoded)) == payload
+
+
+class FakeMessages:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+
+        class Block:
+            text = f"echo {kwargs['messages'][0]['content']}"
+
+        class Message:
+            content = [Block()]
+        return Message()
+
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        return FakeStream(["echo", " ", kwargs["messages"][0]["content"]])
+
+
+class FakeStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for delta in self.deltas:
+            yield delta
+
+    async def get_final_message(self):
+        class Block:
+            type = "text"
+            text = "".join(self.deltas)
+
+        class Message:
+            content = [Block()]
+        return Message()
+
+
+class FakeClient:
+    def __init__(self):
+        self.messages = FakeMessages()
+
+
+def test_ask_claude_awaits_shared_client(monkeypatch):
+    import api.mcp_server as mcp_server
+    fake = FakeClient()
+    monkeypatch.setattr(mcp_server, "get_client", lambda: fake)
+    mcp_server.ask_claude_cache.clear()
+    result = run(handle_tools_call({"name": "ask_claude", "arguments": {"prompt": "hi"}}))
+    assert result["content"][0]["text"] == "echo hi"
+    assert fake.messages.calls[0]["max_tokens"] == 64
+
+    run(handle_tools_call({"name": "ask_claude", "arguments": {"prompt": "hi"}}))
+    assert len(fake.messages.calls) == 1
+    run(handle_tools_call({"name": "ask_claude", "arguments": {"prompt": "hi", "cache": False}}))
+    assert len(fake.messages.calls) == 2
+
+
+def test_ask_claude_streams_progress(monkeypatch):
+    import api.mcp_server as mcp_server
+    fake = FakeClient()
+    monkeypatch.setattr(mcp_server, "get_client", lambda: fake)
+    mcp_server.ask_claude_cache.clear()
+    sent = []
+
+    async def notify(message):
+        sent.append(message)
+
+    context = ToolContext(progress_token="tok", notify=notify)
+    result = run(handle_tools_call(
+        {"name": "ask_claude", "arguments": {"prompt": "there", "max_tokens": 1000}},
+        context,
+    ))
+    assert result["content"][0]["text"] == "echo there"
+    assert fake.messages.calls[0]["max_tokens"] == 1000
+    assert [m["params"]["message"] for m in sent] == ["echo", " ", "there"]
+    assert [m["params"]["progress"] for m in sent] == [4, 5, 10]
+    assert all(m["params"]["progressToken"] == "tok" for m in sent)
+
+
+def test_streaming_ask_claude_calls_share_the_cache(monkeypatch):
+    import api.mcp_server as mcp_server
+    fake = FakeClient()
+    monkeypatch.setattr(mcp_server, "get_client", lambda: fake)
+    cache = ResultCache(max_bytes=1 << 20, ttl=60)
+    monkeypatch.setattr(mcp_server, "ask_claude_cache", cache)
+    sent = []
+
+    async def notify(message):
+        sent.append(message)
+
+    async def scenario():
+        call = {"name": "ask_claude", "arguments": {"prompt": "same"}}
+        first = [handle_tools_call(call, ToolContext(progress_token=n, notify=notify)) for n in range(3)]
+        results = await asyncio.gather(*first, handle_tools_call(call))
+        results.append(await handle_tools_call(call, ToolContext(progress_token="late", notify=notify)))
+        return results
+
+    results = run(scenario())
+    assert {result["content"][0]["text"] for result in results} == {"echo same"}
+    assert len(fake.messages.calls) == 1
+    # Only the call that reached the API reported its deltas
+    assert [m["params"]["progressToken"] for m in sent] == [0] * 3
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 3, 1)
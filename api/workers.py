@@ -0,0 +1,43 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+# Where CPU-bound tool work (compression) runs. "thread" is usually enough
+# because zlib releases the GIL; "process" isolates it completely at the
+# cost of pickling the payload across.
+COMPRESS_EXECUTOR = os.getenv("COMPRESS_EXECUTOR", "thread")
+COMPRESS_WORKERS = int(os.getenv("COMPRESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Payloads smaller than this (in base64 characters) run inline on the event loop
+COMPRESS_INLINE_THRESHOLD = int(os.getenv("COMPRESS_INLINE_THRESHOLD", str(64 * 1024)))
+
+_executor: Optional[Executor] = None
+
+def get_executor() -> Executor:
+    """Return the shared worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        if COMPRESS_EXECUTOR == "process":
+            # Imported here: it pulls in multiprocessing, which thread mode never needs
+            from concurrent.futures import ProcessPoolExecutor
+            _executor = ProcessPoolExecutor(max_workers=COMPRESS_WORKERS)
+        elif COMPRESS_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(max_workers=COMPRESS_WORKERS, thread_name_prefix="compress")
+        else:
+            raise ValueError(f"Unknown COMPRESS_EXECUTOR: {COMPRESS_EXECUTOR}")
+    return _executor
+
+async def run_cpu_bound(fn: Callable[..., Any], *args: Any, size: int) -> Any:
+    """Run `fn(*args)` in the worker pool, or inline when `size` is below the threshold"""
+    if size < COMPRESS_INLINE_THRESHOLD:
+        return fn(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(fn, *args))
+
+def shutdown_executor() -> None:
+    """Stop the worker pool; queued work that has not started is cancelled"""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
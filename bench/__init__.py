@@ -0,0 +1,13 @@
+import os
+
+# Admission control (api/admission.py) would throttle the load generators
+# themselves. Set before any benchmark imports the app; uvicorn subprocesses
+# inherit it. Export these variables to benchmark with limits on.
+for name, value in {
+    "MCP_SESSION_RATE": "0",
+    "MCP_SESSION_MAX_IN_FLIGHT": "1000000",
+    "MCP_TOOL_RATE_LIMITS": "ask_claude=0",
+    "MCP_TOOL_MAX_IN_FLIGHT": "ask_claude=1000000,compress_file=1000000",
+    "MCP_SHED_LAG_MS": "0",
+}.items():
+    os.environ.setdefault(name, value)
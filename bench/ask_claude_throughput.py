@@ -0,0 +1,79 @@
+"""Concurrent ask_claude throughput: blocking sync client vs shared AsyncAnthropic.
+
+Drives the ASGI app in-process against a local mock Messages API:
+
+    python -m bench.ask_claude_throughput --requests 50 --concurrency 10 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import anthropic
+import httpx
+
+import api.mcp_server as mcp_server
+from api import claude
+from bench.mock_anthropic import MockAnthropicServer
+
+
+def blocking_ask_claude(base_url: str):
+    """The pre-AsyncAnthropic handler: a sync client called on the event loop"""
+    sync_client = anthropic.Client(api_key="test", base_url=base_url)
+
+    async def handler(arguments):
+        response = sync_client.messages.create(
+            model=claude.CLAUDE_MODEL,
+            max_tokens=64,
+            messages=[{"role": "user", "content": arguments["prompt"]}]
+        )
+        return mcp_server.text_result(response.content[0].text)
+    return handler
+
+
+async def drive(total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=mcp_server.app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        async def one(i: int) -> None:
+            async with semaphore:
+                response = await http.post("/mcp", json={
+                    "jsonrpc": "2.0", "id": i, "method": "tools/call",
+                    "params": {"name": "ask_claude", "arguments": {"prompt": f"question {i}"}},
+                })
+                assert "result" in response.json(), response.text
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock upstream latency in seconds")
+    args = parser.parse_args()
+
+    results = {}
+    with MockAnthropicServer(latency=args.latency) as server:
+        tool = mcp_server.registry.get("ask_claude")
+        async_handler = tool.handler
+
+        tool.handler = blocking_ask_claude(server.url)
+        results["sync_client"] = asyncio.run(drive(args.requests, args.concurrency))
+
+        tool.handler = async_handler
+        claude.set_client(claude.create_client(api_key="test", base_url=server.url))
+        results["async_client"] = asyncio.run(drive(args.requests, args.concurrency))
+        claude.set_client(None)
+
+    report = {
+        name: {"seconds": round(elapsed, 3), "requests_per_second": round(args.requests / elapsed, 1)}
+        for name, elapsed in results.items()
+    }
+    report["config"] = vars(args)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Throughput and ratio per compress_file codec and level.
+
+The corpus is built from files shipped with the running Python (stdlib
+source as text, a JSON rendering of it, and the interpreter's shared
+libraries as binary) so every machine measures the same kind of data:
+
+    python -m bench.codec_matrix --corpus-mib 16
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import sysconfig
+import time
+
+from api.compression import CODECS, compress_stream
+
+# (format, level) pairs: the defaults plus the fast and dense modes
+MATRIX = [
+    ("gzip", 1), ("gzip", 6), ("gzip", 9),
+    ("zip", 6),
+    ("zstd", 1), ("zstd", 3), ("zstd", 19),
+    ("brotli", 1), ("brotli", 6), ("brotli", 11),
+    ("lz4", 0), ("lz4", 9),
+]
+
+
+class CountingSink:
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data) -> int:
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def read_files(pattern: str, limit: int) -> bytes:
+    parts, total = [], 0
+    for path in sorted(glob.glob(pattern, recursive=True)):
+        if total >= limit:
+            break
+        try:
+            with open(path, "rb") as f:
+                data = f.read(limit - total)
+        except OSError:
+            continue
+        parts.append(data)
+        total += len(data)
+    return b"".join(parts)
+
+
+def build_corpus(limit: int) -> dict:
+    stdlib = sysconfig.get_paths()["stdlib"]
+    text = read_files(os.path.join(stdlib, "**", "*.py"), limit)
+    records = [{"offset": i, "line": line.decode("utf-8", "replace")} for i, line in enumerate(text.splitlines())]
+    json_data = json.dumps(records).encode()[:limit]
+    binary = read_files(os.path.join(stdlib, "**", "*.so"), limit) or read_files(sys.executable, limit)
+    return {"text": text, "json": json_data, "binary": binary}
+
+
+def chunks(data: bytes, size: int = 256 * 1024):
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus-mib", type=int, default=16, help="bytes per corpus sample, in MiB")
+    parser.add_argument("--threads", type=int, default=0, help="zstd worker threads")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.corpus_mib * 1024 * 1024)
+    results = []
+    for compress_format, level in MATRIX:
+        if compress_format not in CODECS:
+            results.append({"format": compress_format, "level": level, "skipped": "not installed"})
+            continue
+        for name, data in corpus.items():
+            sink = CountingSink()
+            start = time.perf_counter()
+            compress_stream(chunks(data), "bench", compress_format, sink, level, args.threads)
+            elapsed = time.perf_counter() - start
+            results.append({
+                "format": compress_format,
+                "level": level,
+                "corpus": name,
+                "input_mib": round(len(data) / 2**20, 2),
+                "ratio": round(len(data) / sink.size, 2),
+                "mib_per_s": round(len(data) / 2**20 / elapsed, 1),
+            })
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
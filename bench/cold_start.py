@@ -0,0 +1,89 @@
+"""Cold start: time from a fresh interpreter to the first response.
+
+Each run spawns a new Python process that imports the Vercel entry point,
+runs the app lifespan and sends one request in process. Startup modes:
+
+  lazy   MCP_LAZY_STARTUP=1, as on Vercel: no client until ask_claude
+  eager  the client (and the Anthropic SDK import) at startup
+
+    python -m bench.cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = r"""
+import time
+started = time.perf_counter()
+import asyncio, json, sys
+from api.index import app
+imported = time.perf_counter()
+from bench.asgi import asgi_request
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        method, path, body = json.loads(sys.argv[1])
+        status, _, _ = await asgi_request(app, method, path, body.encode())
+        done = time.perf_counter()
+    assert status in (200, 204), status
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "lifespan_ms": (ready - imported) * 1000,
+        "first_request_ms": (done - ready) * 1000,
+        "in_process_total_ms": (done - started) * 1000,
+    }))
+
+asyncio.run(main())
+"""
+
+REQUESTS = {
+    "GET /": ("GET", "/", ""),
+    "initialize": ("POST", "/mcp", '{"jsonrpc":"2.0","id":1,"method":"initialize","params":{}}'),
+    "tools/list": ("POST", "/mcp", '{"jsonrpc":"2.0","id":1,"method":"tools/list"}'),
+    "hello_claude": ("POST", "/mcp", '{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"hello_claude"}}'),
+}
+
+MODES = {
+    "lazy": {"MCP_LAZY_STARTUP": "1"},
+    "eager": {"MCP_LAZY_STARTUP": "0"},
+}
+
+
+def cold_start(request, env) -> dict:
+    """One fresh process; wall time includes interpreter startup"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(request)],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    timings = json.loads(result.stdout)
+    timings["wall_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    report = {}
+    for mode in args.modes:
+        # A key is needed for the eager path to build a client at all
+        env = dict(os.environ, ANTHROPIC_API_KEY="bench", **MODES[mode])
+        report[mode] = {}
+        for name, request in REQUESTS.items():
+            runs = [cold_start(request, env) for _ in range(args.runs)]
+            report[mode][name] = {
+                key: round(statistics.median(run[key] for run in runs), 1) for key in runs[0]
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Peak memory of compress_file: the old buffered path vs the chunked pipeline.
+
+Peak is measured with tracemalloc and excludes the input string itself,
+which the JSON body already holds in both cases:
+
+    python -m bench.compress_memory --sizes 4 16 64 --format gzip
+"""
+import argparse
+import base64
+import gzip
+import io
+import json
+import os
+import tracemalloc
+import zipfile
+
+from api.compression import compress_base64
+
+
+def buffered_compress(content: str, filename: str, compress_format: str) -> str:
+    """The pre-streaming implementation, kept for comparison"""
+    decoded_content = base64.b64decode(content)
+    compressed_buffer = io.BytesIO()
+    if compress_format == "gzip":
+        with gzip.GzipFile(filename=filename, mode="wb", fileobj=compressed_buffer) as gz:
+            gz.write(decoded_content)
+        output_filename = f"{filename}.gz"
+    else:
+        with zipfile.ZipFile(compressed_buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(filename, decoded_content)
+        output_filename = f"{filename}.zip"
+    compressed_data = compressed_buffer.getvalue()
+    compressed_base64 = base64.b64encode(compressed_data).decode("utf-8")
+    original_size = len(decoded_content)
+    compressed_size = len(compressed_data)
+    ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
+    return f"File compressed successfully!\n\nFormat: {compress_format}\nOriginal size: {original_size} bytes\nCompressed size: {compressed_size} bytes\nCompression ratio: {ratio:.1f}%\nOutput filename: {output_filename}\n\nCompressed content (base64):\n{compressed_base64}"
+
+
+def sample_payload(size: int) -> bytes:
+    """Half text, half random bytes: compresses to roughly 55%"""
+    text = (b"The quick brown fox jumps over the lazy dog. " * (size // 90 + 1))[: size // 2]
+    return text + os.urandom(size - len(text))
+
+
+def peak_bytes(fn, *args) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64], help="input sizes in MiB")
+    parser.add_argument("--format", choices=["gzip", "zip"], default="gzip")
+    args = parser.parse_args()
+
+    rows = []
+    for mib in args.sizes:
+        content = base64.b64encode(sample_payload(mib * 1024 * 1024)).decode()
+        buffered = peak_bytes(buffered_compress, content, "bench.bin", args.format)
+        streaming = peak_bytes(compress_base64, content, "bench.bin", args.format)
+        rows.append({
+            "input_mib": mib,
+            "base64_mib": round(len(content) / 2**20, 1),
+            "buffered_peak_mib": round(buffered / 2**20, 1),
+            "streaming_peak_mib": round(streaming / 2**20, 1),
+        })
+        del content
+    print(json.dumps({"format": args.format, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""hello_claude latency while large compress_file calls run: inline vs worker pool.
+
+    python -m bench.compress_offload --size 16 --compressions 4 --pings 200
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import time
+
+import httpx
+
+import api.mcp_server as mcp_server
+from api import workers
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(size_mib: int, compressions: int, pings: int) -> dict:
+    content = base64.b64encode(os.urandom(size_mib * 1024 * 1024 // 2) * 2).decode()
+    transport = httpx.ASGITransport(app=mcp_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        async def compress(i: int) -> None:
+            await http.post("/mcp", json={
+                "jsonrpc": "2.0", "id": f"c{i}", "method": "tools/call",
+                "params": {"name": "compress_file", "arguments": {"content": content, "filename": "big.bin"}},
+            })
+
+        async def ping(i: int) -> float:
+            # Latency counts from the scheduled send time, so time spent
+            # waiting for a blocked loop to wake us up is included
+            scheduled = start + i * 0.005
+            await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            await http.post("/mcp", json={
+                "jsonrpc": "2.0", "id": i, "method": "tools/call", "params": {"name": "hello_claude"},
+            })
+            return time.perf_counter() - scheduled
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(compress(i) for i in range(compressions)),
+            *(ping(i) for i in range(pings)),
+        )
+        total = time.perf_counter() - start
+    latencies = [r * 1000 for r in results[compressions:]]
+    return {
+        "hello_p50_ms": round(statistics.median(latencies), 2),
+        "hello_p99_ms": round(percentile(latencies, 99), 2),
+        "hello_max_ms": round(max(latencies), 2),
+        "total_s": round(total, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=16, help="compress_file payload in MiB")
+    parser.add_argument("--compressions", type=int, default=4)
+    parser.add_argument("--pings", type=int, default=200)
+    args = parser.parse_args()
+
+    report = {"config": vars(args)}
+    threshold = workers.COMPRESS_INLINE_THRESHOLD
+    workers.COMPRESS_INLINE_THRESHOLD = float("inf")
+    report["inline"] = asyncio.run(run(args.size, args.compressions, args.pings))
+    workers.COMPRESS_INLINE_THRESHOLD = threshold
+    report[f"{workers.COMPRESS_EXECUTOR}_pool"] = asyncio.run(run(args.size, args.compressions, args.pings))
+    workers.shutdown_executor()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""/mcp request overhead: orjson fast path vs the previous Pydantic + JSONResponse path.
+
+The legacy path is rebuilt here on a bench-only route: request.json(), a
+Pydantic request model, a Pydantic response model, .dict(exclude_none=True)
+and a stdlib-encoded JSONResponse around the same handle_request.
+
+    python -m bench.json_path --seconds 3
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, Optional, Union
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+import api.mcp_server as mcp_server
+from bench.asgi import asgi_request
+
+
+class LegacyRequest(BaseModel):
+    jsonrpc: str = "2.0"
+    id: Optional[Union[str, int, None]] = None
+    method: str
+    params: Optional[Dict[str, Any]] = {}
+
+
+class LegacyResponse(BaseModel):
+    jsonrpc: str = "2.0"
+    id: Union[str, int, None]
+    result: Optional[Any] = None
+    error: Optional[Dict[str, Any]] = None
+
+
+@mcp_server.app.post("/bench/legacy-mcp", include_in_schema=False)
+async def legacy_mcp(request: Request):
+    body = await request.json()
+    legacy = LegacyRequest(**body)
+    rpc_request = mcp_server.JsonRpcRequest(legacy.method, legacy.id, legacy.params)
+    response = LegacyResponse(**await mcp_server.handle_request(rpc_request))
+    return JSONResponse(content=response.model_dump(exclude_none=True))
+
+
+PAYLOADS = {
+    "tools/list": {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+    "hello_claude": {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "hello_claude"}},
+}
+
+
+async def measure(path: str, body: bytes, seconds: float) -> Dict[str, float]:
+    app = mcp_server.app
+    for _ in range(200):
+        await asgi_request(app, "POST", path, body)
+    count = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            await asgi_request(app, "POST", path, body)
+        count += 100
+    elapsed = time.perf_counter() - start
+
+    # Allocation profile of a single request, once warm
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(100):
+        await asgi_request(app, "POST", path, body)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    await asgi_request(app, "POST", path, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "requests_per_second": round(count / elapsed),
+        "us_per_request": round(elapsed / count * 1e6, 1),
+        "peak_traced_bytes_per_request": peak,
+        "retained_blocks_per_100_requests": retained,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0, help="duration per measurement")
+    args = parser.parse_args()
+
+    report = {}
+    for name, payload in PAYLOADS.items():
+        body = json.dumps(payload).encode()
+        report[name] = {
+            "legacy": asyncio.run(measure("/bench/legacy-mcp", body, args.seconds)),
+            "fast": asyncio.run(measure("/mcp", body, args.seconds)),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
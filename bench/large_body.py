@@ -0,0 +1,73 @@
+"""Peak server memory for one large compress_file request over HTTP.
+
+Each mode runs a fresh uvicorn process and sends a single compress_file
+call with --size MiB of base64 content, compressed into a blob so the
+response stays small:
+
+  buffered  the whole body is read, then parsed with one loads() call
+  streamed  the body is parsed as it arrives and 'content' is decoded
+            straight into a spool file (the default for large bodies)
+
+    python -m bench.large_body --size 64
+"""
+import argparse
+import base64
+import json
+import os
+import time
+
+import httpx
+
+from bench.server import AppServer
+
+# Bodies only skip the incremental parser when they are within every limit
+MODES = {
+    "buffered": {"MCP_STREAM_PARSE_THRESHOLD": str(1 << 40), "MCP_MAX_BODY_BYTES": str(1 << 40)},
+    "streamed": {},
+}
+
+
+def request_body(size: int) -> bytes:
+    content = base64.b64encode(os.urandom(size // 4) * 4).decode()
+    return json.dumps({
+        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
+        "params": {
+            "name": "compress_file",
+            "arguments": {"content": content, "filename": "large.bin", "format": "gzip", "output": "blob"},
+        },
+    }).encode()
+
+
+def run(mode: str, body: bytes) -> dict:
+    env = dict({"COMPRESS_MAX_REQUEST_BYTES": str(len(body) + 1024)}, **MODES[mode])
+    with AppServer(env=env) as server:
+        baseline = server.rss_bytes()
+        start = time.perf_counter()
+        response = httpx.post(server.url + "/mcp", content=body, timeout=120,
+                              headers={"Content-Type": "application/json"})
+        elapsed = time.perf_counter() - start
+        result = response.json()["result"]
+        assert not result.get("isError"), result
+        return {
+            "seconds": round(elapsed, 2),
+            "baseline_rss_mib": round(baseline / 2**20, 1),
+            "peak_rss_mib": round(server.peak_rss_bytes() / 2**20, 1),
+            "peak_growth_mib": round((server.peak_rss_bytes() - baseline) / 2**20, 1),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=64, help="decoded content size in MiB")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    args = parser.parse_args()
+
+    body = request_body(args.size * 2**20)
+    report = {"body_mib": round(len(body) / 2**20, 1)}
+    for mode in args.modes:
+        report[mode] = run(mode, body)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
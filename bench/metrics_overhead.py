@@ -0,0 +1,96 @@
+"""Cost of request instrumentation relative to the requests it measures.
+
+Times the exact metric updates a tools/call pays (request and tool
+histograms with their in-flight counts, error checks, body size), then the same
+tools/call end to end: in process through handle_request, over ASGI
+through POST /mcp, and as server CPU time per request under uvicorn
+(from /proc). Overhead is the first divided by the others:
+
+    python -m bench.metrics_overhead --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+import api.mcp_server as mcp_server
+from api.jsonrpc import JsonRpcRequest, dumps
+from api.metrics import REQUEST_BODY_SIZES, method_series, tool_series
+from bench.asgi import asgi_request
+from bench.server import AppServer
+
+CALL = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "hello_claude", "arguments": {}}}
+
+
+def instrumentation_ns(iterations: int) -> float:
+    """Per-request cost of the metric updates on the tools/call path"""
+    result = {"content": []}
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        REQUEST_BODY_SIZES.observe(120)
+        series = method_series("tools/call")
+        request_start = series.start()
+        tool = tool_series("hello_claude")
+        tool_start = tool.start()
+        tool.finish(tool_start)
+        result is None or result.get("isError")
+        series.finish(request_start)
+        result is not None and "error" in result
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def handle_request_ns(iterations: int) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        await mcp_server.handle_request(JsonRpcRequest.from_dict(CALL))
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def asgi_ns(iterations: int) -> float:
+    body = dumps(CALL)
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        await asgi_request(mcp_server.app, "POST", "/mcp", body)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def uvicorn_cpu_ns(requests: int) -> float:
+    """Server CPU time (user + system) per POST /mcp under uvicorn"""
+    with AppServer() as server, httpx.Client(base_url=server.url) as http:
+        for _ in range(500):
+            http.post("/mcp", json=CALL)
+        before = server.cpu_seconds()
+        for _ in range(requests):
+            http.post("/mcp", json=CALL)
+        return (server.cpu_seconds() - before) * 1e9 / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # Warm up every path once before timing
+    instrumentation_ns(1000)
+    asyncio.run(handle_request_ns(1000))
+    asyncio.run(asgi_ns(1000))
+
+    metrics = min(instrumentation_ns(args.iterations) for _ in range(3))
+    in_process = min(asyncio.run(handle_request_ns(args.iterations)) for _ in range(3))
+    over_asgi = min(asyncio.run(asgi_ns(args.iterations)) for _ in range(3))
+    server_cpu = uvicorn_cpu_ns(args.iterations // 2)
+    print(json.dumps({
+        "instrumentation_ns": round(metrics),
+        "handle_request_ns": round(in_process),
+        "post_mcp_asgi_ns": round(over_asgi),
+        "post_mcp_uvicorn_cpu_ns": round(server_cpu),
+        "overhead_vs_handle_request_pct": round(metrics / in_process * 100, 2),
+        "overhead_vs_post_mcp_asgi_pct": round(metrics / over_asgi * 100, 2),
+        "overhead_vs_post_mcp_uvicorn_pct": round(metrics / server_cpu * 100, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Local mock of the Anthropic Messages API for offline benchmarks and tests.
+
+    from bench.mock_anthropic import MockAnthropicServer
+    with MockAnthropicServer(latency=0.2) as server:
+        client = anthropic.AsyncAnthropic(api_key="test", base_url=server.url)
+
+Message Batches are simulated too: the requests of a batch finish one
+after another over `batch_latency` seconds, prompts starting with
+"!error" come back errored, and results are served as JSONL once the
+batch has ended.
+"""
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_message(message: Dict[str, Any], token_delay: float):
+    """Replay a finished message as Messages API stream events, one word per delta"""
+    start = dict(message, content=[], stop_reason=None)
+    start["usage"] = dict(message["usage"], output_tokens=0)
+    yield _sse("message_start", {"type": "message_start", "message": start})
+    yield _sse("content_block_start", {
+        "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+    })
+    words = message["content"][0]["text"].split(" ")
+    for i, word in enumerate(words):
+        await asyncio.sleep(token_delay)
+        text = word if i == 0 else " " + word
+        yield _sse("content_block_delta", {
+            "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text},
+        })
+    yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": message["usage"]["output_tokens"]},
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+def _echo_message(prompt: Any, model: str) -> Dict[str, Any]:
+    if isinstance(prompt, list):
+        prompt = " ".join(block.get("text", "") for block in prompt)
+    text = f"Echo: {prompt}"
+    return {
+        "id": f"msg_{uuid.uuid4().hex}",
+        "type": "message",
+        "role": "assistant",
+        "model": model,
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(prompt.split()), "output_tokens": len(text.split())},
+    }
+
+
+def _timestamp(seconds: Optional[float]) -> Optional[str]:
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class _MockBatch:
+    """A submitted batch; request i finishes at created + latency * (i + 1) / n"""
+
+    def __init__(self, requests, latency: float):
+        self.id = f"msgbatch_{uuid.uuid4().hex}"
+        self.requests = requests
+        self.latency = latency
+        self.created = time.time()
+        self.cancel_at: Optional[float] = None
+
+    def finish_time(self, index: int) -> float:
+        return self.created + self.latency * (index + 1) / len(self.requests)
+
+    def outcome(self, index: int, now: float) -> Optional[str]:
+        """succeeded, errored or canceled once request `index` is done; None while processing"""
+        finish = self.finish_time(index)
+        if self.cancel_at is not None and self.cancel_at < finish:
+            return "canceled"
+        if finish > now:
+            return None
+        prompt = self.requests[index]["params"]["messages"][-1]["content"]
+        return "errored" if isinstance(prompt, str) and prompt.startswith("!error") else "succeeded"
+
+    def describe(self, base_url: str) -> Dict[str, Any]:
+        now = time.time()
+        counts = {"processing": 0, "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0}
+        for index in range(len(self.requests)):
+            counts[self.outcome(index, now) or "processing"] += 1
+        ended = counts["processing"] == 0
+        ended_at = None
+        if ended:
+            ended_at = self.cancel_at if self.cancel_at is not None else self.finish_time(len(self.requests) - 1)
+        if ended:
+            status = "ended"
+        elif self.cancel_at is not None:
+            status = "canceling"
+        else:
+            status = "in_progress"
+        return {
+            "id": self.id,
+            "type": "message_batch",
+            "processing_status": status,
+            "request_counts": counts,
+            "created_at": _timestamp(self.created),
+            "expires_at": _timestamp(self.created + 86400),
+            "ended_at": _timestamp(ended_at),
+            "cancel_initiated_at": _timestamp(self.cancel_at),
+            "archived_at": None,
+            "results_url": f"{base_url}v1/messages/batches/{self.id}/results" if ended else None,
+        }
+
+    def result_lines(self):
+        now = time.time()
+        for index, request in enumerate(self.requests):
+            outcome = self.outcome(index, now)
+            if outcome == "succeeded":
+                params = request["params"]
+                result = {"type": "succeeded", "message": _echo_message(params["messages"][-1]["content"], params["model"])}
+            elif outcome == "errored":
+                result = {"type": "errored", "error": {
+                    "type": "error", "error": {"type": "invalid_request_error", "message": "Mock error"},
+                }}
+            else:
+                result = {"type": "canceled"}
+            yield json.dumps({"custom_id": request["custom_id"], "result": result}) + "\n"
+
+
+def create_app(latency: float = 0.2, token_delay: float = 0.01, batch_latency: float = 1.0) -> FastAPI:
+    app = FastAPI()
+    app.state.latency = latency
+    app.state.token_delay = token_delay
+    app.state.batch_latency = batch_latency
+    app.state.requests = 0
+    app.state.batches: Dict[str, _MockBatch] = {}
+
+    @app.post("/v1/messages")
+    async def messages(request: Request):
+        body: Dict[str, Any] = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(app.state.latency)
+        message = _echo_message(body["messages"][-1]["content"], body.get("model", "mock"))
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_message(message, app.state.token_delay), media_type="text/event-stream",
+            )
+        return JSONResponse(message)
+
+    def not_found(batch_id: str) -> JSONResponse:
+        return JSONResponse(status_code=404, content={
+            "type": "error", "error": {"type": "not_found_error", "message": f"No batch {batch_id}"},
+        })
+
+    @app.post("/v1/messages/batches")
+    async def create_batch(request: Request):
+        body: Dict[str, Any] = await request.json()
+        app.state.requests += 1
+        batch = _MockBatch(body["requests"], app.state.batch_latency)
+        app.state.batches[batch.id] = batch
+        return JSONResponse(batch.describe(str(request.base_url)))
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str, request: Request):
+        app.state.requests += 1
+        batch = app.state.batches.get(batch_id)
+        if batch is None:
+            return not_found(batch_id)
+        return JSONResponse(batch.describe(str(request.base_url)))
+
+    @app.post("/v1/messages/batches/{batch_id}/cancel")
+    async def cancel_batch(batch_id: str, request: Request):
+        app.state.requests += 1
+        batch = app.state.batches.get(batch_id)
+        if batch is None:
+            return not_found(batch_id)
+        if batch.cancel_at is None:
+            batch.cancel_at = time.time()
+        return JSONResponse(batch.describe(str(request.base_url)))
+
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def batch_results(batch_id: str, request: Request):
+        app.state.requests += 1
+        batch = app.state.batches.get(batch_id)
+        if batch is None:
+            return not_found(batch_id)
+        if batch.describe(str(request.base_url))["processing_status"] != "ended":
+            return JSONResponse(status_code=400, content={
+                "type": "error", "error": {"type": "invalid_request_error", "message": "Batch has not ended"},
+            })
+        return StreamingResponse(batch.result_lines(), media_type="application/binary")
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class MockAnthropicServer:
+    """Runs the mock app on uvicorn in a background thread"""
+
+    def __init__(self, latency: float = 0.2, port: int = 0, token_delay: float = 0.01, batch_latency: float = 1.0):
+        self.app = create_app(latency, token_delay, batch_latency)
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(uvicorn.Config(
+            self.app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off",
+        ))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def request_count(self) -> int:
+        return self.app.state.requests
+
+    def __enter__(self) -> "MockAnthropicServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("mock Anthropic server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
@@ -0,0 +1,126 @@
+"""Bytes saved against CPU spent by HTTP response compression.
+
+For each representative response (tools/list, a tools/call batch, a long
+ask_claude answer, /openapi.json, /metrics and a stream of SSE progress
+events) and each Content-Encoding, reports the size on the wire and the
+compression time. SSE is compressed the way the middleware does it, with
+a flush after every event. Finally times POST /mcp tools/list end to end
+over ASGI with and without Accept-Encoding:
+
+    python -m bench.response_compression --iterations 200
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import time
+from typing import Callable, Dict, List
+
+import api.mcp_server as mcp_server
+from api.events import encode_event
+from api.http_compression import StreamEncoder, compress_body, parse_encodings
+from api.jsonrpc import dumps
+from bench.asgi import asgi_request
+
+
+def sample_responses() -> Dict[str, List[bytes]]:
+    """Response bodies as served; SSE is a list of events, the rest a single body"""
+    async def collect():
+        tools_list = (await asgi_request(mcp_server.app, "POST", "/mcp", dumps(
+            {"jsonrpc": "2.0", "id": 1, "method": "tools/list"}
+        )))[2]
+        batch = (await asgi_request(mcp_server.app, "POST", "/mcp", dumps([
+            {"jsonrpc": "2.0", "id": n, "method": "tools/call", "params": {"name": "hello_claude"}}
+            for n in range(20)
+        ])))[2]
+        openapi = (await asgi_request(mcp_server.app, "GET", "/openapi.json"))[2]
+        metrics = (await asgi_request(mcp_server.app, "GET", "/metrics"))[2]
+        return tools_list, batch, openapi, metrics
+
+    tools_list, batch, openapi, metrics = asyncio.run(collect())
+    # English prose of about the length of a long ask_claude answer
+    prose = "\n\n".join(inspect.getdoc(module) for module in (argparse, inspect, json))[:6000]
+    answer = dumps({"jsonrpc": "2.0", "id": 1, "result": mcp_server.text_result(prose)})
+    events = [
+        encode_event({
+            "jsonrpc": "2.0",
+            "method": "notifications/progress",
+            "params": {"progressToken": "compress-1", "progress": n * 262144, "total": 50 * 262144},
+        }, event_id=n)
+        for n in range(50)
+    ]
+    return {
+        "tools_list": [tools_list],
+        "batch_20": [batch],
+        "ask_claude_6k": [answer],
+        "openapi": [openapi],
+        "metrics": [metrics],
+        "sse_50_events": events,
+    }
+
+
+def best_us(run: Callable[[], int], iterations: int) -> float:
+    """Fastest of three rounds, in microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        best = min(best, (time.perf_counter() - start) / iterations * 1e6)
+    return best
+
+
+def measure(encoding: str, chunks: List[bytes], iterations: int) -> Dict[str, float]:
+    original = sum(len(chunk) for chunk in chunks)
+    if len(chunks) == 1:
+        def run() -> int:
+            return len(compress_body(encoding, chunks[0]))
+    else:
+        def run() -> int:
+            encoder = StreamEncoder(encoding)
+            size = sum(len(encoder.encode(chunk)) for chunk in chunks)
+            return size + len(encoder.encode(b"", last=True))
+    compressed = run()
+    cpu_us = best_us(run, iterations)
+    return {
+        "bytes": compressed,
+        "saved_bytes": original - compressed,
+        "ratio": round(compressed / original, 3),
+        "cpu_us": round(cpu_us, 1),
+        # Bytes saved per microsecond of CPU: the trade being made
+        "saved_bytes_per_cpu_us": round((original - compressed) / cpu_us, 1),
+    }
+
+
+async def end_to_end_us(accept_encoding: str, iterations: int) -> float:
+    body = dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await asgi_request(mcp_server.app, "POST", "/mcp", body, headers)
+        best = min(best, (time.perf_counter() - start) / iterations * 1e6)
+    return round(best, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="compressions per measurement")
+    args = parser.parse_args()
+
+    encodings = parse_encodings("gzip,br,zstd")
+    report: Dict[str, Dict] = {}
+    for name, chunks in sample_responses().items():
+        report[name] = {"original_bytes": sum(len(chunk) for chunk in chunks)}
+        for encoding in encodings:
+            report[name][encoding] = measure(encoding, chunks, args.iterations)
+    report["tools_list_post_us"] = {
+        encoding or "identity": asyncio.run(end_to_end_us(encoding, args.iterations * 5))
+        for encoding in ("", *encodings)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
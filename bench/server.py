@@ -0,0 +1,77 @@
+"""The MCP app under a real uvicorn process, for benchmarks that need HTTP.
+
+    from bench.server import AppServer
+    with AppServer(env={"SESSION_MAX": "50000"}) as server:
+        httpx.post(server.url + "/mcp", json=...)
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """Runs `uvicorn api.mcp_server:app` in a subprocess on a free port"""
+
+    def __init__(self, env: Optional[Dict[str, str]] = None, args: Optional[List[str]] = None):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._env = dict(os.environ, **(env or {}))
+        self._args = args or []
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def pid(self) -> int:
+        return self._process.pid
+
+    def __enter__(self) -> "AppServer":
+        self._process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.mcp_server:app", "--port", str(self.port),
+             "--log-level", "warning", *self._args],
+            env=self._env,
+        )
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                httpx.get(self.url + "/")
+                return self
+            except httpx.TransportError:
+                if time.monotonic() > deadline or self._process.poll() is not None:
+                    self.__exit__(None, None, None)
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc) -> None:
+        self._process.terminate()
+        self._process.wait()
+
+    def cpu_seconds(self) -> float:
+        """User + system CPU time used by the server so far"""
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def _status(self, field: str) -> int:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+        raise RuntimeError(f"{field} not found")
+
+    def rss_bytes(self) -> int:
+        """Resident memory of the server process"""
+        return self._status("VmRSS")
+
+    def peak_rss_bytes(self) -> int:
+        """Highest resident memory the server process has reached"""
+        return self._status("VmHWM")
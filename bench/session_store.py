@@ -0,0 +1,77 @@
+"""Session lookup latency with a large number of live sessions.
+
+Fills each backend with N sessions, then times touch() (the per-request
+check in POST/GET /mcp) for random known ids and for unknown ids:
+
+    python -m bench.session_store --sessions 1000000 --lookups 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from api.sessions import MemorySessionStore, SqliteSessionStore
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def time_lookups(store, ids, lookups):
+    samples = []
+    for session_id in ids[:lookups]:
+        start = time.perf_counter_ns()
+        store.touch(session_id)
+        samples.append(time.perf_counter_ns() - start)
+    return {
+        "p50_us": round(percentile(samples, 0.5) / 1000, 2),
+        "p99_us": round(percentile(samples, 0.99) / 1000, 2),
+        "mean_us": round(statistics.fmean(samples) / 1000, 2),
+    }
+
+
+def run(store, sessions, lookups):
+    ids = [uuid.uuid4().hex for _ in range(sessions)]
+    data = {"created_at": "2025-01-01T00:00:00", "client_info": {"name": "bench", "version": "1.0"}}
+    start = time.perf_counter()
+    for session_id in ids:
+        store.create(session_id, data)
+    fill_seconds = time.perf_counter() - start
+    random.shuffle(ids)
+    missing = [uuid.uuid4().hex for _ in range(lookups)]
+    return {
+        "sessions": len(store),
+        "fill_seconds": round(fill_seconds, 2),
+        "hit": time_lookups(store, ids, lookups),
+        "miss": time_lookups(store, missing, lookups),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends:
+        if backend == "memory":
+            store = MemorySessionStore(ttl=3600, max_sessions=args.sessions)
+            results[backend] = run(store, args.sessions, args.lookups)
+        else:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "sessions.sqlite3")
+                store = SqliteSessionStore(path, ttl=3600, max_sessions=args.sessions)
+                results[backend] = run(store, args.sessions, args.lookups)
+                store.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Server memory per idle GET /mcp event stream.
+
+Starts the app under uvicorn in a subprocess, creates one session per
+connection, opens N concurrent SSE streams and reports the growth in the
+server's resident memory along with the hub's subscriber count:
+
+    python -m bench.sse_connections --connections 10000
+
+Needs a file descriptor limit above N (ulimit -n).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from bench.server import AppServer
+
+
+async def open_stream(port: int, session_id: str):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET /mcp HTTP/1.1\r\nHost: bench\r\nAccept: text/event-stream\r\n"
+        f"Mcp-Session-Id: {session_id}\r\n\r\n".encode()
+    )
+    await writer.drain()
+    headers = await reader.readuntil(b"\r\n\r\n")
+    if not headers.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(headers.decode(errors="replace"))
+    return reader, writer
+
+
+async def run(connections: int, server: AppServer) -> dict:
+    port = server.port
+    limits = httpx.Limits(max_connections=32)
+    async with httpx.AsyncClient(base_url=server.url, limits=limits) as http:
+        async def initialize(n: int) -> str:
+            response = await http.post("/mcp", json={"jsonrpc": "2.0", "id": n, "method": "initialize", "params": {}})
+            return response.headers["mcp-session-id"]
+
+        session_ids = []
+        for start in range(0, connections, 500):
+            session_ids += await asyncio.gather(*(initialize(n) for n in range(start, min(connections, start + 500))))
+
+        # Warm up one stream so lazily created machinery is not counted
+        warm = await open_stream(port, session_ids[0])
+        await asyncio.sleep(0.5)
+        before = server.rss_bytes()
+
+        started = time.perf_counter()
+        streams = [warm]
+        for start in range(1, connections, 500):
+            streams += await asyncio.gather(
+                *(open_stream(port, sid) for sid in session_ids[start:start + 500])
+            )
+        open_seconds = time.perf_counter() - started
+        await asyncio.sleep(1.0)
+        after = server.rss_bytes()
+
+        stats = (await http.get("/stats")).json()["event_streams"]
+
+        for _, writer in streams:
+            writer.close()
+
+    return {
+        "connections": connections,
+        "open_seconds": round(open_seconds, 2),
+        "rss_before_mib": round(before / 2**20, 1),
+        "rss_after_mib": round(after / 2**20, 1),
+        "bytes_per_connection": round((after - before) / max(1, connections - 1)),
+        "hub": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=10_000)
+    args = parser.parse_args()
+
+    env = {"SESSION_MAX": str(args.connections * 2)}
+    with AppServer(env=env, args=["--backlog", "4096"]) as server:
+        result = asyncio.run(run(args.connections, server))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
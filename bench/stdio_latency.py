@@ -0,0 +1,122 @@
+"""Per-call latency and pipelined throughput: stdio transport vs HTTP.
+
+Runs the same tools/call (hello_claude) and tools/list requests against
+`python -m api` over pipes and against `uvicorn api.mcp_server:app` over
+a keep-alive HTTP connection pool. Sequential round trips show the
+per-call transport overhead; the pipelined runs keep --concurrency
+requests in flight (one pipe vs that many connections):
+
+    python -m bench.stdio_latency --requests 2000 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+from bench.server import AppServer
+
+BODIES = {
+    "hello_claude": {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": "hello_claude"}},
+    "tools/list": {"jsonrpc": "2.0", "method": "tools/list"},
+}
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summary(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    return {
+        "p50_us": round(percentile(latencies, 0.5) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+    }
+
+
+def request_line(body: Dict[str, Any], request_id: int) -> bytes:
+    return json.dumps(dict(body, id=request_id)).encode() + b"\n"
+
+
+async def stdio_run(body: Dict[str, Any], requests: int, concurrency: int) -> Dict[str, float]:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "api",
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, limit=1 << 24,
+    )
+    try:
+        process.stdin.write(request_line({"jsonrpc": "2.0", "method": "initialize", "params": {}}, 0))
+        await process.stdout.readline()
+        for n in range(50):
+            process.stdin.write(request_line(body, n))
+            await process.stdout.readline()
+
+        sent: Dict[int, float] = {}
+        latencies: List[float] = []
+        next_id = 1
+        started = time.perf_counter()
+
+        def send() -> None:
+            nonlocal next_id
+            sent[next_id] = time.perf_counter()
+            process.stdin.write(request_line(body, next_id))
+            next_id += 1
+
+        for _ in range(min(concurrency, requests)):
+            send()
+        while len(latencies) < requests:
+            response = json.loads(await process.stdout.readline())
+            latencies.append(time.perf_counter() - sent.pop(response["id"]))
+            if next_id <= requests:
+                send()
+        return summary(latencies, time.perf_counter() - started)
+    finally:
+        process.stdin.close()
+        await process.wait()
+
+
+async def http_run(url: str, body: Dict[str, Any], requests: int, concurrency: int) -> Dict[str, float]:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+        response = await http.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+        headers = {"Content-Type": "application/json", "Mcp-Session-Id": response.headers["mcp-session-id"]}
+        for n in range(50):
+            await http.post("/mcp", content=request_line(body, n), headers=headers)
+
+        latencies: List[float] = []
+        counter = iter(range(1, requests + 1))
+
+        async def worker() -> None:
+            for n in counter:
+                start = time.perf_counter()
+                response = await http.post("/mcp", content=request_line(body, n), headers=headers)
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summary(latencies, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per measurement")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight for the pipelined runs")
+    args = parser.parse_args()
+
+    report: Dict[str, Dict] = {}
+    with AppServer() as server:
+        for name, body in BODIES.items():
+            for label, concurrency in (("sequential", 1), ("pipelined", args.concurrency)):
+                report[f"{name}/{label}"] = {
+                    "stdio": asyncio.run(stdio_run(body, args.requests, concurrency)),
+                    "http": asyncio.run(http_run(server.url, body, args.requests, concurrency)),
+                }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
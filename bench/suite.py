@@ -0,0 +1,219 @@
+"""Latency and throughput of POST /mcp, in process and over real HTTP.
+
+Runs every scenario (initialize, tools/list, hello_claude, a batch,
+compress_file at several payload sizes, ask_claude against the local
+mock Messages API) through httpx's ASGITransport and against uvicorn,
+and reports p50/p99 latency and throughput as JSON:
+
+    python -m bench.suite --output before.json
+    python -m bench.suite --output after.json --compare before.json
+
+With --compare, scenarios whose p50 or throughput got worse by more than
+--threshold percent are listed and the exit status is 1.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+import api.mcp_server as mcp_server
+from api import claude
+from bench.mock_anthropic import MockAnthropicServer
+from bench.server import AppServer
+
+Body = Callable[[int], Any]
+
+
+def tool_call(name: str, arguments: Dict[str, Any]) -> Body:
+    return lambda n: {"jsonrpc": "2.0", "id": n, "method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+def sample_content(size: int) -> str:
+    """Base64 of `size` bytes of text-like, moderately compressible data"""
+    rng = random.Random(size)
+    words = [bytes(rng.choices(b"abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 9))) for _ in range(512)]
+    data = bytearray()
+    while len(data) < size:
+        data += rng.choice(words) + b" "
+    return base64.b64encode(bytes(data[:size])).decode()
+
+
+def build_scenarios(args) -> Dict[str, Dict[str, Any]]:
+    """name -> {"body": n -> request, "requests": count}"""
+    scenarios: Dict[str, Dict[str, Any]] = {
+        "initialize": {"body": lambda n: {"jsonrpc": "2.0", "id": n, "method": "initialize", "params": {}}},
+        "tools/list": {"body": lambda n: {"jsonrpc": "2.0", "id": n, "method": "tools/list"}},
+        "hello_claude": {"body": tool_call("hello_claude", {})},
+        f"batch/{args.batch_size}": {"body": lambda n: [
+            {"jsonrpc": "2.0", "id": i, "method": "tools/list"} if i % 2 else tool_call("hello_claude", {})(i)
+            for i in range(args.batch_size)
+        ]},
+        "ask_claude": {"body": lambda n: tool_call("ask_claude", {"prompt": f"question {n}", "cache": False})(n)},
+    }
+    for size_kib in args.compress_sizes:
+        content = sample_content(size_kib * 1024)
+        scenarios[f"compress_file/{size_kib}KiB"] = {
+            "body": tool_call("compress_file", {"content": content, "filename": "bench.txt", "format": "gzip"}),
+            # Keep the large payloads to a bounded amount of work
+            "requests": max(10, min(args.requests, args.requests * 16 // size_kib)),
+        }
+    for scenario in scenarios.values():
+        scenario.setdefault("requests", args.requests)
+    return scenarios
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def check(response: httpx.Response) -> None:
+    response.raise_for_status()
+    body = response.json()
+    for item in body if isinstance(body, list) else [body]:
+        if "error" in item or item.get("result", {}).get("isError"):
+            raise RuntimeError(f"Request failed: {response.text[:300]}")
+
+
+async def measure(http: httpx.AsyncClient, body: Body, requests: int, concurrency: int, headers) -> Dict[str, Any]:
+    latencies: List[float] = []
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for n in counter:
+            payload = json.dumps(body(n)).encode()
+            start = time.perf_counter()
+            response = await http.post("/mcp", content=payload, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            check(response)
+
+    for n in range(min(3, requests)):
+        check(await http.post("/mcp", content=json.dumps(body(n)).encode(), headers=headers))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+    }
+
+
+async def run_scenarios(http: httpx.AsyncClient, scenarios, concurrency: int) -> Dict[str, Any]:
+    response = await http.post("/mcp", json={"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+    session = {"Content-Type": "application/json", "Mcp-Session-Id": response.headers["mcp-session-id"]}
+    results = {}
+    for name, scenario in scenarios.items():
+        headers = {"Content-Type": "application/json"} if name == "initialize" else session
+        results[name] = await measure(http, scenario["body"], scenario["requests"], concurrency, headers)
+    return results
+
+
+def run_asgi(scenarios, concurrency: int, mock_url: str) -> Dict[str, Any]:
+    async def run():
+        # The client's connections belong to this event loop, so close it here
+        claude.set_client(claude.create_client(api_key="bench", base_url=mock_url))
+        transport = httpx.ASGITransport(app=mcp_server.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as http:
+                return await run_scenarios(http, scenarios, concurrency)
+        finally:
+            await claude.close_client()
+
+    return asyncio.run(run())
+
+
+def run_uvicorn(scenarios, concurrency: int, mock_url: str) -> Dict[str, Any]:
+    async def run(url: str):
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as http:
+            return await run_scenarios(http, scenarios, concurrency)
+
+    env = {"ANTHROPIC_API_KEY": "bench", "ANTHROPIC_BASE_URL": mock_url, "SESSION_MAX": "100000"}
+    with AppServer(env=env) as server:
+        return asyncio.run(run(server.url))
+
+
+def metadata(args) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Scenarios that regressed by more than `threshold` percent"""
+    regressions = []
+    for transport, results in current.items():
+        if transport == "meta":
+            continue
+        for name, result in results.items():
+            before = baseline.get(transport, {}).get(name)
+            if before is None:
+                continue
+            p50 = (result["p50_ms"] / before["p50_ms"] - 1) * 100
+            throughput = (1 - result["requests_per_second"] / before["requests_per_second"]) * 100
+            if p50 > threshold or throughput > threshold:
+                regressions.append(
+                    f"{transport} {name}: p50 {before['p50_ms']} -> {result['p50_ms']} ms, "
+                    f"throughput {before['requests_per_second']} -> {result['requests_per_second']} req/s"
+                )
+    return regressions
+
+
+def main() -> Optional[int]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transports", nargs="+", choices=["asgi", "uvicorn"], default=["asgi", "uvicorn"])
+    parser.add_argument("--requests", type=int, default=300, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--compress-sizes", type=int, nargs="+", default=[1, 64, 1024], help="KiB")
+    parser.add_argument("--mock-latency", type=float, default=0.05, help="mock upstream latency in seconds")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--compare", help="baseline report to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    scenarios = build_scenarios(args)
+    report: Dict[str, Any] = {"meta": metadata(args)}
+    with MockAnthropicServer(latency=args.mock_latency) as mock:
+        if "asgi" in args.transports:
+            report["asgi"] = run_asgi(scenarios, args.concurrency, mock.url)
+        if "uvicorn" in args.transports:
+            report["uvicorn"] = run_uvicorn(scenarios, args.concurrency, mock.url)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())